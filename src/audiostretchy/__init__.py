@@ -16,6 +16,31 @@ except PackageNotFoundError:
 finally:
     del version, PackageNotFoundError
 
-from .core import AudioStretch, stretch_audio
+from .analysis import PeriodAnalysis
+from .arrays import required_output_frames, stretch_array
+from .concat import stretch_concat
+from .core import AudioStretch, stretch_audio, stretch_bytes
+from .cost import Estimate, estimate
+from .parallel import stretch_arrays_parallel
+from .plugin import StretchPlugin
+from .render_cache import RenderCache
+from .segments import SegmentedAudioFile
+from .stream import StretchStream
 
-__all__ = ["AudioStretch", "__version__", "stretch_audio"]
+__all__ = [
+    "AudioStretch",
+    "Estimate",
+    "PeriodAnalysis",
+    "RenderCache",
+    "SegmentedAudioFile",
+    "StretchPlugin",
+    "StretchStream",
+    "__version__",
+    "estimate",
+    "required_output_frames",
+    "stretch_array",
+    "stretch_arrays_parallel",
+    "stretch_audio",
+    "stretch_bytes",
+    "stretch_concat",
+]
@@ -5,14 +5,24 @@ Command-line interface for AudioStretchy.
 Provides CLI access to audio time-stretching functionality.
 """
 
+import sys
+
 import fire
 
+from .batch import run_batch
+from .calibrate import calibrate
 from .core import stretch_audio
 
+# Subcommands; any other first argument is an input path for stretch_audio.
+COMMANDS = {"batch": run_batch, "calibrate": calibrate}
+
 
 def main():
     """Main CLI entry point."""
-    fire.Fire(stretch_audio)
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        fire.Fire(COMMANDS[sys.argv[1]], command=sys.argv[2:], name=sys.argv[1])
+    else:
+        fire.Fire(stretch_audio)
 
 
 if __name__ == "__main__":
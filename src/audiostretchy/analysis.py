@@ -0,0 +1,251 @@
+# this_file: src/audiostretchy/analysis.py
+"""Ratio-independent period analysis and splice synthesis.
+
+TDHS does two things per output period: it finds the local pitch period
+(correlating the signal against every candidate lag) and then copies, repeats
+or drops one period with a cross-fade. Only the second step depends on the
+stretch ratio. This module separates the two, so one clip can be rendered at
+many ratios while paying for period detection once:
+
+    analysis = processor.analyze()
+    analysis.save("speech.tdhs")
+    for ratio in (0.8, 0.9, 1.1, 1.25):
+        processor.stretch(ratio, analysis=analysis)
+
+The native library does detection and synthesis in one pass and offers no way
+to feed it a precomputed period, so the split lives here: a sample-accurate
+period track from :func:`audiostretchy.pitch.frame_periods`, and a NumPy
+splice/cross-fade pass that follows the same insert/drop rules as TDHS.
+"""
+
+from pathlib import Path
+from typing import BinaryIO
+
+import numpy as np
+
+from .pitch import frame_periods
+from .stream import period_range
+
+# Bumped whenever the sidecar layout changes.
+SIDECAR_VERSION = 1
+
+
+class PeriodAnalysis:
+    """
+    Pitch-period track of one signal, reusable for any stretch ratio.
+
+    Frame ``k`` covers input samples ``[k * hop, (k + 1) * hop)`` and has
+    period ``periods[k]``. Unvoiced frames carry the median voiced period, so
+    every frame can be spliced.
+    """
+
+    def __init__(
+        self,
+        samplerate: int,
+        num_frames: int,
+        hop: int,
+        periods: np.ndarray,
+    ) -> None:
+        """
+        Wrap a period track.
+
+        Args:
+            samplerate: Sample rate of the analysed signal in Hz
+            num_frames: Length of the analysed signal in frames
+            hop: Input samples covered by each entry of ``periods``
+            periods: Period of each frame in samples, all positive
+
+        Raises:
+            ValueError: If the track is empty or holds non-positive periods
+        """
+        periods = np.asarray(periods, dtype=np.int32)
+        if hop <= 0 or len(periods) == 0 or periods.min() <= 0:
+            raise ValueError("A period track needs a positive hop and periods")
+        self.samplerate = samplerate
+        self.num_frames = num_frames
+        self.hop = hop
+        self.periods = periods
+
+    def check(self, samples: np.ndarray, samplerate: int) -> None:
+        """
+        Make sure the analysis was made from ``samples``.
+
+        Raises:
+            ValueError: If the sample rate or length differs
+        """
+        if samplerate != self.samplerate or samples.shape[-1] != self.num_frames:
+            raise ValueError(
+                f"Analysis is for {self.num_frames} frames at {self.samplerate} Hz, "
+                f"got {samples.shape[-1]} frames at {samplerate} Hz"
+            )
+
+    def save(
+        self, path: str | Path | None = None, file: BinaryIO | None = None
+    ) -> None:
+        """
+        Write the analysis as a ``.tdhs`` sidecar (a NumPy ``.npz`` archive).
+
+        Args:
+            path: Path of the sidecar; written as given, without adding ``.npz``
+            file: Binary I/O object to write to instead of ``path``
+
+        Raises:
+            ValueError: If neither path nor file is provided
+            IOError: If the sidecar cannot be written
+        """
+        if path is None and file is None:
+            raise ValueError("Either path or file must be provided")
+        header = np.array(
+            [SIDECAR_VERSION, self.samplerate, self.num_frames, self.hop],
+            dtype=np.int64,
+        )
+        try:
+            if file is not None:
+                np.savez(file, header=header, periods=self.periods)
+            else:
+                with Path(str(path)).open("wb") as f:
+                    np.savez(f, header=header, periods=self.periods)
+        except Exception as e:
+            target_desc = str(path) if path else "file object"
+            raise OSError(f"Could not save analysis to {target_desc}: {e}") from e
+
+    @classmethod
+    def load(
+        cls, path: str | Path | None = None, file: BinaryIO | None = None
+    ) -> "PeriodAnalysis":
+        """
+        Read a sidecar written by :meth:`save`.
+
+        Raises:
+            ValueError: If neither path nor file is provided, or the sidecar
+                comes from an incompatible version
+            IOError: If the sidecar cannot be read
+        """
+        if path is None and file is None:
+            raise ValueError("Either path or file must be provided")
+        source = file if file is not None else str(path)
+        try:
+            with np.load(source) as data:
+                header = data["header"]
+                periods = data["periods"]
+        except Exception as e:
+            source_desc = str(path) if path else "file object"
+            raise OSError(f"Could not read analysis {source_desc}: {e}") from e
+
+        version, samplerate, num_frames, hop = (int(value) for value in header)
+        if version != SIDECAR_VERSION:
+            raise ValueError(f"Unsupported analysis sidecar version {version}")
+        return cls(samplerate, num_frames, hop, periods)
+
+
+def analyze(
+    samples: np.ndarray,
+    samplerate: int,
+    upper_freq: int = 333,
+    lower_freq: int = 55,
+) -> PeriodAnalysis:
+    """
+    Measure the pitch period across a whole signal.
+
+    Args:
+        samples: Float audio as ``(channels, frames)``
+        samplerate: Sample rate of ``samples`` in Hz
+        upper_freq: Upper frequency limit for period detection (Hz)
+        lower_freq: Lower frequency limit for period detection (Hz)
+
+    Returns:
+        The signal's :class:`PeriodAnalysis`.
+    """
+    min_period, max_period = period_range(samplerate, upper_freq, lower_freq)
+    # Back-to-back frames at the full rate: one sample-accurate period per frame.
+    _, periods = frame_periods(
+        samples,
+        samplerate,
+        min_period,
+        max_period,
+        max_frames=None,
+        analysis_rate=samplerate,
+    )
+    hop = 2 * max_period
+
+    voiced = periods[periods > 0]
+    fallback = int(np.median(voiced)) if len(voiced) else (min_period + max_period) // 2
+    periods = np.where(periods > 0, periods, fallback)
+    if len(periods) == 0:
+        periods = np.array([fallback])
+    return PeriodAnalysis(samplerate, samples.shape[1], hop, periods)
+
+
+def synthesize(
+    samples: np.ndarray, analysis: PeriodAnalysis, ratio: float
+) -> np.ndarray:
+    """
+    Stretch ``samples`` by splicing whole periods from ``analysis``.
+
+    The input is walked one period at a time. While the output keeps pace
+    with ``input position * ratio`` a period is copied as is; when the output
+    falls more than half a period behind, the previous period is repeated,
+    and when it runs more than half a period ahead, periods are skipped. Each
+    repeat or skip is a linear cross-fade between the two candidate periods,
+    so both seams stay continuous.
+
+    Args:
+        samples: Float audio as ``(channels, frames)`` matching ``analysis``
+        analysis: Period track of ``samples``
+        ratio: Stretch ratio (>1.0 = slower, <1.0 = faster)
+
+    Returns:
+        Stretched float32 audio as ``(channels, frames)``.
+    """
+    num_channels, num_frames = samples.shape
+    periods = analysis.periods.tolist()
+    hop, last = analysis.hop, len(periods) - 1
+    longest = max(periods)
+    output = np.empty(
+        (num_channels, int(num_frames * ratio) + 2 * longest + 1), dtype=np.float32
+    )
+    fades: dict[int, np.ndarray] = {}
+
+    position = produced = 0
+    while position < num_frames:
+        period = periods[min(position // hop, last)]
+        if position + period > num_frames:
+            break
+        fade = fades.get(period)
+        if fade is None:
+            fade = fades[period] = (np.arange(period, dtype=np.float32) + 0.5) / period
+
+        drift = produced - position * ratio
+        if drift < -period / 2 and position >= period:
+            # Behind: fade from the next period into the previous one.
+            current = samples[:, position : position + period]
+            previous = samples[:, position - period : position]
+            advance = 0
+            target = output[:, produced : produced + period]
+            np.subtract(previous, current, out=target)
+            target *= fade
+            target += current
+        elif drift > period / 2 and position + 2 * period <= num_frames:
+            # Ahead: skip enough periods to land back near the timeline.
+            skip = max(1, round((drift + period) / (period * ratio)) - 1)
+            skip = min(skip, (num_frames - position) // period - 1)
+            current = samples[:, position : position + period]
+            following = samples[
+                :, position + skip * period : position + (skip + 1) * period
+            ]
+            advance = (skip + 1) * period
+            target = output[:, produced : produced + period]
+            np.subtract(following, current, out=target)
+            target *= fade
+            target += current
+        else:
+            advance = period
+            output[:, produced : produced + period] = samples[
+                :, position : position + period
+            ]
+        position += advance
+        produced += period
+
+    tail = num_frames - position
+    output[:, produced : produced + tail] = samples[:, position:]
+    return output[:, : produced + tail]
@@ -0,0 +1,233 @@
+# this_file: src/audiostretchy/arrays.py
+"""Stretch NumPy arrays directly, optionally into caller-owned buffers.
+
+:class:`AudioStretch` owns its samples and allocates a fresh result on every
+call. :func:`stretch_array` is the allocation-conscious counterpart for code
+that already holds audio in arrays: it accepts float32, float64 or int16 in
+``(channels, frames)`` or interleaved ``(frames, channels)`` layout, hands the
+native library a view whenever the layout and dtype already match, and can
+write into an ``out`` buffer sized with :func:`required_output_frames`. With
+interleaved int16 in and out a call makes no array allocations at all.
+"""
+
+import numpy as np
+
+from .c_interface import TDHSAudioStretch
+from .convert import INT16_SCALE, interleave_to_int16
+from .pitch import estimate_period_range
+from .stream import channel_groups, period_range, tdhs_flags
+
+SUPPORTED_DTYPES = (np.dtype(np.float32), np.dtype(np.float64), np.dtype(np.int16))
+
+
+def required_output_frames(
+    num_frames: int,
+    ratio: float,
+    samplerate: int = 44100,
+    upper_freq: int = 333,
+    lower_freq: int = 55,
+    double_range: bool = False,
+) -> int:
+    """
+    Return how many frames an ``out`` buffer for :func:`stretch_array` needs.
+
+    The bound covers the stretched signal plus the flushed tail and holds for
+    every channel count and for ``auto_range``, which only narrows the search.
+
+    Args:
+        num_frames: Length of the input in frames
+        ratio: Stretch ratio (>1.0 = slower, <1.0 = faster)
+        samplerate: Sample rate of the input in Hz
+        upper_freq: Upper frequency limit for period detection (Hz)
+        lower_freq: Lower frequency limit for period detection (Hz)
+        double_range: Enable extended ratio range (0.25-4.0)
+
+    Returns:
+        Minimum number of frames in ``out``.
+    """
+    shortest, longest = period_range(samplerate, upper_freq, lower_freq)
+    stretcher = TDHSAudioStretch(
+        shortest, longest, 1, tdhs_flags(ratio, double_range, False)
+    )
+    try:
+        return _capacity(stretcher, num_frames, ratio)
+    finally:
+        stretcher.deinit()
+
+
+def stretch_array(
+    samples: np.ndarray,
+    samplerate: int,
+    ratio: float = 1.0,
+    out: np.ndarray | None = None,
+    interleaved: bool | None = None,
+    upper_freq: int = 333,
+    lower_freq: int = 55,
+    double_range: bool = False,
+    fast_detection: bool = False,
+    auto_range: bool = False,
+    linked_channels: bool = False,
+    unlinked_channels: bool = False,
+) -> np.ndarray:
+    """
+    Time-stretch an array of samples.
+
+    Args:
+        samples: float32, float64 or int16 audio; 1-D mono, ``(channels,
+            frames)`` or interleaved ``(frames, channels)``
+        samplerate: Sample rate of ``samples`` in Hz
+        ratio: Stretch ratio (>1.0 = slower, <1.0 = faster)
+        out: Optional buffer for the result with the same dtype and layout as
+            ``samples`` and at least :func:`required_output_frames` frames
+        interleaved: Whether a 2-D ``samples`` is ``(frames, channels)``; None
+            takes the smaller dimension to be the channels, like Pedalboard
+        upper_freq: Upper frequency limit for period detection (Hz)
+        lower_freq: Lower frequency limit for period detection (Hz)
+        double_range: Enable extended ratio range (0.25-4.0)
+        fast_detection: Use faster period detection algorithm
+        auto_range: Narrow the period search to the estimated F0 range
+        linked_channels: Share one TDHS context across layouts wider than stereo
+        unlinked_channels: Stretch the channels one after another, each
+            on its own mono context
+
+    Returns:
+        The stretched audio in the dtype and layout of ``samples``; a view of
+        ``out`` trimmed to the frames produced when ``out`` is given.
+
+    Raises:
+        ValueError: If the dtype, ratio or ``out`` buffer is unsuitable
+        RuntimeError: If stretching fails
+    """
+    if samples.dtype not in SUPPORTED_DTYPES:
+        raise ValueError(f"Unsupported sample dtype {samples.dtype}")
+    if ratio <= 0:
+        raise ValueError("Stretch ratio must be positive")
+    if samples.ndim == 1:
+        # Mono is laid out the same either way; treat it as interleaved.
+        interleaved = True
+    elif interleaved is None:
+        interleaved = samples.shape[0] > samples.shape[1]
+    planar = _planar(samples, interleaved)
+    num_channels, num_frames = planar.shape
+
+    if out is not None:
+        if out.dtype != samples.dtype or out.ndim != samples.ndim:
+            raise ValueError("out must have the same dtype and layout as samples")
+        if _planar(out, interleaved).shape[0] != num_channels:
+            raise ValueError(f"out must have {num_channels} channels")
+
+    if ratio == 1.0:
+        if out is None:
+            return samples
+        _planar(out, interleaved)[:, :num_frames] = planar
+        return _trim(out, num_frames, interleaved)
+
+    min_period, max_period = period_range(samplerate, upper_freq, lower_freq)
+    if auto_range:
+        estimated = estimate_period_range(planar, samplerate, min_period, max_period)
+        if estimated is not None:
+            min_period, max_period = estimated
+    flags = tdhs_flags(ratio, double_range, fast_detection)
+
+    groups = channel_groups(num_channels, linked_channels, unlinked_channels)
+    results = []
+    for group in groups:
+        stretcher = TDHSAudioStretch(
+            min_period, max_period, group.stop - group.start, flags
+        )
+        try:
+            capacity = _capacity(stretcher, num_frames, ratio)
+            available = None if out is None else _planar(out, interleaved).shape[1]
+            if available is not None and available < capacity:
+                raise ValueError(
+                    f"out holds {available} frames but up to {capacity} "
+                    "may be produced; size it with required_output_frames()"
+                )
+            results.append(
+                _stretch_group(
+                    stretcher,
+                    planar[group],
+                    ratio,
+                    capacity,
+                    # Only an interleaved out spanning every channel can take
+                    # the native output in place.
+                    out if len(groups) == 1 and interleaved else None,
+                )
+            )
+        finally:
+            stretcher.deinit()
+
+    produced = min(native.shape[0] for native in results)
+    if out is not None and np.may_share_memory(results[0], out):
+        return _trim(out, produced, interleaved)
+
+    if out is None:
+        if len(groups) == 1 and interleaved and results[0].dtype == samples.dtype:
+            result = results[0]
+            return result.reshape(-1) if samples.ndim == 1 else result
+        shape = (produced, num_channels) if interleaved else (num_channels, produced)
+        out = np.empty(shape, dtype=samples.dtype)
+        if samples.ndim == 1:
+            out = out.reshape(-1)
+
+    out_planar = _planar(out, interleaved)
+    for group, native in zip(groups, results, strict=True):
+        _store(native[:produced], out_planar[group, :produced])
+    return _trim(out, produced, interleaved)
+
+
+def _capacity(stretcher: TDHSAudioStretch, num_frames: int, ratio: float) -> int:
+    """Output frames needed for ``num_frames`` of input plus the flush tail."""
+    return stretcher.output_capacity(num_frames, ratio) + stretcher.output_capacity(
+        0, ratio
+    )
+
+
+def _planar(array: np.ndarray, interleaved: bool) -> np.ndarray:
+    """Return a ``(channels, frames)`` view of ``array``."""
+    if array.ndim == 1:
+        return array.reshape(1, -1)
+    return array.T if interleaved else array
+
+
+def _trim(array: np.ndarray, num_frames: int, interleaved: bool) -> np.ndarray:
+    """Return the first ``num_frames`` frames of ``array`` in its own layout."""
+    if array.ndim == 1 or interleaved:
+        return array[:num_frames]
+    return array[:, :num_frames]
+
+
+def _stretch_group(
+    stretcher: TDHSAudioStretch,
+    samples: np.ndarray,
+    ratio: float,
+    capacity: int,
+    out: np.ndarray | None,
+) -> np.ndarray:
+    """Stretch one ``(channels, frames)`` group; return ``(frames, channels)``."""
+    num_channels, num_frames = samples.shape
+
+    frames_first = samples.T
+    if samples.dtype != np.int16:
+        source = interleave_to_int16(samples)
+    elif frames_first.flags.c_contiguous:
+        source = frames_first.reshape(-1)
+    else:
+        source = np.ascontiguousarray(frames_first).reshape(-1)
+
+    if out is not None and out.dtype == np.int16 and out.flags.c_contiguous:
+        output = out.reshape(-1)
+    else:
+        output = np.empty(capacity * num_channels, dtype=np.int16)
+
+    produced = stretcher.process_samples(source, num_frames, output, ratio)
+    produced += stretcher.flush(output[produced * num_channels :])
+    return output[: produced * num_channels].reshape(-1, num_channels)
+
+
+def _store(native: np.ndarray, target: np.ndarray) -> None:
+    """Write ``(frames, channels)`` native output into a planar target view."""
+    if native.dtype == np.int16 and target.dtype != np.int16:
+        np.divide(native.T, INT16_SCALE, out=target)
+    else:
+        target[...] = native.T
@@ -0,0 +1,314 @@
+# this_file: src/audiostretchy/batch.py
+"""Manifest-driven batch rendering with resume and skip-if-up-to-date.
+
+A manifest is a JSON Lines file; each line names an ``input`` and an
+``output`` plus any :func:`~audiostretchy.core.stretch_audio` parameters::
+
+    {"input": "talks/a.mp3", "output": "out/a.mp3", "ratio": 0.8}
+    {"input": "talks/b.flac", "output": "out/b.flac", "ratio": 0.8, "auto_range": true}
+
+Run it with ``audiostretchy batch --manifest jobs.jsonl``, or spread it over
+machines with ``--shard 1/4`` ... ``--shard 4/4``. Every finished job is
+appended to a journal next to the manifest, so a run that is interrupted
+resumes where it stopped; the journal is removed once a run completes without
+failures. Each output also gets a small sidecar holding the hash of the
+parameters it was rendered with; a job whose output is newer than its input
+and carries the same hash is skipped without being re-rendered.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, TextIO
+
+from pedalboard.io import ReadableAudioFile
+
+from . import metrics, profile
+from .core import stretch_audio
+
+# Suffixes of the files kept next to the manifest and next to each output.
+JOURNAL_SUFFIX = ".journal"
+SIDECAR_SUFFIX = ".stretch.json"
+
+# stretch_audio() parameters a job cannot honour: its skip check, sidecar and
+# journal entry all describe the single file at "output".
+UNSUPPORTED = frozenset({"outputs", "segment_seconds"})
+
+# stretch_audio() parameters a manifest line may set.
+PARAMETERS = (
+    frozenset(inspect.signature(stretch_audio).parameters)
+    - {"input_path", "output_path"}
+    - UNSUPPORTED
+)
+
+
+class Job:
+    """One manifest line: an input, an output and its stretch parameters."""
+
+    def __init__(self, input: str, output: str, **params: Any) -> None:
+        """
+        Describe a render.
+
+        Args:
+            input: Path of the source audio file
+            output: Path the stretched audio is written to
+            **params: Keyword arguments for :func:`stretch_audio`
+
+        Raises:
+            ValueError: If a parameter is not one ``stretch_audio`` takes, or
+                one a job cannot honour
+        """
+        unsupported = set(params) & UNSUPPORTED
+        if unsupported:
+            raise ValueError(
+                f"Not supported in batch jobs: {', '.join(sorted(unsupported))}; "
+                "use one line per output file"
+            )
+        unknown = set(params) - PARAMETERS
+        if unknown:
+            raise ValueError(
+                f"Unknown stretch parameters: {', '.join(sorted(unknown))}"
+            )
+        self.input = Path(input)
+        self.output = Path(output)
+        self.params = params
+
+    @property
+    def digest(self) -> str:
+        """Hash identifying the input path and the parameters used."""
+        payload = json.dumps(
+            {"input": str(self.input), "params": self.params}, sort_keys=True
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    @property
+    def sidecar(self) -> Path:
+        """Path of the file recording the parameter hash of the output."""
+        return self.output.with_name(self.output.name + SIDECAR_SUFFIX)
+
+    def output_newer(self) -> bool:
+        """Whether the output exists and is at least as new as the input."""
+        try:
+            return self.output.stat().st_mtime >= self.input.stat().st_mtime
+        except OSError:
+            return False
+
+    def up_to_date(self) -> bool:
+        """Whether the output is newer than the input and has the same hash."""
+        if not self.output_newer():
+            return False
+        try:
+            recorded = json.loads(self.sidecar.read_text())
+        except (OSError, ValueError):
+            return False
+        return recorded.get("hash") == self.digest
+
+
+def load_manifest(manifest: str | Path) -> list[Job]:
+    """
+    Read the jobs of a JSON Lines manifest; blank lines are ignored.
+
+    Raises:
+        ValueError: If a line is not a JSON object with input and output
+        IOError: If the manifest cannot be read
+    """
+    jobs = []
+    with Path(manifest).open() as f:
+        for number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+                jobs.append(Job(**entry))
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"{manifest}:{number}: invalid job: {e}") from e
+    return jobs
+
+
+def parse_shard(shard: str) -> tuple[int, int]:
+    """
+    Parse an ``i/n`` shard specification (1-based ``i``).
+
+    Raises:
+        ValueError: If the specification is malformed or out of range
+    """
+    try:
+        index, count = (int(part) for part in str(shard).split("/"))
+    except ValueError as e:
+        raise ValueError(f"Shard must look like i/n, got {shard!r}") from e
+    if not 1 <= index <= count:
+        raise ValueError(f"Shard {shard!r} is out of range")
+    return index, count
+
+
+def shard_of(job: Job, count: int) -> int:
+    """Return the 1-based shard of ``job``; stable across runs and machines."""
+    digest = hashlib.sha256(str(job.output).encode()).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+
+def probe_duration(path: Path) -> float:
+    """Return a file's duration in seconds from its header, without decoding."""
+    try:
+        with ReadableAudioFile(str(path)) as f:
+            return f.frames / f.samplerate
+    except Exception:
+        # Unreadable inputs fail fast when rendered; schedule them last.
+        return 0.0
+
+
+def run_batch(
+    manifest: str | Path,
+    workers: int | None = None,
+    journal: str | Path | None = None,
+    shard: str | None = None,
+    metrics_json: str | Path | None = None,
+    metrics_textfile: str | Path | None = None,
+) -> dict[str, int]:
+    """
+    Render every job of a manifest, skipping work that is already done.
+
+    Jobs are split across machines with ``shard``: each job belongs to the
+    shard given by a hash of its output path, so every machine running the
+    same manifest with a different ``i`` of the same ``n`` picks a disjoint,
+    stable subset. Within a run the pending jobs are probed for their
+    duration and submitted longest first, so one long file cannot end up
+    running alone at the end.
+
+    Args:
+        manifest: Path of the JSON Lines manifest
+        workers: Number of worker processes (None = the tuning profile's,
+            else one per CPU)
+        journal: Checkpoint journal path (default: next to the manifest,
+            one per shard)
+        shard: Render only shard ``"i/n"`` (1-based) of the jobs
+        metrics_json: Write a JSON summary of the run's metrics here
+        metrics_textfile: Write the run's metrics here in Prometheus text
+            format, e.g. for the node exporter's textfile collector
+
+    Returns:
+        Counts of ``rendered``, ``skipped`` and ``failed`` jobs.
+    """
+    jobs = load_manifest(manifest)
+    suffix = JOURNAL_SUFFIX
+    if shard is not None:
+        index, count = parse_shard(shard)
+        jobs = [job for job in jobs if shard_of(job, count) == index]
+        suffix = f".shard{index}of{count}{JOURNAL_SUFFIX}"
+    journal_path = (
+        Path(journal) if journal is not None else Path(str(manifest) + suffix)
+    )
+    completed = _read_journal(journal_path)
+
+    summary = {"rendered": 0, "skipped": 0, "failed": 0}
+    # Workers record into their own registries; their series are merged here.
+    registry = metrics.Metrics()
+    pending = []
+    for job in jobs:
+        # Jobs journaled by an interrupted run need no sidecar read.
+        journaled = completed.get(str(job.output)) == job.digest
+        if (journaled and job.output_newer()) or job.up_to_date():
+            summary["skipped"] += 1
+        else:
+            pending.append(job)
+
+    if pending:
+        pending.sort(key=lambda job: probe_duration(job.input), reverse=True)
+        with journal_path.open("a") as log:
+            workers = workers or profile.tuned("workers", os.cpu_count() or 1)
+            workers = min(workers, len(pending))
+            if workers <= 1:
+                outcomes = ((job, _render_measured(job)) for job in pending)
+                _record(log, outcomes, summary, registry)
+            else:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    futures = {
+                        pool.submit(_render_measured, job): job for job in pending
+                    }
+                    outcomes = (
+                        (futures[future], future.result())
+                        for future in as_completed(futures)
+                    )
+                    _record(log, outcomes, summary, registry)
+
+    for outcome, total in summary.items():
+        registry.count(f"batch_{outcome}_total", total)
+    metrics.active().merge(registry.state())
+    if metrics_json is not None:
+        metrics.write_json(registry, metrics_json)
+    if metrics_textfile is not None:
+        registry.write_prometheus(metrics_textfile)
+
+    if not summary["failed"]:
+        journal_path.unlink(missing_ok=True)
+    return summary
+
+
+def render_job(job: Job) -> str | None:
+    """
+    Render one job; return None on success or the error message.
+
+    The audio is written to a temporary file next to the output and moved into
+    place before the sidecar is written, so an interrupted render never leaves
+    a partial output that looks up to date.
+    """
+    partial = job.output.with_name(f".{job.output.stem}.partial{job.output.suffix}")
+    try:
+        job.output.parent.mkdir(parents=True, exist_ok=True)
+        job.sidecar.unlink(missing_ok=True)
+        stretch_audio(job.input, partial, **job.params)
+        partial.replace(job.output)
+        job.sidecar.write_text(json.dumps({"hash": job.digest, "params": job.params}))
+    except Exception as e:
+        partial.unlink(missing_ok=True)
+        return f"{type(e).__name__}: {e}"
+    return None
+
+
+def _render_measured(job: Job) -> tuple[str | None, dict[str, list]]:
+    """Run :func:`render_job`; return its outcome and the metrics it recorded."""
+    with metrics.collecting() as registry:
+        error = render_job(job)
+    return error, registry.state()
+
+
+def _read_journal(path: Path) -> dict[str, str]:
+    """Map each output recorded as done in the journal to its hash."""
+    completed: dict[str, str] = {}
+    try:
+        with path.open() as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A line cut short by a crash; the job simply runs again.
+                    continue
+                if entry.get("status") == "done":
+                    completed[entry["output"]] = entry["hash"]
+    except FileNotFoundError:
+        pass
+    return completed
+
+
+def _record(
+    log: TextIO,
+    outcomes: Iterable[tuple[Job, tuple[str | None, dict[str, list]]]],
+    summary: dict[str, int],
+    registry: metrics.Metrics,
+) -> None:
+    """Append each job's outcome to the journal as soon as it is known."""
+    for job, (error, state) in outcomes:
+        registry.merge(state)
+        entry = {"output": str(job.output), "hash": job.digest}
+        if error is None:
+            entry["status"] = "done"
+            summary["rendered"] += 1
+        else:
+            entry.update(status="failed", error=error)
+            summary["failed"] += 1
+        log.write(json.dumps(entry) + "\n")
+        log.flush()
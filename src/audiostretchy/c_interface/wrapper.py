@@ -10,6 +10,8 @@ from pathlib import Path
 
 import numpy as np
 
+from .. import metrics
+
 
 class TDHSAudioStretch:
     """
@@ -20,6 +22,10 @@ class TDHSAudioStretch:
     STRETCH_FAST_FLAG = 0x1
     STRETCH_DUAL_FLAG = 0x2
 
+    # Frames handed to one native call. The C API counts samples in 32-bit
+    # ints, so longer inputs are split; the context carries state across calls.
+    MAX_CALL_FRAMES = 1 << 20
+
     def __init__(
         self, shortest_period: int, longest_period: int, num_chans: int, flags: int
     ) -> None:
@@ -34,15 +40,18 @@ class TDHSAudioStretch:
         """
         self._lib = self._load_library()
         self._setup_function_signatures()
+        self.num_chans = num_chans
 
         self.handle = self.stretch_init(
             shortest_period, longest_period, num_chans, flags
         )
         if not self.handle:
             raise RuntimeError("Failed to initialize audio stretch context")
+        metrics.count("contexts_created_total")
 
-    def _load_library(self) -> ctypes.CDLL:
-        """Load the appropriate shared library for the current platform.
+    @staticmethod
+    def library_path() -> Path:
+        """Return the path of the shared library for the current platform.
 
         Prebuilt libraries ship in ``src/audiostretchy/interface/{platform}/``:
         ``mac/_stretch.dylib``, ``linux/_stretch.so`` and ``win/_stretch.dll``.
@@ -58,7 +67,11 @@ class TDHSAudioStretch:
             lib_path = interface_dir / "linux" / "_stretch.so"
         else:
             raise RuntimeError(f"Unsupported platform: {system}")
+        return lib_path
 
+    def _load_library(self) -> ctypes.CDLL:
+        """Load the appropriate shared library for the current platform."""
+        lib_path = self.library_path()
         if not lib_path.exists():
             raise RuntimeError(f"Audio stretch library not found at {lib_path}")
 
@@ -121,6 +134,9 @@ class TDHSAudioStretch:
         """
         Calculate required output buffer capacity.
 
+        Counts above :attr:`MAX_CALL_FRAMES` are summed per native call in
+        Python, so the result never overflows the library's 32-bit ints.
+
         Args:
             max_num_samples: Maximum number of input samples
             max_ratio: Maximum stretch ratio expected
@@ -128,7 +144,13 @@ class TDHSAudioStretch:
         Returns:
             Required output buffer size in samples
         """
-        return self.stretch_output_capacity(self.handle, max_num_samples, max_ratio)
+        full_calls, remainder = divmod(max_num_samples, self.MAX_CALL_FRAMES)
+        capacity = self.stretch_output_capacity(self.handle, remainder, max_ratio)
+        if full_calls:
+            capacity += full_calls * self.stretch_output_capacity(
+                self.handle, self.MAX_CALL_FRAMES, max_ratio
+            )
+        return capacity
 
     def process_samples(
         self, samples: np.ndarray, num_samples: int, output: np.ndarray, ratio: float
@@ -145,7 +167,20 @@ class TDHSAudioStretch:
         Returns:
             Number of output samples produced
         """
-        return self.stretch_samples(self.handle, samples, num_samples, output, ratio)
+        num_chans = self.num_chans
+        produced = 0
+        with metrics.timed("tdhs"):
+            # At most MAX_CALL_FRAMES per native call; the context carries over.
+            for start in range(0, num_samples, self.MAX_CALL_FRAMES):
+                frames = min(self.MAX_CALL_FRAMES, num_samples - start)
+                produced += self.stretch_samples(
+                    self.handle,
+                    samples[start * num_chans : (start + frames) * num_chans],
+                    frames,
+                    output[produced * num_chans :],
+                    ratio,
+                )
+        return produced
 
     def flush(self, output: np.ndarray) -> int:
         """
@@ -157,7 +192,8 @@ class TDHSAudioStretch:
         Returns:
             Number of flushed samples
         """
-        return self.stretch_flush(self.handle, output)
+        with metrics.timed("flush"):
+            return self.stretch_flush(self.handle, output)
 
     def reset(self) -> None:
         """Reset the stretch context to initial state."""
@@ -0,0 +1,217 @@
+# this_file: src/audiostretchy/calibrate.py
+"""Benchmark the native library on this host and write a tuning profile.
+
+``audiostretchy calibrate`` times the installed TDHS library on a synthetic
+voiced signal and records what it finds in the profile read by
+:mod:`audiostretchy.profile`:
+
+* the :mod:`audiostretchy.cost` constants, from mono and stereo runs at two
+  period-range widths with and without ``fast_detection``, plus a decode and
+  encode round trip;
+* ``stream_block_frames``, the fastest :class:`StretchStream` block size;
+* ``threads``, the number of channel groups worth stretching at once, from a
+  5.1 layout;
+* ``workers``, the process count with the best batch throughput.
+"""
+
+import os
+import platform
+import tempfile
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from .arrays import stretch_array
+from .convert import deinterleave_from_int16, interleave_to_int16
+from .core import AudioStretch
+from .cost import CALIBRATION
+from .parallel import stretch_arrays_parallel
+from .profile import PROFILE_VERSION, host, save_profile
+from .stream import StretchStream
+
+SAMPLERATE = 44100
+BLOCK_SIZES = (4096, 16384, 65536, 262144)
+# Settings within this fraction of the best rate count as equally fast; the
+# smallest of them is chosen.
+MARGIN = 0.05
+# Period-range widths, in samples, whose timing difference gives the search cost.
+WIDE_RANGE = SAMPLERATE / 55 - SAMPLERATE / 333
+NARROW_RANGE = SAMPLERATE / 110 - SAMPLERATE / 333
+# Measurements of the search cost, each on a signal twice as long as the last,
+# before the difference is given up on as noise.
+SEARCH_ATTEMPTS = 3
+
+
+def calibrate(
+    output: str | Path | None = None, seconds: float = 5.0, repeats: int = 3
+) -> dict[str, Any]:
+    """
+    Measure this host and write its tuning profile.
+
+    Args:
+        output: Profile path (default: :func:`~audiostretchy.profile.profile_path`)
+        seconds: Length of the benchmark signal; longer is steadier but slower
+        repeats: Runs per measurement; the fastest one counts
+
+    Returns:
+        The profile written.
+    """
+    if seconds <= 0 or repeats < 1:
+        raise ValueError("seconds and repeats must be positive")
+    signal = _voice(seconds)
+    num_frames = signal.shape[0]
+
+    def best(run: Callable[[], object]) -> float:
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    # Cost constants: the search cost is linear in the period-range width.
+    def tdhs(samples: np.ndarray, lower: int, fast: bool) -> float:
+        return best(
+            lambda: stretch_array(
+                samples,
+                SAMPLERATE,
+                1.25,
+                lower_freq=lower,
+                fast_detection=fast,
+                interleaved=False,
+            )
+        )
+
+    mono = signal[None, :]
+    normal = _search_seconds(tdhs, mono, False)
+    fast = _search_seconds(tdhs, mono, True)
+    stereo = tdhs(np.stack([signal, signal]), 55, False) / tdhs(mono, 55, False)
+    calibration = {
+        # A difference lost in timing noise keeps the built-in constant.
+        "tdhs_seconds": normal or CALIBRATION["tdhs_seconds"],
+        "fast_tdhs_seconds": fast or CALIBRATION["fast_tdhs_seconds"],
+        "channel_weight": max(stereo - 1.0, 0.0),
+        "io_seconds": _io_seconds(signal, best),
+    }
+
+    # Streaming block size.
+    stream_rates = {}
+    for block in BLOCK_SIZES:
+
+        def stream_run(block: int = block) -> None:
+            with StretchStream(SAMPLERATE, 1, ratio=1.25) as stream:
+                for start in range(0, num_frames, block):
+                    stream.process(mono[:, start : start + block])
+                stream.flush()
+
+        stream_rates[block] = num_frames / best(stream_run)
+
+    # Channel groups stretched at once, on a 5.1 layout (three groups).
+    surround = np.tile(signal, (6, 1))
+    pairs = [surround[index : index + 2] for index in range(0, 6, 2)]
+    thread_rates = {}
+    for threads in range(1, min(len(pairs), os.cpu_count() or 1) + 1):
+
+        def threads_run(threads: int = threads) -> None:
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                list(
+                    pool.map(
+                        lambda pair: stretch_array(
+                            pair, SAMPLERATE, 1.25, interleaved=False
+                        ),
+                        pairs,
+                    )
+                )
+
+        thread_rates[threads] = 6 * num_frames / best(threads_run)
+
+    # Batch worker processes.
+    cpus = os.cpu_count() or 1
+    candidates = sorted({1, cpus, *(2**n for n in range(1, 8) if 2**n < cpus)})
+    worker_rates = {}
+    for workers in candidates:
+
+        def workers_run(workers: int = workers) -> None:
+            stretch_arrays_parallel(
+                [signal] * (2 * workers), 1.25, workers=workers, samplerate=SAMPLERATE
+            )
+
+        worker_rates[workers] = 2 * workers * num_frames / best(workers_run)
+
+    profile = {
+        "version": PROFILE_VERSION,
+        "host": host(),
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "processor": platform.processor() or platform.machine(),
+        "cpus": cpus,
+        "stream_block_frames": _pick(stream_rates),
+        "threads": _pick(thread_rates),
+        "workers": _pick(worker_rates),
+        "calibration": calibration,
+        # Frames per second of each setting tried, for reference.
+        "measurements": {
+            "stream_block_frames": stream_rates,
+            "threads": thread_rates,
+            "workers": worker_rates,
+        },
+    }
+    save_profile(profile, output)
+    return profile
+
+
+def _voice(seconds: float) -> np.ndarray:
+    """A vowel-like test signal: a harmonic tone gliding over 100-250 Hz, plus noise."""
+    num_frames = int(seconds * SAMPLERATE)
+    t = np.arange(num_frames) / SAMPLERATE
+    f0 = 175 + 75 * np.sin(2 * np.pi * 0.5 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / SAMPLERATE
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 9))
+    noise = np.random.default_rng(0).normal(0, 0.02, num_frames)
+    return (0.2 * voiced + noise).astype(np.float32)
+
+
+def _search_seconds(
+    tdhs: Callable[[np.ndarray, int, bool], float], samples: np.ndarray, fast: bool
+) -> float | None:
+    """
+    Seconds per frame and period-range sample of the period search.
+
+    The cost is the timing difference between a wide and a narrow range. Until
+    it comes out positive the signal is doubled and measured again, up to
+    :data:`SEARCH_ATTEMPTS` times; None means it never rose above the noise.
+    """
+    for _ in range(SEARCH_ATTEMPTS):
+        difference = tdhs(samples, 55, fast) - tdhs(samples, 110, fast)
+        if difference > 0:
+            return difference / (WIDE_RANGE - NARROW_RANGE) / samples.shape[1]
+        samples = np.concatenate([samples, samples], axis=1)
+    return None
+
+
+def _io_seconds(signal: np.ndarray, best: Callable[[Callable], float]) -> float:
+    """Seconds per frame and channel to decode, convert and encode a WAV."""
+    processor = AudioStretch()
+    processor.samples = signal[None, :]
+    processor.samplerate = SAMPLERATE
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "calibrate.wav"
+        processor.save(path)
+
+        def round_trip() -> None:
+            loaded = AudioStretch()
+            loaded.open(path)
+            deinterleave_from_int16(interleave_to_int16(signal[None, :]), 1)
+            loaded.save(path)
+
+        return best(round_trip) / signal.shape[0]
+
+
+def _pick(rates: dict[int, float]) -> int:
+    """Smallest setting whose rate is within :data:`MARGIN` of the best."""
+    fastest = max(rates.values())
+    return min(key for key, rate in rates.items() if rate >= fastest * (1 - MARGIN))
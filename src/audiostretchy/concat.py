@@ -0,0 +1,166 @@
+# this_file: src/audiostretchy/concat.py
+"""Stretch many clips into one output file through one stream.
+
+Long-form audio assembled from short clips (TTS sentences, chapters, ads)
+would otherwise be stretched clip by clip and joined in memory: a new TDHS
+context per clip, and every clip held until the join. :func:`stretch_concat`
+instead decodes the clips in order into a single :class:`StretchStream` and
+encodes its output into one ``WriteableAudioFile`` as it goes, so memory stays
+at a few blocks however many clips there are, and a clip costs little more
+than opening its file.
+"""
+
+import itertools
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+import numpy as np
+from pedalboard.io import (
+    ReadableAudioFile,
+    ResampledReadableAudioFile,
+    WriteableAudioFile,
+)
+
+from . import metrics, profile
+from .core import STREAM_BLOCK_FRAMES, _count_audio
+from .pipeline import run_pipeline
+from .stream import StretchStream
+
+
+def stretch_concat(
+    inputs: Iterable[str | Path],
+    output_path: str | Path,
+    ratio: float = 1.0,
+    gap_ms: float = 0.0,
+    upper_freq: int = 333,
+    lower_freq: int = 55,
+    double_range: bool = False,
+    fast_detection: bool = False,
+    sample_rate: int = 0,
+    linked_channels: bool = False,
+    unlinked_channels: bool = False,
+) -> None:
+    """
+    Stretch audio files and write them back to back into one file.
+
+    The output takes its channel count, and unless ``sample_rate`` is given its
+    sample rate, from the first clip. Later clips at other rates are resampled
+    while they are decoded; mono clips are copied to every channel and wider
+    ones mixed down when the output is mono.
+
+    The clips share one TDHS context. Without a gap they run into each other
+    as one signal, so the seams are spliced like any other period. A gap of
+    silence long enough for :class:`StretchStream` to bypass flushes the
+    context, so the next clip starts on a fresh one instead of splicing
+    against the previous clip's last periods.
+
+    Args:
+        inputs: Audio files to stretch, in order; any iterable, read lazily
+        output_path: Path for the output audio file
+        ratio: Stretch ratio (>1.0 = slower/longer, <1.0 = faster/shorter)
+        gap_ms: Silence between consecutive clips, in ms of output
+        upper_freq: Upper frequency limit for period detection (Hz)
+        lower_freq: Lower frequency limit for period detection (Hz)
+        double_range: Enable extended ratio range (0.25-4.0)
+        fast_detection: Use faster period detection algorithm
+        sample_rate: Sample rate of the output (0 = that of the first clip)
+        linked_channels: Share one TDHS context across all channels of
+            layouts wider than stereo
+        unlinked_channels: Stream each channel through its own mono
+            context
+
+    Raises:
+        ValueError: If the parameters are invalid, there are no inputs or a
+            clip's channel count cannot be mapped onto the output's
+        IOError: If a clip cannot be decoded or the output encoded
+    """
+    if gap_ms < 0:
+        raise ValueError("gap_ms must not be negative")
+
+    with metrics.track_job() as job:
+        clips = iter(inputs)
+        first = next(clips, None)
+        if first is None:
+            raise ValueError("inputs must not be empty")
+        with _open_clip(first) as f:
+            samplerate = sample_rate or int(f.samplerate)
+            num_channels = f.num_channels
+
+        # Input frames that make gap_ms of output once stretched.
+        gap = np.zeros(
+            (num_channels, round(gap_ms / 1000 * samplerate / ratio)), np.float32
+        )
+        block_frames = profile.tuned("stream_block_frames", STREAM_BLOCK_FRAMES)
+        read = 0
+        written = 0
+
+        def read_blocks() -> Iterator[np.ndarray]:
+            nonlocal read
+            for index, path in enumerate(itertools.chain([first], clips)):
+                if index and gap.shape[1]:
+                    yield gap
+                for block in _read_clip(path, samplerate, num_channels, block_frames):
+                    read += block.shape[1]
+                    yield block
+
+        with StretchStream(
+            samplerate,
+            num_channels,
+            ratio=ratio,
+            upper_freq=upper_freq,
+            lower_freq=lower_freq,
+            double_range=double_range,
+            fast_detection=fast_detection,
+            linked_channels=linked_channels,
+            unlinked_channels=unlinked_channels,
+        ) as stream:
+            try:
+                out = WriteableAudioFile(
+                    str(output_path), samplerate=samplerate, num_channels=num_channels
+                )
+            except Exception as e:
+                raise OSError(f"Could not write {output_path}: {e}") from e
+
+            def write(block: np.ndarray) -> None:
+                nonlocal written
+                with metrics.timed("encode"):
+                    out.write(block)
+                written += block.shape[1]
+
+            with out:
+                run_pipeline(read_blocks(), stream.process, stream.flush, write)
+
+        job["audio_seconds"] = read / samplerate
+        _count_audio(read, written, samplerate)
+
+
+def _open_clip(path: str | Path) -> ReadableAudioFile:
+    """Open one input clip, reporting failures as :class:`OSError`."""
+    try:
+        return ReadableAudioFile(str(path))
+    except Exception as e:
+        raise OSError(f"Could not open audio file {path}: {e}") from e
+
+
+def _read_clip(
+    path: str | Path, samplerate: int, num_channels: int, block_frames: int
+) -> Iterator[np.ndarray]:
+    """Decode one clip in blocks at the output's rate and channel count."""
+    with _open_clip(path) as raw:
+        if raw.num_channels not in (1, num_channels) and num_channels != 1:
+            raise ValueError(
+                f"{path} has {raw.num_channels} channels; the output has {num_channels}"
+            )
+        source: ReadableAudioFile | ResampledReadableAudioFile = raw
+        if int(raw.samplerate) != samplerate:
+            source = raw.resampled_to(samplerate)
+        while True:
+            with metrics.timed("decode"):
+                block = source.read(block_frames)
+            if block.shape[1] == 0:
+                return
+            if block.shape[0] != num_channels:
+                # Mono up to every channel, or everything down to mono.
+                mixed = block.mean(axis=0, keepdims=True)
+                block = np.broadcast_to(mixed, (num_channels, block.shape[1]))
+            yield block
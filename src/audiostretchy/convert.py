@@ -0,0 +1,81 @@
+# this_file: src/audiostretchy/convert.py
+"""Sample-format conversion between Pedalboard and the TDHS C library.
+
+Pedalboard hands out float32 ``(channels, frames)`` arrays; the C library wants
+interleaved int16. Doing that with whole-array NumPy expressions allocates a
+clipped copy, a scaled copy, an int16 copy and a transposed copy. The helpers
+here instead walk the signal in cache-sized blocks and clip, scale, cast and
+interleave each block straight into a caller-provided (and reusable) buffer.
+"""
+
+import numpy as np
+
+# Frames converted per block; the float scratch stays small enough for L2.
+BLOCK_FRAMES = 16384
+
+INT16_SCALE = 32767
+
+
+class ScratchBuffer:
+    """Grow-only buffer that hands out uninitialized views of a given size."""
+
+    def __init__(self, dtype: type[np.generic] = np.int16) -> None:
+        """Initialize an empty buffer of ``dtype`` elements."""
+        self._buffer = np.empty(0, dtype=dtype)
+
+    @property
+    def dtype(self) -> np.dtype:
+        """Element type of the views handed out."""
+        return self._buffer.dtype
+
+    def get(self, size: int) -> np.ndarray:
+        """Return a view of ``size`` elements, growing the buffer if needed."""
+        if self._buffer.size < size:
+            self._buffer = np.empty(size, dtype=self._buffer.dtype)
+        return self._buffer[:size]
+
+
+def interleave_to_int16(
+    samples: np.ndarray, out: np.ndarray | None = None
+) -> np.ndarray:
+    """
+    Clip, scale, cast and interleave float samples into int16.
+
+    Args:
+        samples: Float audio as ``(channels, frames)``
+        out: Optional 1-D int16 buffer of at least ``channels * frames`` elements
+
+    Returns:
+        Interleaved int16 samples (a view of ``out`` when given). Scaling
+        truncates toward zero, matching ``astype(np.int16)``.
+    """
+    num_channels, num_frames = samples.shape
+    size = num_channels * num_frames
+    if out is None:
+        out = np.empty(size, dtype=np.int16)
+    interleaved = out[:size].reshape(num_frames, num_channels)
+
+    scratch = np.empty((min(BLOCK_FRAMES, num_frames), num_channels), dtype=np.float32)
+    for start in range(0, num_frames, BLOCK_FRAMES):
+        block = samples[:, start : start + BLOCK_FRAMES].T
+        clipped = scratch[: len(block)]
+        np.clip(block, -1.0, 1.0, out=clipped)
+        np.multiply(
+            clipped,
+            INT16_SCALE,
+            out=interleaved[start : start + len(block)],
+            casting="unsafe",
+        )
+    return out[:size]
+
+
+def deinterleave_from_int16(samples_int16: np.ndarray, num_channels: int) -> np.ndarray:
+    """
+    Convert interleaved int16 samples to float32 ``(channels, frames)``.
+
+    The result is a transposed view of a single freshly allocated float32
+    array; no intermediate copies are made.
+    """
+    samples_float32 = samples_int16.astype(np.float32)
+    samples_float32 /= INT16_SCALE
+    return samples_float32.reshape(-1, num_channels).T
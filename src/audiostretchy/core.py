@@ -14,13 +14,56 @@ resample, save) and the :func:`stretch_audio` one-shot helper, using Spotify's
 Pedalboard for reading and writing WAV/MP3/FLAC/OGG and for resampling.
 """
 
+import io
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
 from pathlib import Path
-from typing import BinaryIO
+from typing import Any, BinaryIO
 
 import numpy as np
-from pedalboard.io import ReadableAudioFile, WriteableAudioFile
+from pedalboard.io import (
+    ReadableAudioFile,
+    ResampledReadableAudioFile,
+    StreamResampler,
+    WriteableAudioFile,
+)
 
+from . import metrics, profile
+from .analysis import PeriodAnalysis, analyze, synthesize
 from .c_interface import TDHSAudioStretch
+from .convert import ScratchBuffer, deinterleave_from_int16, interleave_to_int16
+from .pipeline import run_pipeline
+from .pitch import estimate_period_range
+from .segments import SegmentedAudioFile
+from .stream import StretchStream, channel_groups, period_range, tdhs_flags
+
+# Inputs longer than this many frames are stretched file-to-file in blocks by
+# stretch_audio() instead of being decoded into memory (~50 min at 44.1 kHz).
+STREAMING_FRAMES = 1 << 27
+# Frames decoded, stretched and encoded per step on the streaming path.
+STREAM_BLOCK_FRAMES = 1 << 16
+# Audio used to estimate auto_range on the streaming path, in seconds.
+STREAM_ANALYSIS_SECONDS = 300
+
+# Render tiers of AudioStretch.stretch().
+QUALITIES = ("full", "preview")
+# The preview tier stretches at about this rate, searching this F0 range.
+PREVIEW_SAMPLERATE = 11025
+PREVIEW_UPPER_FREQ = 300
+PREVIEW_LOWER_FREQ = 75
+
+# Encoders an output dict can open.
+AudioWriter = WriteableAudioFile | SegmentedAudioFile
+
+# Optional keys of a stretch_audio(outputs=[...]) entry, besides its path.
+OUTPUT_DEFAULTS: dict[str, Any] = {
+    "sample_rate": 0,
+    "format": None,
+    "bit_depth": None,
+    "quality": None,
+    "segment_seconds": None,
+}
 
 
 class AudioStretch:
@@ -34,46 +77,101 @@ class AudioStretch:
         self.samples: np.ndarray | None = None
         self.samplerate: int = 44100
         self.num_channels: int = 1
+        self._scratch: list[ScratchBuffer] = []
+        # Audio just before an opened region, used to warm the TDHS context.
+        self._preroll: np.ndarray | None = None
+        # (samples, pre-roll, preview) kept by a preview render.
+        self._decoded: tuple[np.ndarray, np.ndarray | None, np.ndarray] | None = None
+
+    @property
+    def duration(self) -> float:
+        """Length of the loaded audio in seconds (0.0 when nothing is loaded)."""
+        if self.samples is None:
+            return 0.0
+        return self.samples.shape[1] / self.samplerate
 
     def open(
         self,
         path: str | Path | None = None,
         file: BinaryIO | None = None,
         format: str | None = None,
+        start: float = 0.0,
+        duration: float | None = None,
     ) -> None:
         """
         Open an audio file using Pedalboard.
 
+        With ``start``/``duration`` only that region is decoded: the reader
+        seeks to it instead of decoding everything before it. One longest
+        TDHS period (at the default 55 Hz lower limit) of audio before
+        ``start`` is kept as pre-roll; :meth:`stretch` uses it to warm the
+        context and discards the output it produces.
+
         Args:
             path: Path to the audio file
             file: Binary I/O object containing audio data
             format: Audio format hint (usually inferred from extension)
+            start: Offset of the region to load, in seconds
+            duration: Length of the region in seconds (None = to the end)
 
         Raises:
-            ValueError: If neither path nor file is provided
+            ValueError: If neither path nor file is provided, or the region
+                is invalid
             IOError: If the file cannot be opened or read
         """
         if path is None and file is None:
             raise ValueError("Either path or file must be provided")
+        if start < 0:
+            raise ValueError("start must not be negative")
+        if duration is not None and duration <= 0:
+            raise ValueError("duration must be positive")
 
         input_source = file if file is not None else str(path)
 
         try:
             with ReadableAudioFile(input_source) as f:
-                self.samples = f.read(f.frames)
                 # Pedalboard types samplerate as float; audio rates are integral.
-                self.samplerate = int(f.samplerate)
-                self.num_channels = f.num_channels
+                samplerate = int(f.samplerate)
+                total_frames = f.frames
+                start_frame = round(start * samplerate)
+                num_frames = max(0, total_frames - start_frame)
+                if duration is not None:
+                    num_frames = min(num_frames, round(duration * samplerate))
+
+                # One longest period at the default lower_freq of 55 Hz.
+                preroll_frames = min(start_frame, samplerate // 55)
+                preroll = None
+                with metrics.timed("decode"):
+                    if num_frames and start_frame:
+                        f.seek(start_frame - preroll_frames)
+                        preroll = f.read(preroll_frames)
+                    samples = f.read(num_frames) if num_frames else None
+                num_channels = f.num_channels
 
         except Exception as e:
             source_desc = str(path) if path else "file object"
             raise OSError(f"Could not open audio file {source_desc}: {e}") from e
 
+        if samples is None and start_frame:
+            raise ValueError(f"start ({start}s) is beyond the end of the file")
+
+        self.samples = (
+            samples
+            if samples is not None
+            else np.zeros((num_channels, 0), dtype=np.float32)
+        )
+        self._preroll = preroll
+        self._decoded = None
+        self.samplerate = samplerate
+        self.num_channels = num_channels
+
     def save(
         self,
         path: str | Path | None = None,
         file: BinaryIO | None = None,
         format: str | None = None,
+        bit_depth: int | None = None,
+        quality: str | float | None = None,
     ) -> None:
         """
         Save processed audio using Pedalboard.
@@ -82,6 +180,10 @@ class AudioStretch:
             path: Path to save the audio file
             file: Binary I/O object to write audio data
             format: Audio format (inferred from path extension if not specified)
+            bit_depth: Sample bit depth for formats that have one; defaults to
+                32 for file objects (float32 precision) and 16 for paths
+            quality: Codec quality, e.g. ``"128k"`` or ``"V2"`` for MP3
+                (codec default if not specified)
 
         Raises:
             ValueError: If no audio data or invalid parameters
@@ -99,24 +201,42 @@ class AudioStretch:
             )
 
         try:
-            if file is not None:
-                # Use 32-bit depth for file-like objects to preserve float32 precision
-                with WriteableAudioFile(
-                    file,
-                    samplerate=self.samplerate,
-                    num_channels=self.num_channels,
-                    bit_depth=32,
-                    format=format,
-                ) as f:
-                    f.write(self.samples)
-            else:
-                # string path: format is inferred from extension; do not pass format kwarg
-                with WriteableAudioFile(
-                    str(path),
-                    samplerate=self.samplerate,
-                    num_channels=self.num_channels,
-                ) as f:
-                    f.write(self.samples)
+            with metrics.timed("encode"):
+                if file is not None:
+                    # Use 32-bit depth for file-like objects to preserve float32 precision
+                    with WriteableAudioFile(
+                        file,
+                        samplerate=self.samplerate,
+                        num_channels=self.num_channels,
+                        bit_depth=bit_depth or 32,
+                        format=format,
+                        quality=quality,
+                    ) as f:
+                        f.write(self.samples)
+                elif format is not None:
+                    # An explicit format overrides the extension of the path
+                    with (
+                        Path(path).open("wb") as target,  # type: ignore[arg-type]
+                        WriteableAudioFile(
+                            target,
+                            samplerate=self.samplerate,
+                            num_channels=self.num_channels,
+                            bit_depth=bit_depth or 16,
+                            format=format,
+                            quality=quality,
+                        ) as f,
+                    ):
+                        f.write(self.samples)
+                else:
+                    # string path: format is inferred from extension; do not pass format kwarg
+                    with WriteableAudioFile(
+                        str(path),
+                        samplerate=self.samplerate,
+                        num_channels=self.num_channels,
+                        bit_depth=bit_depth or 16,
+                        quality=quality,
+                    ) as f:
+                        f.write(self.samples)
 
         except Exception as e:
             target_desc = str(path) if path else "file object"
@@ -138,19 +258,46 @@ class AudioStretch:
         if target_samplerate == self.samplerate:
             return
 
+        self._preroll = None
         n_channels, n_samples = self.samples.shape
         new_n_samples = round(n_samples * target_samplerate / self.samplerate)
 
         # Linear interpolation over each channel
-        x_old = np.arange(n_samples, dtype=np.float64)
-        x_new = np.linspace(0, n_samples - 1, new_n_samples)
-        resampled = np.empty((n_channels, new_n_samples), dtype=np.float32)
-        for ch in range(n_channels):
-            resampled[ch] = np.interp(x_new, x_old, self.samples[ch]).astype(np.float32)
+        with metrics.timed("resample"):
+            x_old = np.arange(n_samples, dtype=np.float64)
+            x_new = np.linspace(0, n_samples - 1, new_n_samples)
+            resampled = np.empty((n_channels, new_n_samples), dtype=np.float32)
+            for ch in range(n_channels):
+                resampled[ch] = np.interp(x_new, x_old, self.samples[ch]).astype(
+                    np.float32
+                )
 
         self.samples = resampled
         self.samplerate = target_samplerate
 
+    def analyze(self, upper_freq: int = 333, lower_freq: int = 55) -> PeriodAnalysis:
+        """
+        Detect the pitch periods of the loaded audio once, for reuse.
+
+        The result does not depend on the stretch ratio: pass it (or a
+        ``.tdhs`` sidecar written with :meth:`PeriodAnalysis.save`) to
+        :meth:`stretch` as ``analysis`` to render further ratios with only
+        splice and cross-fade work.
+
+        Args:
+            upper_freq: Upper frequency limit for period detection (Hz)
+            lower_freq: Lower frequency limit for period detection (Hz)
+
+        Returns:
+            The :class:`PeriodAnalysis` of the loaded audio.
+
+        Raises:
+            ValueError: If no audio data is loaded
+        """
+        if self.samples is None:
+            raise ValueError("No audio data to analyze. Call open() first")
+        return analyze(self.samples, self.samplerate, upper_freq, lower_freq)
+
     def stretch(
         self,
         ratio: float = 1.0,
@@ -162,6 +309,11 @@ class AudioStretch:
         double_range: bool = False,
         fast_detection: bool = False,
         normal_detection: bool = False,
+        auto_range: bool = False,
+        linked_channels: bool = False,
+        unlinked_channels: bool = False,
+        analysis: PeriodAnalysis | str | Path | None = None,
+        quality: str = "full",
     ) -> None:
         """
         Stretch audio using the TDHS algorithm.
@@ -176,9 +328,27 @@ class AudioStretch:
             double_range: Enable extended ratio range (0.25-4.0)
             fast_detection: Use faster period detection algorithm
             normal_detection: Force normal detection (currently unused)
+            auto_range: Estimate the signal's actual F0 range first and narrow
+                the period search to it (within upper_freq/lower_freq)
+            linked_channels: Process more than two channels in one linked
+                context instead of concurrent mono/stereo groups
+            unlinked_channels: Stretch each channel as its own mono track,
+                on the same thread pool as the default groups
+            analysis: Period analysis from :meth:`analyze`, or the path of a
+                ``.tdhs`` sidecar. Skips period detection and splices every
+                channel on the analysed timeline; the frequency, detection
+                and channel options are then ignored
+            quality: ``"full"``, or ``"preview"`` for a fast rough render
+                for scrubbing: TDHS runs with fast detection on a copy
+                decimated to about :data:`PREVIEW_SAMPLERATE`, searching only
+                :data:`PREVIEW_LOWER_FREQ`-:data:`PREVIEW_UPPER_FREQ`, and the
+                result is interpolated back to the original rate. The decoded
+                audio is kept, so the next call stretches it rather than the
+                preview
 
         Raises:
-            ValueError: If no audio data or invalid parameters
+            ValueError: If no audio data or invalid parameters, or the
+                analysis was made from different audio
             RuntimeError: If stretching fails
 
         Note:
@@ -190,110 +360,238 @@ class AudioStretch:
 
         if ratio <= 0:
             raise ValueError("Stretch ratio must be positive")
+        if quality not in QUALITIES:
+            raise ValueError(f"quality must be one of {', '.join(QUALITIES)}")
+
+        if self._decoded is not None:
+            samples, preroll, preview = self._decoded
+            self._decoded = None
+            if self.samples is preview:
+                # Start again from the audio the preview was rendered from.
+                self.samples, self._preroll = samples, preroll
 
         # Skip processing if no change needed
         effective_gap_ratio = gap_ratio if gap_ratio > 0 else ratio
         if ratio == 1.0 and effective_gap_ratio == 1.0:
             return
+        num_frames = self.samples.shape[1]
+
+        if analysis is not None:
+            if not isinstance(analysis, PeriodAnalysis):
+                analysis = PeriodAnalysis.load(analysis)
+            analysis.check(self.samples, self.samplerate)
+            # The analysis covers exactly the loaded region, without pre-roll.
+            self._preroll = None
+            self.samples = synthesize(self.samples, analysis, ratio)
+            _count_audio(num_frames, self.samples.shape[1], self.samplerate)
+            return
 
-        # Convert float32 samples to int16 for C library
-        samples_int16 = self._convert_to_int16(self.samples)
+        preroll_frames = 0 if self._preroll is None else self._preroll.shape[1]
+        # Audio shorter than one decimated frame gets the full render instead.
+        if (
+            quality == "preview"
+            and num_frames + preroll_frames >= self._preview_factor()
+        ):
+            samples, preroll = self.samples, self._preroll
+            self.samples = self._render_preview(
+                ratio,
+                upper_freq,
+                lower_freq,
+                double_range,
+                linked_channels,
+                unlinked_channels,
+            )
+            self._preroll = None
+            self._decoded = (samples, preroll, self.samples)
+            return
+
+        # Warm the context with the pre-roll before an opened region; its
+        # share of the output is trimmed off again below.
+        preroll, self._preroll = self._preroll, None
+        preroll_frames = 0 if preroll is None else preroll.shape[1]
+        if preroll is not None:
+            self.samples = np.concatenate([preroll, self.samples], axis=1)
 
         # Set up TDHS parameters
-        min_period = max(1, int(self.samplerate / upper_freq))
-        max_period = int(self.samplerate / lower_freq)
+        min_period, max_period = period_range(self.samplerate, upper_freq, lower_freq)
+        if auto_range:
+            estimated = estimate_period_range(
+                self.samples, self.samplerate, min_period, max_period
+            )
+            if estimated is not None:
+                min_period, max_period = estimated
 
-        flags = 0
-        if fast_detection:
-            flags |= TDHSAudioStretch.STRETCH_FAST_FLAG
-        if double_range or ratio < 0.5 or ratio > 2.0:
-            flags |= TDHSAudioStretch.STRETCH_DUAL_FLAG
+        flags = tdhs_flags(ratio, double_range, fast_detection)
 
-        # Initialize stretcher
-        stretcher = TDHSAudioStretch(min_period, max_period, self.num_channels, flags)
+        # One stretcher per channel group; groups run concurrently because
+        # ctypes releases the GIL for the duration of each native call.
+        groups = channel_groups(self.num_channels, linked_channels, unlinked_channels)
+        stretchers = [
+            TDHSAudioStretch(min_period, max_period, group.stop - group.start, flags)
+            for group in groups
+        ]
+
+        scratch = self._scratch_buffers(len(groups))
 
         try:
-            # Process audio
-            output_samples = self._process_with_stretcher(
-                stretcher, samples_int16, ratio
-            )
+            if len(groups) == 1:
+                output = self._stretch_group(
+                    stretchers[0], self.samples, ratio, scratch[0]
+                )
+            else:
+                source = self.samples
 
-            # Convert back to float32 and update samples
-            self.samples = self._convert_from_int16(output_samples)
+                @metrics.bound
+                def stretch_group(
+                    stretcher: TDHSAudioStretch, group: slice, buffer: ScratchBuffer
+                ) -> np.ndarray:
+                    return self._stretch_group(stretcher, source[group], ratio, buffer)
+
+                threads = min(len(groups), profile.tuned("threads", len(groups)))
+                with ThreadPoolExecutor(max_workers=threads) as pool:
+                    outputs = list(pool.map(stretch_group, stretchers, groups, scratch))
+
+                # Independent contexts can differ by a few frames at the tail.
+                produced = min(output.shape[1] for output in outputs)
+                output = np.concatenate(
+                    [output[:, :produced] for output in outputs], axis=0
+                )
 
         finally:
-            stretcher.deinit()
-
-    def _convert_to_int16(self, samples: np.ndarray) -> np.ndarray:
-        """Convert float32 samples to int16 format expected by C library."""
-        # Clip to valid range and convert
-        samples_clipped = np.clip(samples, -1.0, 1.0)
-        samples_int16 = (samples_clipped * 32767).astype(np.int16)
-
-        # Interleave channels if stereo
-        if self.num_channels == 1:
-            return np.ascontiguousarray(samples_int16[0])
-        if self.num_channels == 2:
-            # Interleave L,R,L,R...
-            return np.ascontiguousarray(samples_int16.T.ravel())
-        raise ValueError(f"Unsupported channel count: {self.num_channels}")
-
-    def _convert_from_int16(self, samples_int16: np.ndarray) -> np.ndarray:
-        """Convert int16 samples back to float32 format."""
-        samples_float32 = samples_int16.astype(np.float32) / 32767.0
-
-        # De-interleave channels if stereo
-        if self.num_channels == 1:
-            return samples_float32.reshape(1, -1)
-        if self.num_channels == 2:
-            # De-interleave L,R,L,R... to (2, N)
-            return samples_float32.reshape(-1, 2).T
-        raise ValueError(f"Unsupported channel count: {self.num_channels}")
+            for stretcher in stretchers:
+                stretcher.deinit()
 
-    def _process_with_stretcher(
-        self, stretcher: TDHSAudioStretch, samples_int16: np.ndarray, ratio: float
+        # Drop the stretched pre-roll so the result starts at the region.
+        self.samples = output[:, round(preroll_frames * ratio) :]
+        _count_audio(num_frames, self.samples.shape[1], self.samplerate)
+
+    def _render_preview(
+        self,
+        ratio: float,
+        upper_freq: int,
+        lower_freq: int,
+        double_range: bool,
+        linked_channels: bool,
+        unlinked_channels: bool,
     ) -> np.ndarray:
-        """Process samples using the TDHS stretcher."""
-        num_input_frames = len(samples_int16) // self.num_channels
+        """Stretch a decimated copy of the audio and interpolate it back up."""
+        if self.samples is None:
+            raise ValueError("No audio data to stretch. Call open() first")
+        source = self.samples
+        preroll_frames = 0
+        if self._preroll is not None:
+            preroll_frames = self._preroll.shape[1]
+            source = np.concatenate([self._preroll, source], axis=1)
 
-        # Calculate output buffer capacity
-        max_ratio_for_capacity = 4.0 if ratio > 2.0 or ratio < 0.5 else 2.0
-        effective_max_ratio = max(
-            ratio, max_ratio_for_capacity if ratio > 1.0 else 1.0 / ratio
+        # Averaging each run of `factor` frames filters and decimates at once.
+        factor = self._preview_factor()
+        num_frames = source.shape[1] // factor
+        low = AudioStretch()
+        low.samplerate = round(self.samplerate / factor)
+        low.num_channels = self.num_channels
+        low.samples = (
+            source[:, : num_frames * factor]
+            .reshape(self.num_channels, num_frames, factor)
+            .mean(axis=2, dtype=np.float32)
+        )
+        low.stretch(
+            ratio,
+            upper_freq=min(upper_freq, PREVIEW_UPPER_FREQ),
+            lower_freq=max(lower_freq, PREVIEW_LOWER_FREQ),
+            double_range=double_range,
+            fast_detection=True,
+            linked_channels=linked_channels,
+            unlinked_channels=unlinked_channels,
         )
+        stretched = low.samples
+        if factor > 1 and stretched is not None:
+            # Each decimated frame sits at the centre of the run it averages.
+            num_output = stretched.shape[1] * factor
+            positions = (np.arange(num_output) + 0.5) / factor - 0.5
+            frames = np.arange(stretched.shape[1])
+            upsampled = np.empty((self.num_channels, num_output), dtype=np.float32)
+            with metrics.timed("resample"):
+                for channel in range(self.num_channels):
+                    upsampled[channel] = np.interp(
+                        positions, frames, stretched[channel]
+                    )
+            stretched = upsampled
+        return stretched[:, round(preroll_frames * ratio) :]
 
-        output_capacity = stretcher.output_capacity(
-            num_input_frames, effective_max_ratio
+    def _preview_factor(self) -> int:
+        """Decimation factor of the preview render at the current sample rate."""
+        return max(1, self.samplerate // PREVIEW_SAMPLERATE)
+
+    def _stretch_group(
+        self,
+        stretcher: TDHSAudioStretch,
+        samples: np.ndarray,
+        ratio: float,
+        scratch: ScratchBuffer,
+    ) -> np.ndarray:
+        """Stretch one ``(channels, frames)`` group with its own context."""
+        num_channels, num_frames = samples.shape
+        interleaved = scratch.get(num_channels * num_frames)
+        samples_int16 = self._convert_to_int16(samples, out=interleaved)
+        output_samples = self._process_with_stretcher(
+            stretcher, samples_int16, ratio, num_channels
         )
-        output_buffer = np.zeros(output_capacity * self.num_channels, dtype=np.int16)
+        return self._convert_from_int16(output_samples, num_channels)
+
+    def _scratch_buffers(self, count: int) -> list[ScratchBuffer]:
+        """Return ``count`` reusable per-group int16 input buffers."""
+        while len(self._scratch) < count:
+            self._scratch.append(ScratchBuffer(np.int16))
+        return self._scratch[:count]
+
+    def _convert_to_int16(
+        self, samples: np.ndarray, out: np.ndarray | None = None
+    ) -> np.ndarray:
+        """Convert float32 ``(channels, frames)`` samples to interleaved int16."""
+        with metrics.timed("convert"):
+            return interleave_to_int16(samples, out)
+
+    def _convert_from_int16(
+        self, samples_int16: np.ndarray, num_channels: int | None = None
+    ) -> np.ndarray:
+        """Convert interleaved int16 back to float32 ``(channels, frames)``."""
+        with metrics.timed("convert"):
+            return deinterleave_from_int16(
+                samples_int16, num_channels or self.num_channels
+            )
+
+    def _process_with_stretcher(
+        self,
+        stretcher: TDHSAudioStretch,
+        samples_int16: np.ndarray,
+        ratio: float,
+        num_channels: int | None = None,
+    ) -> np.ndarray:
+        """Process interleaved int16 samples with the TDHS stretcher."""
+        num_channels = num_channels or self.num_channels
+        num_input_frames = len(samples_int16) // num_channels
+
+        # Room for the processed output plus the flush tail, uninitialized:
+        # every frame handed back below is written by the C library first.
+        output_capacity = stretcher.output_capacity(
+            num_input_frames, ratio
+        ) + stretcher.output_capacity(0, ratio)
+        output_buffer = np.empty(output_capacity * num_channels, dtype=np.int16)
 
         # Process samples
         num_processed = stretcher.process_samples(
             samples_int16, num_input_frames, output_buffer, ratio
         )
 
-        # Flush remaining samples
-        flush_buffer = np.zeros(output_capacity * self.num_channels, dtype=np.int16)
-        num_flushed = stretcher.flush(flush_buffer)
-
-        # Combine processed and flushed samples
-        total_samples = num_processed + num_flushed
-        result = np.zeros(total_samples * self.num_channels, dtype=np.int16)
-
-        processed_size = num_processed * self.num_channels
-        flushed_size = num_flushed * self.num_channels
-
-        result[:processed_size] = output_buffer[:processed_size]
-        result[processed_size : processed_size + flushed_size] = flush_buffer[
-            :flushed_size
-        ]
+        # Flush remaining samples straight into the tail of the output
+        num_flushed = stretcher.flush(output_buffer[num_processed * num_channels :])
 
-        return result
+        return output_buffer[: (num_processed + num_flushed) * num_channels]
 
 
 def stretch_audio(
     input_path: str | Path,
-    output_path: str | Path,
+    output_path: str | Path | None = None,
     ratio: float = 1.0,
     gap_ratio: float = 0.0,
     upper_freq: int = 333,
@@ -304,13 +602,43 @@ def stretch_audio(
     fast_detection: bool = False,
     normal_detection: bool = False,
     sample_rate: int = 0,
+    auto_range: bool = False,
+    linked_channels: bool = False,
+    unlinked_channels: bool = False,
+    start: float = 0.0,
+    end: float | None = None,
+    streaming: bool | None = None,
+    outputs: list[dict[str, Any]] | None = None,
+    segment_seconds: float | None = None,
 ) -> None:
     """
     Convenience function to stretch an audio file.
 
+    Instead of ``output_path``, ``outputs`` lists several renditions of the
+    same stretch, each a dict with a ``path`` and optionally a
+    ``sample_rate`` (default: ``sample_rate``), a ``format`` (default: from
+    the extension), a ``bit_depth`` and a codec ``quality``. The input is
+    decoded and stretched once; each distinct sample rate is resampled once
+    and the outputs are encoded concurrently.
+
+    An output with ``segment_seconds`` is written as segments of that length
+    next to its path, which becomes an HLS playlist listing each segment as
+    soon as it is complete (see :class:`SegmentedAudioFile`). Such outputs
+    stream by default, so the first segment is ready after a few seconds of
+    input rather than once the whole file is stretched.
+
+    Inputs longer than :data:`STREAMING_FRAMES` are streamed: decoded,
+    stretched and encoded :data:`STREAM_BLOCK_FRAMES` (or the block size of the
+    host's tuning profile, see :mod:`audiostretchy.profile`) at a time through
+    one :class:`StretchStream`, so memory use does not grow with the file.
+    Decoding and encoding run on their own threads, overlapped with the
+    stretch (see :mod:`audiostretchy.pipeline`). On
+    that path ``sample_rate`` resamples the input before stretching and
+    ``auto_range`` looks at the first :data:`STREAM_ANALYSIS_SECONDS`.
+
     Args:
         input_path: Path to input audio file
-        output_path: Path for output audio file
+        output_path: Path for output audio file (or pass ``outputs``)
         ratio: Stretch ratio (>1.0 = slower/longer, <1.0 = faster/shorter).
             Valid range is 0.5-2.0, or 0.25-4.0 when ``double_range=True``.
         gap_ratio: Separate ratio for silent sections (0.0 = use main ratio)
@@ -322,28 +650,449 @@ def stretch_audio(
         fast_detection: Use faster period detection algorithm
         normal_detection: Force normal detection (currently unused)
         sample_rate: Target sample rate for output (0 = keep original)
+        auto_range: Narrow the period search to the estimated F0 range
+        linked_channels: Share one TDHS context across all channels of
+            layouts wider than stereo
+        unlinked_channels: Stretch each channel as its own mono track,
+            e.g. for stems that must not share splice points
+        start: Start of the region to render, in seconds of input
+        end: End of the region to render, in seconds (None = end of file)
+        streaming: Force (True) or forbid (False) the streaming path;
+            None picks it by input length
+        outputs: Output dicts to write instead of ``output_path``
+        segment_seconds: Write segments of this length plus a playlist at
+            the output path (default for every output; None = one file)
+
+    Raises:
+        ValueError: If the parameters are invalid
+        IOError: If the input cannot be decoded or an output encoded
     """
-    processor = AudioStretch()
-
-    # Load audio
-    processor.open(input_path)
-
-    # Stretch audio
-    processor.stretch(
-        ratio=ratio,
-        gap_ratio=gap_ratio,
-        upper_freq=upper_freq,
-        lower_freq=lower_freq,
-        buffer_ms=buffer_ms,
-        threshold_gap_db=threshold_gap_db,
-        double_range=double_range,
-        fast_detection=fast_detection,
-        normal_detection=normal_detection,
+    with metrics.track_job() as job:
+        if end is not None and end <= start:
+            raise ValueError("end must be after start")
+        specs = _output_specs(output_path, outputs, sample_rate, segment_seconds)
+        if streaming is None:
+            streaming = any(spec["segment_seconds"] for spec in specs) or (
+                _input_frames(input_path) > STREAMING_FRAMES
+            )
+        if streaming:
+            job["audio_seconds"] = _stretch_file_streaming(
+                input_path,
+                specs,
+                ratio=ratio,
+                upper_freq=upper_freq,
+                lower_freq=lower_freq,
+                double_range=double_range,
+                fast_detection=fast_detection,
+                auto_range=auto_range,
+                linked_channels=linked_channels,
+                unlinked_channels=unlinked_channels,
+                start=start,
+                end=end,
+            )
+            return
+
+        processor = AudioStretch()
+
+        # Load audio (only the requested region)
+        processor.open(
+            input_path, start=start, duration=None if end is None else end - start
+        )
+        job["audio_seconds"] = processor.duration
+
+        # Stretch audio
+        processor.stretch(
+            ratio=ratio,
+            gap_ratio=gap_ratio,
+            upper_freq=upper_freq,
+            lower_freq=lower_freq,
+            buffer_ms=buffer_ms,
+            threshold_gap_db=threshold_gap_db,
+            double_range=double_range,
+            fast_detection=fast_detection,
+            normal_detection=normal_detection,
+            auto_range=auto_range,
+            linked_channels=linked_channels,
+            unlinked_channels=unlinked_channels,
+        )
+
+        # Resample (once per rate) and save each output
+        _save_outputs(processor, specs)
+
+
+def stretch_bytes(
+    data: bytes | bytearray | memoryview,
+    ratio: float = 1.0,
+    out_format: str = "mp3",
+    gap_ratio: float = 0.0,
+    upper_freq: int = 333,
+    lower_freq: int = 55,
+    buffer_ms: float = 25.0,
+    threshold_gap_db: float = -40.0,
+    double_range: bool = False,
+    fast_detection: bool = False,
+    normal_detection: bool = False,
+    sample_rate: int = 0,
+    auto_range: bool = False,
+    linked_channels: bool = False,
+    unlinked_channels: bool = False,
+    bit_depth: int = 16,
+) -> bytes:
+    """
+    Stretch encoded audio held in memory and return the encoded result.
+
+    Decoding and encoding run against in-memory buffers, so no temporary
+    files are written.
+
+    Args:
+        data: Encoded input audio (WAV, MP3, FLAC, OGG, ...)
+        ratio: Stretch ratio (>1.0 = slower/longer, <1.0 = faster/shorter)
+        out_format: Output container/codec, e.g. ``"mp3"``, ``"wav"``, ``"flac"``
+        gap_ratio: Separate ratio for silent sections (0.0 = use main ratio)
+        upper_freq: Upper frequency limit for period detection (Hz)
+        lower_freq: Lower frequency limit for period detection (Hz)
+        buffer_ms: Buffer size for silence detection (currently unused)
+        threshold_gap_db: Silence threshold in dB (currently unused)
+        double_range: Enable extended ratio range (0.25-4.0)
+        fast_detection: Use faster period detection algorithm
+        normal_detection: Force normal detection (currently unused)
+        sample_rate: Target sample rate for output (0 = keep original)
+        auto_range: Narrow the period search to the estimated F0 range
+        linked_channels: Share one TDHS context across all channels of
+            layouts wider than stereo
+        unlinked_channels: Stretch each channel as its own mono track
+        bit_depth: Output bit depth for formats that have one
+
+    Returns:
+        The encoded, stretched audio.
+
+    Raises:
+        ValueError: If the parameters are invalid
+        IOError: If the input cannot be decoded or the output encoded
+    """
+    with metrics.track_job() as job:
+        processor = AudioStretch()
+        processor.open(file=io.BytesIO(data))
+        job["audio_seconds"] = processor.duration
+        processor.stretch(
+            ratio=ratio,
+            gap_ratio=gap_ratio,
+            upper_freq=upper_freq,
+            lower_freq=lower_freq,
+            buffer_ms=buffer_ms,
+            threshold_gap_db=threshold_gap_db,
+            double_range=double_range,
+            fast_detection=fast_detection,
+            normal_detection=normal_detection,
+            auto_range=auto_range,
+            linked_channels=linked_channels,
+            unlinked_channels=unlinked_channels,
+        )
+        if sample_rate > 0 and sample_rate != processor.samplerate:
+            processor.resample(sample_rate)
+
+        output = io.BytesIO()
+        processor.save(file=output, format=out_format, bit_depth=bit_depth)
+        return output.getvalue()
+
+
+def _open_output(
+    files: ExitStack, spec: dict[str, Any], samplerate: int, num_channels: int
+) -> AudioWriter:
+    """Open the encoder of one output dict on ``files``."""
+    bit_depth = spec["bit_depth"] or 16
+    if spec["segment_seconds"]:
+        return files.enter_context(_open_segmented(spec, samplerate, num_channels))
+    if spec["format"] is None:
+        return files.enter_context(
+            WriteableAudioFile(
+                str(spec["path"]),
+                samplerate=samplerate,
+                num_channels=num_channels,
+                bit_depth=bit_depth,
+                quality=spec["quality"],
+            )
+        )
+    target = files.enter_context(Path(spec["path"]).open("wb"))  # noqa: SIM115
+    return files.enter_context(
+        WriteableAudioFile(
+            target,
+            samplerate=samplerate,
+            num_channels=num_channels,
+            bit_depth=bit_depth,
+            quality=spec["quality"],
+            format=spec["format"],
+        )
+    )
+
+
+def _open_segmented(
+    spec: dict[str, Any], samplerate: int, num_channels: int
+) -> SegmentedAudioFile:
+    """Create the segment writer of an output dict with ``segment_seconds``."""
+    return SegmentedAudioFile(
+        spec["path"],
+        samplerate,
+        num_channels,
+        segment_seconds=spec["segment_seconds"],
+        format=spec["format"],
+        bit_depth=spec["bit_depth"] or 16,
+        quality=spec["quality"],
     )
 
-    # Resample if requested
-    if sample_rate > 0 and sample_rate != processor.samplerate:
-        processor.resample(sample_rate)
 
-    # Save result
-    processor.save(output_path)
+def _count_audio(input_frames: int, output_frames: int, samplerate: int) -> None:
+    """Add the seconds of one stretch to the audio throughput counters."""
+    metrics.count("audio_input_seconds_total", input_frames / samplerate)
+    metrics.count("audio_output_seconds_total", output_frames / samplerate)
+
+
+def _input_frames(input_path: str | Path) -> int:
+    """Return the length of an audio file in frames."""
+    try:
+        with ReadableAudioFile(str(input_path)) as f:
+            return f.frames
+    except Exception as e:
+        raise OSError(f"Could not open audio file {input_path}: {e}") from e
+
+
+def _output_specs(
+    output_path: str | Path | None,
+    outputs: list[dict[str, Any]] | None,
+    sample_rate: int,
+    segment_seconds: float | None,
+) -> list[dict[str, Any]]:
+    """Validate ``output_path``/``outputs`` as a list of complete output dicts."""
+    if (output_path is None) == (outputs is None):
+        raise ValueError("Pass exactly one of output_path and outputs")
+    if outputs is None:
+        outputs = [{"path": output_path}]
+    if not outputs:
+        raise ValueError("outputs must not be empty")
+    specs = []
+    for output in outputs:
+        unknown = set(output) - set(OUTPUT_DEFAULTS) - {"path"}
+        if unknown:
+            raise ValueError(f"Unknown output keys: {', '.join(sorted(unknown))}")
+        if output.get("path") is None:
+            raise ValueError("Every output needs a path")
+        defaults = {"sample_rate": sample_rate, "segment_seconds": segment_seconds}
+        specs.append({**OUTPUT_DEFAULTS, **defaults, **output})
+    return specs
+
+
+def _save_outputs(processor: AudioStretch, specs: list[dict[str, Any]]) -> None:
+    """Resample ``processor`` once per distinct rate and encode every output."""
+    renditions = {processor.samplerate: processor}
+    for spec in specs:
+        rate = spec["sample_rate"] or processor.samplerate
+        if rate not in renditions:
+            rendition = AudioStretch()
+            rendition.samples = processor.samples
+            rendition.samplerate = processor.samplerate
+            rendition.num_channels = processor.num_channels
+            rendition.resample(rate)
+            renditions[rate] = rendition
+
+    def save(spec: dict[str, Any]) -> None:
+        rendition = renditions[spec["sample_rate"] or processor.samplerate]
+        if spec["segment_seconds"]:
+            if rendition.samples is None:
+                raise ValueError("No audio data to save")
+            samples = rendition.samples
+            segmented = _open_segmented(
+                spec, rendition.samplerate, rendition.num_channels
+            )
+            try:
+                with metrics.timed("encode"), segmented:
+                    segmented.write(samples)
+            except Exception as e:
+                raise OSError(f"Could not save segments to {spec['path']}: {e}") from e
+            return
+        rendition.save(
+            spec["path"],
+            format=spec["format"],
+            bit_depth=spec["bit_depth"],
+            quality=spec["quality"],
+        )
+
+    if len(specs) == 1:
+        save(specs[0])
+        return
+    # Pedalboard encodes without the GIL, so the outputs are written in parallel.
+    with ThreadPoolExecutor(max_workers=len(specs)) as pool:
+        list(pool.map(metrics.bound(save), specs))
+
+
+def _stretch_file_streaming(
+    input_path: str | Path,
+    specs: list[dict[str, Any]],
+    ratio: float,
+    upper_freq: int,
+    lower_freq: int,
+    double_range: bool,
+    fast_detection: bool,
+    auto_range: bool,
+    linked_channels: bool,
+    unlinked_channels: bool,
+    start: float,
+    end: float | None,
+) -> float:
+    """
+    Stretch a file to files block by block with bounded memory.
+
+    When every output has the same sample rate the input is resampled to it
+    before stretching; otherwise the stretch runs at the input rate and each
+    distinct output rate gets one :class:`StreamResampler`.
+
+    Returns:
+        The length of the stretched input region in seconds.
+    """
+    targets = ", ".join(str(spec["path"]) for spec in specs)
+    rates = {spec["sample_rate"] for spec in specs}
+    try:
+        with ReadableAudioFile(str(input_path)) as raw:
+            source: ReadableAudioFile | ResampledReadableAudioFile = raw
+            sample_rate = rates.pop() if len(rates) == 1 else 0
+            if sample_rate > 0 and sample_rate != int(raw.samplerate):
+                source = raw.resampled_to(sample_rate)
+            samplerate = int(source.samplerate)
+            num_channels = source.num_channels
+            start_frame = round(start * samplerate)
+            stop_frame = source.frames
+            if end is not None:
+                stop_frame = min(stop_frame, round(end * samplerate))
+            # Raised after the try so it is not reported as an OSError.
+            beyond_end = bool(start_frame) and start_frame >= stop_frame
+            if not beyond_end:
+                _stream_frames(
+                    source,
+                    specs,
+                    samplerate,
+                    num_channels,
+                    start_frame,
+                    stop_frame,
+                    ratio=ratio,
+                    upper_freq=upper_freq,
+                    lower_freq=lower_freq,
+                    double_range=double_range,
+                    fast_detection=fast_detection,
+                    auto_range=auto_range,
+                    linked_channels=linked_channels,
+                    unlinked_channels=unlinked_channels,
+                )
+    except Exception as e:
+        raise OSError(f"Could not stretch {input_path} to {targets}: {e}") from e
+
+    if beyond_end:
+        raise ValueError(f"start ({start}s) is beyond the end of the file")
+    return (stop_frame - start_frame) / samplerate
+
+
+def _stream_frames(
+    source: ReadableAudioFile | ResampledReadableAudioFile,
+    specs: list[dict[str, Any]],
+    samplerate: int,
+    num_channels: int,
+    start_frame: int,
+    stop_frame: int,
+    ratio: float,
+    upper_freq: float,
+    lower_freq: float,
+    double_range: bool,
+    fast_detection: bool,
+    auto_range: bool,
+    linked_channels: bool,
+    unlinked_channels: bool,
+) -> None:
+    """Stretch ``source`` frames ``[start_frame, stop_frame)`` into new files."""
+    if auto_range:
+        source.seek(start_frame)
+        window = min(stop_frame - start_frame, STREAM_ANALYSIS_SECONDS * samplerate)
+        estimated = estimate_period_range(
+            source.read(window),
+            samplerate,
+            *period_range(samplerate, int(upper_freq), int(lower_freq)),
+        )
+        if estimated is not None:
+            # Period bounds back to the frequencies StretchStream takes.
+            upper_freq = samplerate / estimated[0]
+            lower_freq = samplerate / estimated[1]
+
+    # Same pre-roll as AudioStretch.open(): one longest default period.
+    preroll_frames = min(start_frame, samplerate // 55)
+    source.seek(start_frame - preroll_frames)
+    skip = round(preroll_frames * ratio)
+
+    with (
+        StretchStream(
+            samplerate,
+            num_channels,
+            ratio=ratio,
+            upper_freq=upper_freq,
+            lower_freq=lower_freq,
+            double_range=double_range,
+            fast_detection=fast_detection,
+            linked_channels=linked_channels,
+            unlinked_channels=unlinked_channels,
+        ) as stream,
+        ExitStack() as files,
+        ThreadPoolExecutor(max_workers=len(specs)) as encoders,
+    ):
+        # Outputs grouped by sample rate, with the resampler each group shares.
+        groups: dict[int, tuple[StreamResampler | None, list[AudioWriter]]]
+        groups = {}
+        for spec in specs:
+            rate = spec["sample_rate"] or samplerate
+            if rate not in groups:
+                resampler = None
+                if rate != samplerate:
+                    resampler = StreamResampler(samplerate, rate, num_channels)
+                groups[rate] = (resampler, [])
+            groups[rate][1].append(_open_output(files, spec, rate, num_channels))
+        written = 0
+
+        def read_blocks() -> Iterator[np.ndarray]:
+            position = start_frame - preroll_frames
+            block_frames = profile.tuned("stream_block_frames", STREAM_BLOCK_FRAMES)
+            while position < stop_frame:
+                with metrics.timed("decode"):
+                    block = source.read(min(block_frames, stop_frame - position))
+                if block.shape[1] == 0:
+                    return
+                position += block.shape[1]
+                yield block
+
+        def process(block: np.ndarray) -> np.ndarray:
+            # Drop the stretched pre-roll, as AudioStretch.stretch() does.
+            nonlocal skip
+            stretched = stream.process(block)
+            dropped = min(skip, stretched.shape[1])
+            skip -= dropped
+            return stretched[:, dropped:]
+
+        def encode(block: np.ndarray | None) -> None:
+            jobs: list[tuple[AudioWriter, np.ndarray]] = []
+            for resampler, outs in groups.values():
+                if resampler is not None:
+                    with metrics.timed("resample"):
+                        resampled = resampler.process(block)
+                elif block is None:
+                    continue
+                else:
+                    resampled = block
+                jobs.extend((out, resampled) for out in outs)
+            with metrics.timed("encode"):
+                list(encoders.map(lambda job: job[0].write(job[1]), jobs))
+
+        def write(block: np.ndarray) -> None:
+            nonlocal written
+            encode(block)
+            written += block.shape[1]
+
+        # Decoding and encoding overlap with stretching on their own threads.
+        run_pipeline(read_blocks(), process, lambda: stream.flush()[:, skip:], write)
+        # Drain the resamplers.
+        encode(None)
+
+    _count_audio(stop_frame - start_frame, written, samplerate)
@@ -0,0 +1,173 @@
+# this_file: src/audiostretchy/cost.py
+"""Predict the output length, peak memory and CPU time of a stretch.
+
+TDHS spends nearly all of its time in the period search, which correlates
+every candidate period between the shortest and the longest one. Its cost per
+input frame therefore grows with the width of the period range
+(``samplerate / lower_freq - samplerate / upper_freq``), drops to about a
+third with ``fast_detection`` and grows with the channels summed into each
+correlation. :func:`estimate` combines that with the buffer sizes the library
+allocates (from :meth:`TDHSAudioStretch.output_capacity`) so a scheduler can
+place or reject a job before it starts.
+
+The per-frame constants in :data:`CALIBRATION` were measured on an x86-64
+host. ``audiostretchy calibrate`` measures them on the current machine and
+the host's tuning profile then takes precedence; constants passed to
+:func:`estimate` override both.
+"""
+
+from pathlib import Path
+from typing import NamedTuple
+
+from pedalboard.io import ReadableAudioFile
+
+from . import profile
+from .c_interface import TDHSAudioStretch
+from .convert import BLOCK_FRAMES
+from .core import STREAM_ANALYSIS_SECONDS, STREAM_BLOCK_FRAMES, STREAMING_FRAMES
+from .pipeline import QUEUE_DEPTH
+from .stream import channel_groups, period_range, tdhs_flags
+
+# Cost constants of the model; see estimate() for how each one is used.
+CALIBRATION = {
+    # CPU seconds per input frame and period-range sample, per context.
+    "tdhs_seconds": 6.2e-10,
+    # The same with fast_detection.
+    "fast_tdhs_seconds": 2.0e-10,
+    # Extra share of the search cost for each channel beyond the first.
+    "channel_weight": 0.45,
+    # Decode, conversion and encode seconds per frame and channel.
+    "io_seconds": 8e-9,
+    # Resident size of the interpreter with the library imported.
+    "base_bytes": 48 << 20,
+}
+
+# Bytes per sample of the float32 and int16 buffers.
+_FLOAT = 4
+_INT16 = 2
+
+
+class Estimate(NamedTuple):
+    """Predicted cost of one stretch."""
+
+    # Frames of stretched audio written
+    output_frames: int
+    # Peak resident memory of the process, in bytes
+    peak_bytes: int
+    # CPU time over all threads, in seconds
+    cpu_seconds: float
+    # Whether the job takes the bounded-memory streaming path
+    streaming: bool
+
+
+def estimate(
+    source: str | Path | int,
+    samplerate: int | None = None,
+    channels: int | None = None,
+    ratio: float = 1.0,
+    upper_freq: int = 333,
+    lower_freq: int = 55,
+    double_range: bool = False,
+    fast_detection: bool = False,
+    auto_range: bool = False,
+    linked_channels: bool = False,
+    unlinked_channels: bool = False,
+    streaming: bool | None = None,
+    calibration: dict[str, float] | None = None,
+) -> Estimate:
+    """
+    Estimate what :func:`~audiostretchy.core.stretch_audio` will cost.
+
+    ``auto_range`` can only narrow the period search, so the CPU time given
+    for it is an upper bound.
+
+    Args:
+        source: Path of the input file (only its header is read) or its
+            length in frames
+        samplerate: Sample rate in Hz; required when ``source`` is a length
+        channels: Channel count; required when ``source`` is a length
+        ratio: Stretch ratio (>1.0 = slower, <1.0 = faster)
+        upper_freq: Upper frequency limit for period detection (Hz)
+        lower_freq: Lower frequency limit for period detection (Hz)
+        double_range: Enable extended ratio range (0.25-4.0)
+        fast_detection: Use faster period detection algorithm
+        auto_range: Narrow the period search to the estimated F0 range
+        linked_channels: Share one TDHS context across layouts wider than stereo
+        unlinked_channels: Price one mono context per channel
+        streaming: Whether the job takes the streaming path; None decides by
+            length like ``stretch_audio``
+        calibration: Constants replacing those of the tuning profile and
+            :data:`CALIBRATION`
+
+    Returns:
+        The expected output length, peak resident memory and CPU seconds.
+
+    Raises:
+        ValueError: If the parameters are invalid
+        IOError: If the file header cannot be read
+    """
+    if isinstance(source, int):
+        if samplerate is None or channels is None:
+            raise ValueError("samplerate and channels are required with a length")
+        num_frames = source
+    else:
+        try:
+            with ReadableAudioFile(str(source)) as f:
+                num_frames = f.frames
+                samplerate = samplerate or int(f.samplerate)
+                channels = channels or f.num_channels
+        except Exception as e:
+            raise OSError(f"Could not open audio file {source}: {e}") from e
+    if ratio <= 0:
+        raise ValueError("Stretch ratio must be positive")
+    constants = CALIBRATION | profile.tuned("calibration", {}) | (calibration or {})
+    if streaming is None:
+        streaming = num_frames > STREAMING_FRAMES
+
+    shortest, longest = period_range(samplerate, upper_freq, lower_freq)
+    groups = channel_groups(channels, linked_channels, unlinked_channels)
+    stretcher = TDHSAudioStretch(
+        shortest, longest, 1, tdhs_flags(ratio, double_range, fast_detection)
+    )
+    try:
+        block_frames = (
+            profile.tuned("stream_block_frames", STREAM_BLOCK_FRAMES)
+            if streaming
+            else num_frames
+        )
+        capacity = stretcher.output_capacity(
+            block_frames, ratio
+        ) + stretcher.output_capacity(0, ratio)
+    finally:
+        stretcher.deinit()
+
+    search = constants["fast_tdhs_seconds" if fast_detection else "tdhs_seconds"]
+    cpu_seconds = num_frames * channels * constants["io_seconds"]
+    for group in groups:
+        weight = 1 + constants["channel_weight"] * (group.stop - group.start - 1)
+        cpu_seconds += num_frames * (longest - shortest) * search * weight
+
+    if streaming:
+        # Blocks queued on both sides of the stretch stage plus the one in
+        # flight at each stage, and the auto_range analysis window.
+        block_bytes = channels * (block_frames + capacity) * _FLOAT
+        working = (2 * QUEUE_DEPTH + 3) * block_bytes
+        if auto_range:
+            window = min(num_frames, STREAM_ANALYSIS_SECONDS * samplerate)
+            working += window * channels * _FLOAT
+    else:
+        # Decoded float32 input, its int16 copy and the conversion block,
+        # then per group the int16 native output and its float32 conversion;
+        # several groups are joined into one more float32 array.
+        working = num_frames * channels * (_FLOAT + _INT16)
+        working += min(num_frames, BLOCK_FRAMES) * channels * _FLOAT
+        working += capacity * channels * (_INT16 + _FLOAT)
+        if len(groups) > 1:
+            working += capacity * channels * _FLOAT
+
+    return Estimate(
+        output_frames=round(num_frames * ratio),
+        peak_bytes=int(constants["base_bytes"]) + working,
+        cpu_seconds=cpu_seconds,
+        streaming=streaming,
+    )
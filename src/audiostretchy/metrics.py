@@ -0,0 +1,290 @@
+# this_file: src/audiostretchy/metrics.py
+"""Counters and latency histograms for long-running and batch use.
+
+The library records into the active :class:`Metrics` registry from fixed
+instrumentation points: each TDHS call and flush in
+:class:`~audiostretchy.c_interface.TDHSAudioStretch`; decode, sample
+conversion, resample and encode in :class:`~audiostretchy.core.AudioStretch`
+and the streaming path; and one job per :func:`~audiostretchy.core.stretch_audio`
+or :func:`~audiostretchy.core.stretch_bytes` call. The registry renders as
+Prometheus text (:meth:`Metrics.to_prometheus`, :meth:`Metrics.write_prometheus`,
+:func:`serve`) or as a JSON summary (:meth:`Metrics.to_json`).
+
+Recorded series:
+
+* ``audiostretchy_jobs_total`` and ``audiostretchy_job_errors_total{type}``
+* ``audiostretchy_audio_input_seconds_total`` and ``..._output_seconds_total``
+* ``audiostretchy_realtime_factor``: audio seconds per wall-clock second
+* ``audiostretchy_stage_seconds{stage}`` for ``decode``, ``convert``,
+  ``tdhs``, ``flush``, ``resample`` and ``encode``
+* ``audiostretchy_contexts_created_total``: native TDHS contexts opened
+"""
+
+import functools
+import json
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, ParamSpec, TypeVar
+
+PREFIX = "audiostretchy_"
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+# Upper bounds of the histogram buckets, per histogram.
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 60.0)
+REALTIME_BUCKETS = (1.0, 2.0, 5.0, 10.0, 20.0, 50.0, 100.0, 200.0, 500.0)
+BUCKETS = {
+    "stage_seconds": LATENCY_BUCKETS,
+    "realtime_factor": REALTIME_BUCKETS,
+}
+
+_Labels = tuple[tuple[str, str], ...]
+
+
+class Metrics:
+    """Thread-safe registry of labelled counters and histograms."""
+
+    def __init__(self) -> None:
+        """Create an empty registry."""
+        self._lock = threading.Lock()
+        self._counters: dict[tuple[str, _Labels], float] = {}
+        # name/labels -> [per-bucket counts (last is +Inf), sum, count]
+        self._histograms: dict[tuple[str, _Labels], list[Any]] = {}
+
+    def count(self, name: str, amount: float = 1.0, **labels: str) -> None:
+        """Add ``amount`` to counter ``name``."""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + amount
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        """Record ``value`` in histogram ``name`` (buckets from :data:`BUCKETS`)."""
+        bounds = BUCKETS[name]
+        index = next((i for i, bound in enumerate(bounds) if value <= bound), -1)
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            series = self._histograms.get(key)
+            if series is None:
+                series = self._histograms[key] = [[0] * (len(bounds) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def state(self) -> dict[str, list]:
+        """Return a picklable copy of every series, for :meth:`merge`."""
+        with self._lock:
+            return {
+                "counters": [
+                    [name, list(labels), value]
+                    for (name, labels), value in self._counters.items()
+                ],
+                "histograms": [
+                    [name, list(labels), list(series[0]), series[1], series[2]]
+                    for (name, labels), series in self._histograms.items()
+                ],
+            }
+
+    def merge(self, state: dict[str, list]) -> None:
+        """Add the series of another registry's :meth:`state` to this one."""
+        with self._lock:
+            for name, labels, value in state["counters"]:
+                key = (name, tuple(tuple(pair) for pair in labels))
+                self._counters[key] = self._counters.get(key, 0.0) + value
+            for name, labels, buckets, total, count in state["histograms"]:
+                key = (name, tuple(tuple(pair) for pair in labels))
+                series = self._histograms.setdefault(key, [[0] * len(buckets), 0.0, 0])
+                series[0] = [a + b for a, b in zip(series[0], buckets, strict=True)]
+                series[1] += total
+                series[2] += count
+
+    def to_json(self) -> dict[str, dict]:
+        """Summarize every series as plain JSON-compatible dictionaries."""
+        with self._lock:
+            counters = {
+                _series_name(name, labels): value
+                for (name, labels), value in sorted(self._counters.items())
+            }
+            histograms = {}
+            for (name, labels), (buckets, total, count) in sorted(
+                self._histograms.items()
+            ):
+                bounds = [*map(str, BUCKETS[name]), "+Inf"]
+                histograms[_series_name(name, labels)] = {
+                    "count": count,
+                    "sum": total,
+                    "mean": total / count if count else 0.0,
+                    "buckets": dict(zip(bounds, buckets, strict=True)),
+                }
+        return {"counters": counters, "histograms": histograms}
+
+    def to_prometheus(self) -> str:
+        """Render every series in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(
+                (key, [list(series[0]), series[1], series[2]])
+                for key, series in self._histograms.items()
+            )
+        declared = set()
+        for (name, labels), value in counters:
+            if name not in declared:
+                declared.add(name)
+                lines.append(f"# TYPE {PREFIX}{name} counter")
+            lines.append(f"{_series_name(name, labels)} {value:g}")
+        for (name, labels), (buckets, total, count) in histograms:
+            if name not in declared:
+                declared.add(name)
+                lines.append(f"# TYPE {PREFIX}{name} histogram")
+            cumulative = 0
+            for bound, bucket in zip([*BUCKETS[name], "+Inf"], buckets, strict=True):
+                cumulative += bucket
+                bucket_labels = (*labels, ("le", str(bound)))
+                lines.append(
+                    f"{_series_name(name + '_bucket', bucket_labels)} {cumulative}"
+                )
+            lines.append(f"{_series_name(name + '_sum', labels)} {total:g}")
+            lines.append(f"{_series_name(name + '_count', labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str | Path) -> None:
+        """Atomically write :meth:`to_prometheus` for a textfile collector."""
+        target = Path(path)
+        partial = target.with_name(f".{target.name}.partial")
+        partial.write_text(self.to_prometheus())
+        partial.replace(target)
+
+    def clear(self) -> None:
+        """Drop every series."""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+# Registry the library records into; replaced within a context by collecting().
+REGISTRY = Metrics()
+_active: ContextVar[Metrics] = ContextVar("audiostretchy_metrics", default=REGISTRY)
+
+
+def active() -> Metrics:
+    """Return the registry instrumentation points currently record into."""
+    return _active.get()
+
+
+def bound(function: Callable[P, T]) -> Callable[P, T]:
+    """
+    Return ``function`` recording into the registry active at this call.
+
+    Threads start with an empty context, so work handed to a thread pool
+    would otherwise record into :data:`REGISTRY` rather than the registry of
+    an enclosing :func:`collecting`.
+    """
+    registry = _active.get()
+
+    @functools.wraps(function)
+    def run(*args: P.args, **kwargs: P.kwargs) -> T:
+        token = _active.set(registry)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            _active.reset(token)
+
+    return run
+
+
+def count(name: str, amount: float = 1.0, **labels: str) -> None:
+    """Add to a counter of the active registry."""
+    _active.get().count(name, amount, **labels)
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """Record the duration of the ``with`` body as pipeline ``stage``."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _active.get().observe("stage_seconds", time.perf_counter() - start, stage=stage)
+
+
+@contextmanager
+def track_job() -> Iterator[dict[str, float]]:
+    """
+    Count one job, its errors by type and its realtime factor.
+
+    The body stores the audio length it processed, in seconds, under
+    ``"audio_seconds"`` of the yielded dictionary.
+    """
+    registry = _active.get()
+    job = {"audio_seconds": 0.0}
+    start = time.perf_counter()
+    try:
+        yield job
+    except Exception as e:
+        registry.count("job_errors_total", type=type(e).__name__)
+        raise
+    finally:
+        registry.count("jobs_total")
+        elapsed = time.perf_counter() - start
+        if job["audio_seconds"] and elapsed > 0:
+            registry.observe("realtime_factor", job["audio_seconds"] / elapsed)
+
+
+@contextmanager
+def collecting() -> Iterator[Metrics]:
+    """
+    Record into a fresh registry for the ``with`` body and yield it.
+
+    The registry is held in a context variable, so concurrent ``collecting()``
+    blocks on other threads or asyncio tasks each see only their own work.
+    """
+    registry = Metrics()
+    token = _active.set(registry)
+    try:
+        yield registry
+    finally:
+        _active.reset(token)
+
+
+def serve(port: int, registry: Metrics = REGISTRY) -> ThreadingHTTPServer:
+    """
+    Serve ``registry`` as a Prometheus endpoint on a background thread.
+
+    Returns:
+        The running server; call ``shutdown()`` on it to stop.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            body = registry.to_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("", port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def write_json(registry: Metrics, path: str | Path) -> None:
+    """Write :meth:`Metrics.to_json` of ``registry`` to ``path``."""
+    Path(path).write_text(json.dumps(registry.to_json(), indent=2) + "\n")
+
+
+def _series_name(name: str, labels: _Labels) -> str:
+    """Return the exposition name of a series, e.g. ``x{stage="tdhs"}``."""
+    if not labels:
+        return PREFIX + name
+    rendered = ",".join(f'{key}="{value}"' for key, value in labels)
+    return f"{PREFIX}{name}{{{rendered}}}"
@@ -0,0 +1,215 @@
+# this_file: src/audiostretchy/parallel.py
+"""Stretch many in-memory arrays on a process pool via shared memory.
+
+Handing arrays to a ``multiprocessing`` pool pickles every input to a worker
+and every result back, which copies each signal through a pipe twice. Here all
+inputs are packed into one ``multiprocessing.shared_memory`` segment and all
+outputs are written into a second one, sized with
+:func:`~audiostretchy.arrays.required_output_frames`. Workers attach to both
+segments once per chunk of jobs, run :func:`~audiostretchy.arrays.stretch_array`
+on views of them, and only offsets and frame counts travel over the pipe.
+"""
+
+import functools
+import os
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from typing import Any
+
+import numpy as np
+
+from . import profile
+from .arrays import required_output_frames, stretch_array
+from .convert import INT16_SCALE
+
+# (channels, frames, input offset, capacity, output offset, ratio); offsets
+# are in float32 elements from the start of their segment.
+_Job = tuple[int, int, int, int, int, float]
+
+
+def stretch_arrays_parallel(
+    arrays: list[np.ndarray],
+    ratios: float | list[float],
+    workers: int | None = None,
+    samplerate: int = 44100,
+    upper_freq: int = 333,
+    lower_freq: int = 55,
+    double_range: bool = False,
+    fast_detection: bool = False,
+    auto_range: bool = False,
+    linked_channels: bool = False,
+    unlinked_channels: bool = False,
+) -> list[np.ndarray]:
+    """
+    Stretch a batch of arrays in parallel worker processes.
+
+    Args:
+        arrays: Float or int16 audio, each 1-D mono or ``(channels, frames)``
+        ratios: One stretch ratio for every array, or one ratio per array
+        workers: Number of worker processes (None = the tuning profile's,
+            else one per CPU)
+        samplerate: Sample rate shared by all arrays, in Hz
+        upper_freq: Upper frequency limit for period detection (Hz)
+        lower_freq: Lower frequency limit for period detection (Hz)
+        double_range: Enable extended ratio range (0.25-4.0)
+        fast_detection: Use faster period detection algorithm
+        auto_range: Narrow the period search to each array's F0 range
+        linked_channels: Share one TDHS context across layouts wider than stereo
+        unlinked_channels: Stretch each array's channels on separate
+            mono contexts, serially within the worker
+
+    Returns:
+        The stretched float32 arrays, in input order and input shape.
+
+    Raises:
+        ValueError: If the number of ratios does not match the arrays, or a
+            ratio is not positive
+    """
+    if isinstance(ratios, int | float):
+        ratios = [float(ratios)] * len(arrays)
+    if len(ratios) != len(arrays):
+        raise ValueError(f"Got {len(ratios)} ratios for {len(arrays)} arrays")
+    if not all(ratio > 0 for ratio in ratios):
+        raise ValueError("Stretch ratio must be positive")
+    if not arrays:
+        return []
+
+    options = {
+        "samplerate": samplerate,
+        "upper_freq": upper_freq,
+        "lower_freq": lower_freq,
+        "double_range": double_range,
+        "fast_detection": fast_detection,
+        "auto_range": auto_range,
+        "linked_channels": linked_channels,
+        "unlinked_channels": unlinked_channels,
+    }
+
+    jobs: list[_Job] = []
+    input_size = output_size = 0
+    for array, ratio in zip(arrays, ratios, strict=True):
+        num_channels = 1 if array.ndim == 1 else array.shape[0]
+        num_frames = array.shape[-1]
+        capacity = required_output_frames(
+            num_frames, ratio, samplerate, upper_freq, lower_freq, double_range
+        )
+        jobs.append(
+            (num_channels, num_frames, input_size, capacity, output_size, ratio)
+        )
+        input_size += num_channels * num_frames
+        output_size += num_channels * capacity
+
+    itemsize = np.dtype(np.float32).itemsize
+    with (
+        _segment(size=input_size * itemsize) as inputs,
+        _segment(size=output_size * itemsize) as outputs,
+    ):
+        _pack(inputs, arrays, jobs, input_size)
+
+        run = functools.partial(_run_jobs, inputs.name, outputs.name, options)
+        workers = workers or profile.tuned("workers", os.cpu_count() or 1)
+        workers = min(workers, len(jobs))
+        if workers <= 1:
+            produced = run(jobs)
+        else:
+            chunksize = max(1, len(jobs) // (4 * workers))
+            chunks = [
+                jobs[start : start + chunksize]
+                for start in range(0, len(jobs), chunksize)
+            ]
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                produced = [count for part in pool.map(run, chunks) for count in part]
+
+        return _unpack(outputs, arrays, jobs, produced, output_size)
+
+
+@contextmanager
+def _segment(
+    name: str | None = None, size: int = 0
+) -> Iterator[shared_memory.SharedMemory]:
+    """
+    Create a shared segment of ``size`` bytes, or attach to segment ``name``.
+
+    On exit, also on error, the segment is closed, and unlinked first if it
+    was created here.
+    """
+    if name is None:
+        segment = shared_memory.SharedMemory(create=True, size=max(1, size))
+    else:
+        segment = shared_memory.SharedMemory(name=name)
+    try:
+        yield segment
+    finally:
+        if name is None:
+            segment.unlink()
+        segment.close()
+
+
+def _pack(
+    segment: shared_memory.SharedMemory,
+    arrays: list[np.ndarray],
+    jobs: list[_Job],
+    size: int,
+) -> None:
+    """Copy every input into the shared input segment as float32."""
+    packed = np.ndarray(size, dtype=np.float32, buffer=segment.buf)
+    for array, (num_channels, num_frames, offset, *_) in zip(arrays, jobs, strict=True):
+        target = packed[offset : offset + num_channels * num_frames]
+        if array.dtype == np.int16:
+            np.divide(array.reshape(-1), INT16_SCALE, out=target)
+        else:
+            target[...] = array.reshape(-1)
+
+
+def _unpack(
+    segment: shared_memory.SharedMemory,
+    arrays: list[np.ndarray],
+    jobs: list[_Job],
+    produced: list[int],
+    size: int,
+) -> list[np.ndarray]:
+    """Copy every result out of the shared output segment."""
+    stretched = np.ndarray(size, dtype=np.float32, buffer=segment.buf)
+    results = []
+    for array, job, num_frames in zip(arrays, jobs, produced, strict=True):
+        num_channels, _, _, capacity, offset, _ = job
+        result = stretched[offset : offset + num_channels * capacity]
+        result = result.reshape(num_channels, capacity)[:, :num_frames].copy()
+        results.append(result[0] if array.ndim == 1 else result)
+    return results
+
+
+def _run_jobs(
+    input_name: str, output_name: str, options: dict[str, Any], jobs: list[_Job]
+) -> list[int]:
+    """Attach to the shared segments, stretch ``jobs`` and detach again."""
+    with _segment(input_name) as inputs, _segment(output_name) as outputs:
+        return [_run(inputs, outputs, options, job) for job in jobs]
+
+
+def _run(
+    inputs: shared_memory.SharedMemory,
+    outputs: shared_memory.SharedMemory,
+    options: dict[str, Any],
+    job: _Job,
+) -> int:
+    """Stretch one packed array in place; return the frames produced."""
+    num_channels, num_frames, in_offset, capacity, out_offset, ratio = job
+    source = np.ndarray(
+        (num_channels, num_frames),
+        dtype=np.float32,
+        buffer=inputs.buf,
+        offset=in_offset * np.dtype(np.float32).itemsize,
+    )
+    target = np.ndarray(
+        (num_channels, capacity),
+        dtype=np.float32,
+        buffer=outputs.buf,
+        offset=out_offset * np.dtype(np.float32).itemsize,
+    )
+    stretched = stretch_array(
+        source, ratio=ratio, out=target, interleaved=False, **options
+    )
+    return stretched.shape[1]
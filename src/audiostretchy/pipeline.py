@@ -0,0 +1,108 @@
+# this_file: src/audiostretchy/pipeline.py
+"""Overlap decoding, stretching and encoding on separate threads.
+
+On the streaming path each block is decoded by Pedalboard, stretched by the
+TDHS library and encoded by Pedalboard again. All three release the GIL while
+they work, so running them one after another leaves cores idle. The pipeline
+here gives decoding and encoding a thread each, connected to the stretch stage
+on the calling thread by bounded queues, so throughput approaches that of the
+slowest stage rather than the sum of all three while memory stays at a few
+blocks per queue.
+"""
+
+import queue
+import threading
+from collections.abc import Callable, Iterable
+
+import numpy as np
+
+from . import metrics
+
+# Blocks buffered between two stages.
+QUEUE_DEPTH = 4
+
+# Marks the end of a queue's stream.
+_DONE = object()
+
+
+def run_pipeline(
+    blocks: Iterable[np.ndarray],
+    process: Callable[[np.ndarray], np.ndarray],
+    finish: Callable[[], np.ndarray],
+    write: Callable[[np.ndarray], None],
+    depth: int = QUEUE_DEPTH,
+) -> None:
+    """
+    Run ``write(process(block))`` for every block, with the stages overlapped.
+
+    ``blocks`` is iterated on a decode thread and ``write`` is called on an
+    encode thread, both in order; ``process`` and then ``finish`` (whose
+    result is written last) run on the calling thread. The first exception
+    raised by any stage stops the pipeline and is re-raised here.
+
+    Args:
+        blocks: Iterable producing the input blocks, e.g. file reads
+        process: Transform applied to each block
+        finish: Called once after the last block; returns the final output
+        write: Consumer of the transformed blocks, e.g. a file write
+        depth: Maximum number of blocks waiting between two stages
+    """
+    decoded: queue.Queue = queue.Queue(maxsize=depth)
+    encoded: queue.Queue = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    errors: list[BaseException] = []
+
+    def put_decoded(item: object) -> None:
+        # Give up once the pipeline is stopping so this thread cannot hang.
+        while not stop.is_set():
+            try:
+                decoded.put(item, timeout=0.05)
+                return
+            except queue.Full:
+                continue
+
+    def decode() -> None:
+        try:
+            for block in blocks:
+                if stop.is_set():
+                    return
+                put_decoded(block)
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            put_decoded(_DONE)
+
+    def encode() -> None:
+        # Always drain the queue, so the stretch stage never blocks on it.
+        while (item := encoded.get()) is not _DONE:
+            if errors:
+                continue
+            try:
+                write(item)
+            except BaseException as e:
+                errors.append(e)
+
+    threads = [
+        threading.Thread(
+            target=metrics.bound(decode), name="audiostretchy-decode", daemon=True
+        ),
+        threading.Thread(
+            target=metrics.bound(encode), name="audiostretchy-encode", daemon=True
+        ),
+    ]
+    for thread in threads:
+        thread.start()
+
+    try:
+        while (item := decoded.get()) is not _DONE and not errors:
+            encoded.put(process(item))
+        if not errors:
+            encoded.put(finish())
+    finally:
+        stop.set()
+        encoded.put(_DONE)
+        for thread in threads:
+            thread.join()
+
+    if errors:
+        raise errors[0]
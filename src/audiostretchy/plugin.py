@@ -0,0 +1,182 @@
+# this_file: src/audiostretchy/plugin.py
+"""Pedalboard-compatible adapter around :class:`StretchStream`.
+
+Pedalboard only accepts its own native plugins inside a ``Pedalboard`` chain,
+so :class:`StretchPlugin` mirrors the ``Plugin.process`` call signature
+instead. It slots between two boards and lets Pedalboard's block streaming
+drive the whole chain without materializing the file in memory::
+
+    with ReadableAudioFile("in.flac") as f, WriteableAudioFile(...) as o:
+        while f.tell() < f.frames:
+            block = pre(f.read(8192), f.samplerate, reset=False)
+            block = stretch(block, f.samplerate, reset=False)
+            o.write(post(block, f.samplerate, reset=False))
+        o.write(post(stretch.flush(), f.samplerate, reset=False))
+"""
+
+import numpy as np
+
+from .stream import StretchStream
+
+
+class StretchPlugin:
+    """
+    TDHS time-stretch with the call signature of a Pedalboard plugin.
+
+    The TDHS contexts persist between calls made with ``reset=False``, so a
+    signal can be pushed through block by block; :meth:`flush` returns the
+    buffered tail. The first call of such a run fixes its layout and channel
+    count, so a short last block such as a ``(1, 2)`` stereo tail is still
+    read as stereo. A call with ``reset=True`` (the Pedalboard default) treats
+    the input as a complete signal and returns it fully stretched.
+    """
+
+    def __init__(
+        self,
+        ratio: float = 1.0,
+        upper_freq: int = 333,
+        lower_freq: int = 55,
+        double_range: bool = False,
+        fast_detection: bool = False,
+        linked_channels: bool = False,
+        unlinked_channels: bool = False,
+    ) -> None:
+        """
+        Configure the stretcher; contexts are created on the first call.
+
+        Args:
+            ratio: Stretch ratio (>1.0 = slower, <1.0 = faster)
+            upper_freq: Upper frequency limit for period detection (Hz)
+            lower_freq: Lower frequency limit for period detection (Hz)
+            double_range: Enable extended ratio range (0.25-4.0)
+            fast_detection: Use faster period detection algorithm
+            linked_channels: Share one context across layouts wider than stereo
+            unlinked_channels: One mono context per channel, each splicing
+                independently of the others
+        """
+        if ratio <= 0:
+            raise ValueError("Stretch ratio must be positive")
+        self.ratio = ratio
+        self.upper_freq = upper_freq
+        self.lower_freq = lower_freq
+        self.double_range = double_range
+        self.fast_detection = fast_detection
+        self.linked_channels = linked_channels
+        self.unlinked_channels = unlinked_channels
+        self._stream: StretchStream | None = None
+        self._frames_first = False
+        # Whether a reset=False run is in progress, with its layout fixed.
+        self._running = False
+
+    def process(
+        self,
+        input_array: np.ndarray,
+        sample_rate: float,
+        buffer_size: int = 8192,
+        reset: bool = True,
+    ) -> np.ndarray:
+        """
+        Stretch a buffer of audio.
+
+        Args:
+            input_array: Float audio as ``(channels, frames)``, ``(frames,
+                channels)`` or 1-D mono; like Pedalboard, the smaller
+                dimension is taken to be the channels, except within a
+                ``reset=False`` run, which keeps the layout of its first call
+            sample_rate: Sample rate of ``input_array`` in Hz
+            buffer_size: Frames handed to the TDHS contexts per native call
+            reset: Start from a clean state and flush at the end (one-shot)
+
+        Returns:
+            Stretched float32 audio in the same layout as ``input_array``.
+
+        Raises:
+            ValueError: If a ``reset=False`` call does not match the sample
+                rate or channel count of the run in progress
+        """
+        squeeze = input_array.ndim == 1
+        block = input_array.reshape(1, -1) if squeeze else input_array
+        if self._running and not reset:
+            frames_first = self._frames_first
+        else:
+            frames_first = block.shape[0] > block.shape[1]
+        if frames_first:
+            block = block.T
+
+        stream = self._get_stream(int(sample_rate), block.shape[0], reset)
+        self._frames_first = frames_first
+        self._running = not reset
+        outputs = [
+            stream.process(block[:, start : start + buffer_size])
+            for start in range(0, block.shape[1], buffer_size)
+        ]
+        if reset:
+            outputs.append(stream.flush())
+
+        if not outputs:
+            outputs.append(np.empty((block.shape[0], 0), dtype=np.float32))
+        return self._restore_layout(np.concatenate(outputs, axis=1), squeeze)
+
+    __call__ = process
+
+    def flush(self) -> np.ndarray:
+        """Return the stretched audio still buffered after ``reset=False`` calls."""
+        if self._stream is None:
+            return np.empty((1, 0), dtype=np.float32)
+        self._running = False
+        return self._restore_layout(self._stream.flush(), squeeze=False)
+
+    def reset(self) -> None:
+        """Clear any buffered audio and context state."""
+        self._running = False
+        if self._stream is not None:
+            self._stream.reset()
+
+    def close(self) -> None:
+        """Free the native contexts."""
+        self._running = False
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
+    def _get_stream(
+        self, samplerate: int, num_channels: int, reset: bool
+    ) -> StretchStream:
+        """Return a stream matching the input, recreating it between runs."""
+        stream = self._stream
+        if self._running and not reset and stream is not None:
+            # Never rebuild mid-run: that would drop the buffered TDHS tail.
+            if (samplerate, num_channels) != (stream.samplerate, stream.num_channels):
+                raise ValueError(
+                    f"Expected {stream.num_channels}-channel audio at "
+                    f"{stream.samplerate} Hz until flush() or reset(), got "
+                    f"{num_channels} channels at {samplerate} Hz"
+                )
+        elif (
+            stream is None
+            or stream.samplerate != samplerate
+            or stream.num_channels != num_channels
+        ):
+            self.close()
+            stream = StretchStream(
+                samplerate,
+                num_channels,
+                ratio=self.ratio,
+                upper_freq=self.upper_freq,
+                lower_freq=self.lower_freq,
+                double_range=self.double_range,
+                fast_detection=self.fast_detection,
+                linked_channels=self.linked_channels,
+                unlinked_channels=self.unlinked_channels,
+            )
+            self._stream = stream
+        elif reset:
+            stream.reset()
+        stream.ratio = self.ratio
+        return stream
+
+    def _restore_layout(self, output: np.ndarray, squeeze: bool) -> np.ndarray:
+        """Return ``output`` in the caller's original array layout."""
+        if squeeze:
+            return output[0]
+        return output.T if self._frames_first else output
@@ -0,0 +1,97 @@
+# this_file: src/audiostretchy/profile.py
+"""Host tuning profile written by ``audiostretchy calibrate``.
+
+The profile is a small JSON file in the user configuration directory (or at
+``$AUDIOSTRETCHY_PROFILE``). When present it supplies defaults that depend on
+the machine: the streaming block size, the thread count for channel groups,
+the batch worker count and the :mod:`audiostretchy.cost` constants. A profile
+measured on a different architecture or against a different build of the
+native library is ignored, so a home directory shared between a laptop and a
+Graviton node falls back to the built-in defaults instead of the wrong ones.
+"""
+
+import hashlib
+import json
+import os
+import platform
+from pathlib import Path
+from typing import Any
+
+from .c_interface import TDHSAudioStretch
+
+# Environment variable naming an explicit profile path.
+PROFILE_ENV = "AUDIOSTRETCHY_PROFILE"
+PROFILE_VERSION = 1
+
+# Parsed profiles by path, with the modification time and size they had.
+_cache: dict[Path, tuple[tuple[int, int], dict[str, Any]]] = {}
+# Filled once by host().
+_host: dict[str, str] = {}
+
+
+def profile_path() -> Path:
+    """Return where the tuning profile is read from and written to."""
+    explicit = os.environ.get(PROFILE_ENV)
+    if explicit:
+        return Path(explicit)
+    system = platform.system()
+    if system == "Windows":
+        base = Path(os.environ.get("APPDATA") or Path.home() / "AppData" / "Roaming")
+    elif system == "Darwin":
+        base = Path.home() / "Library" / "Application Support"
+    else:
+        base = Path(os.environ.get("XDG_CONFIG_HOME") or Path.home() / ".config")
+    return base / "audiostretchy" / "profile.json"
+
+
+def host() -> dict[str, str]:
+    """Identify the machine and library build a profile is valid for."""
+    if not _host:
+        digest = hashlib.sha256(TDHSAudioStretch.library_path().read_bytes())
+        _host.update(machine=platform.machine(), library=digest.hexdigest()[:12])
+    return dict(_host)
+
+
+def load_profile(path: str | Path | None = None) -> dict[str, Any]:
+    """
+    Return the tuning profile, or an empty dict if there is no usable one.
+
+    A profile that cannot be parsed, has another version or was measured on
+    another host counts as missing.
+    """
+    path = Path(path) if path is not None else profile_path()
+    try:
+        stat = path.stat()
+    except OSError:
+        return {}
+    version = (stat.st_mtime_ns, stat.st_size)
+    cached = _cache.get(path)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    try:
+        profile = json.loads(path.read_text())
+    except (OSError, ValueError):
+        profile = {}
+    if (
+        not isinstance(profile, dict)
+        or profile.get("version") != PROFILE_VERSION
+        or profile.get("host") != host()
+    ):
+        profile = {}
+    _cache[path] = (version, profile)
+    return profile
+
+
+def save_profile(profile: dict[str, Any], path: str | Path | None = None) -> Path:
+    """Write ``profile`` atomically; return the path written."""
+    target = Path(path) if path is not None else profile_path()
+    target.parent.mkdir(parents=True, exist_ok=True)
+    partial = target.with_name(f".{target.name}.partial")
+    partial.write_text(json.dumps(profile, indent=2) + "\n")
+    partial.replace(target)
+    return target
+
+
+def tuned(key: str, default: Any) -> Any:
+    """Return setting ``key`` of the host's profile, or ``default``."""
+    return load_profile().get(key, default)
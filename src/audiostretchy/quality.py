@@ -0,0 +1,143 @@
+# this_file: src/audiostretchy/quality.py
+"""Objective quality measures for comparing a stretch with its input.
+
+A good time-stretch keeps the pitch, hits the requested length, keeps the
+spectral balance and does not click at its splice points. Each of those has
+a number here, so a faster mode (``fast_detection``, a narrower period range,
+the preview tier) can be judged by how much it gives up:
+
+* :func:`f0_error_cents`: pitch drift between time-aligned voiced frames
+* :func:`duration_error`: relative miss of the requested length
+* :func:`spectral_distortion`: log-spectral distance of the long-term spectra
+* :func:`count_clicks`: sample-to-sample jumps far above their neighbourhood
+
+``scripts/benchmark_quality.py`` runs them over a corpus and option matrix.
+"""
+
+import numpy as np
+
+from .pitch import frame_periods
+from .stream import period_range
+
+# Analysis frame length and floor (relative to the peak band) of the spectra.
+SPECTRUM_FRAMES = 2048
+SPECTRUM_FLOOR_DB = -60.0
+# A jump counts as a click when it exceeds this multiple of the local RMS jump.
+CLICK_THRESHOLD = 8.0
+# Window of the local RMS jump, and the gap that separates two clicks, in s.
+CLICK_WINDOW = 0.005
+
+
+def _mono(samples: np.ndarray) -> np.ndarray:
+    """Downmix ``(channels, frames)`` or 1-D audio to a float64 vector."""
+    if samples.ndim == 2:
+        return samples.mean(axis=0, dtype=np.float64)
+    return samples.astype(np.float64)
+
+
+def f0_error_cents(
+    reference: np.ndarray,
+    stretched: np.ndarray,
+    samplerate: int,
+    ratio: float,
+    upper_freq: float = 500,
+    lower_freq: float = 50,
+) -> float:
+    """
+    Median absolute pitch difference between the input and the stretch.
+
+    Both signals are analysed at full resolution; each voiced input frame is
+    compared with the stretched frame nearest to its time times ``ratio``.
+
+    Args:
+        reference: Input audio, ``(channels, frames)`` or 1-D
+        stretched: Stretched audio in the same layout
+        samplerate: Sample rate of both in Hz
+        ratio: Stretch ratio that was applied
+        upper_freq: Highest fundamental considered (Hz)
+        lower_freq: Lowest fundamental considered (Hz)
+
+    Returns:
+        The error in cents, or NaN when no frame is voiced in both.
+    """
+    shortest, longest = period_range(samplerate, upper_freq, lower_freq)
+    tracks = [
+        frame_periods(
+            _mono(signal),
+            samplerate,
+            shortest,
+            longest,
+            max_frames=None,
+            analysis_rate=samplerate,
+        )
+        for signal in (reference, stretched)
+    ]
+    (ref_centers, ref_periods), (out_centers, out_periods) = tracks
+    if not len(ref_centers) or not len(out_centers):
+        return float("nan")
+
+    nearest = np.searchsorted(out_centers, ref_centers * ratio)
+    nearest = np.clip(nearest, 0, len(out_centers) - 1)
+    matched = out_periods[nearest]
+    voiced = (ref_periods > 0) & (matched > 0)
+    if not voiced.any():
+        return float("nan")
+    cents = 1200 * np.abs(np.log2(ref_periods[voiced] / matched[voiced]))
+    return float(np.median(cents))
+
+
+def duration_error(input_frames: int, output_frames: int, ratio: float) -> float:
+    """Relative difference of the output length from ``input_frames * ratio``."""
+    return output_frames / (input_frames * ratio) - 1.0
+
+
+def spectral_distortion(
+    reference: np.ndarray, stretched: np.ndarray, samplerate: int
+) -> float:
+    """
+    Log-spectral distance between the long-term spectra of two signals.
+
+    Both spectra are averaged over Hann-windowed frames and normalized to the
+    same total power, so a level change does not count; bins more than
+    :data:`SPECTRUM_FLOOR_DB` below the reference's loudest are ignored.
+
+    Returns:
+        The RMS difference in dB.
+    """
+    spectra = []
+    for signal in (reference, stretched):
+        mono = _mono(signal)
+        num_frames = len(mono) // SPECTRUM_FRAMES
+        if num_frames == 0:
+            return float("nan")
+        frames = mono[: num_frames * SPECTRUM_FRAMES].reshape(num_frames, -1)
+        power = np.abs(np.fft.rfft(frames * np.hanning(SPECTRUM_FRAMES))) ** 2
+        power = power.mean(axis=0)
+        spectra.append(power / max(power.sum(), np.finfo(float).tiny))
+
+    reference_db, stretched_db = (
+        10 * np.log10(np.maximum(power, np.finfo(float).tiny)) for power in spectra
+    )
+    audible = reference_db >= reference_db.max() + SPECTRUM_FLOOR_DB
+    return float(np.sqrt(np.mean((reference_db - stretched_db)[audible] ** 2)))
+
+
+def count_clicks(samples: np.ndarray, samplerate: int) -> int:
+    """
+    Count discontinuities: jumps far larger than the jumps around them.
+
+    A jump is the difference between consecutive samples; it is a click when
+    it exceeds :data:`CLICK_THRESHOLD` times the RMS jump of the surrounding
+    :data:`CLICK_WINDOW`. Jumps closer together than that window count once.
+    """
+    jumps = np.abs(np.diff(_mono(samples)))
+    width = max(3, int(CLICK_WINDOW * samplerate))
+    if len(jumps) < width:
+        return 0
+    local = np.sqrt(np.convolve(jumps**2, np.ones(width) / width, mode="same"))
+    # Ignore digital silence and the tiniest signals.
+    floor = 1e-4
+    clicks = np.flatnonzero((jumps > CLICK_THRESHOLD * local) & (jumps > floor))
+    if not len(clicks):
+        return 0
+    return int(1 + np.count_nonzero(np.diff(clicks) > width))
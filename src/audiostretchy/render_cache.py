@@ -0,0 +1,333 @@
+# this_file: src/audiostretchy/render_cache.py
+"""Re-render only the edited parts of a long stretch.
+
+An editor that changes the ratio of one paragraph of a two-hour narration
+should not have to stretch the other two hours again. :class:`RenderCache`
+cuts the source once into segments of roughly ``segment_seconds``, each
+boundary placed at the quietest point near its target, and stores every
+stretched segment on disk under a hash of the source file, the segment's
+bounds, the stretch parameters and the part of the ratio map that covers it.
+A render after an edit finds every untouched segment in the cache, stretches
+only the segments the edit reaches, and splices the pieces back together:
+
+    cache = RenderCache("narration.wav", "renders/")
+    cache.write(1.1, "narration-1.1.wav")
+    # Paragraph at 12:00-12:40 a little slower; everything else is reused.
+    cache.write([(0, 1.1), (720, 1.2), (760, 1.1)], "narration-edit.wav")
+
+Each segment is stretched with a margin of input on both sides. The leading
+margin warms the TDHS context and is dropped; the trailing one overlaps the
+start of the next segment and is cross-faded into it, so the seams (already in
+quiet passages) do not click.
+"""
+
+import hashlib
+import io
+import itertools
+import json
+from collections.abc import Iterator, Sequence
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from pedalboard.io import ReadableAudioFile, WriteableAudioFile
+
+from . import metrics
+from .profile import host
+from .stream import StretchStream, period_range
+
+# Bumped whenever a change alters rendered segments, invalidating the cache.
+RENDER_VERSION = 1
+# Length of the energy frames segment boundaries are chosen from, in seconds.
+ENERGY_SECONDS = 0.01
+# Boundaries are searched this fraction of segment_seconds around the target.
+CUT_SEARCH = 0.25
+# Frames hashed or decoded per read.
+READ_FRAMES = 1 << 20
+
+
+class RenderCache:
+    """
+    Segment-level render cache for one source file.
+
+    ``ratios`` arguments are either one ratio or a ratio map: a list of
+    ``(start_seconds, ratio)`` pairs, in order and starting at 0, each ratio
+    applying until the next pair.
+    """
+
+    def __init__(
+        self,
+        input_path: str | Path,
+        cache_dir: str | Path,
+        segment_seconds: float = 20.0,
+        margin_ms: float = 25.0,
+        upper_freq: int = 333,
+        lower_freq: int = 55,
+        double_range: bool = False,
+        fast_detection: bool = False,
+        linked_channels: bool = False,
+        unlinked_channels: bool = False,
+    ) -> None:
+        """
+        Hash the source and find (or load) its segment boundaries.
+
+        Args:
+            input_path: Source audio file
+            cache_dir: Directory holding the rendered segments
+            segment_seconds: Target segment length; shorter segments make
+                edits cheaper, longer ones make full renders cheaper
+            margin_ms: Input rendered beyond each side of a segment; the
+                trailing part is cross-faded with the next segment. At least
+                one longest period is always used.
+            upper_freq: Upper frequency limit for period detection (Hz)
+            lower_freq: Lower frequency limit for period detection (Hz)
+            double_range: Enable extended ratio range (0.25-4.0)
+            fast_detection: Use faster period detection algorithm
+            linked_channels: Share one TDHS context across all channels of
+                layouts wider than stereo
+            unlinked_channels: Stretch each channel of every segment as its
+                own mono track
+
+        Raises:
+            ValueError: If the parameters are invalid
+            IOError: If the source cannot be read
+        """
+        if segment_seconds <= 0 or margin_ms < 0:
+            raise ValueError("segment_seconds must be positive, margin_ms not negative")
+        self.input_path = Path(input_path)
+        self.cache_dir = Path(cache_dir)
+        self.segment_seconds = segment_seconds
+        self.params: dict[str, Any] = {
+            "upper_freq": upper_freq,
+            "lower_freq": lower_freq,
+            "double_range": double_range,
+            "fast_detection": fast_detection,
+            "linked_channels": linked_channels,
+            "unlinked_channels": unlinked_channels,
+        }
+        with self._open() as source:
+            self.samplerate = int(source.samplerate)
+            self.num_channels = source.num_channels
+            self.num_frames = source.frames
+            self.digest = self._hash_source()
+            self.segments = self._load_segments(source)
+        longest = period_range(self.samplerate, upper_freq, lower_freq)[1]
+        self.margin = max(round(margin_ms / 1000 * self.samplerate), longest)
+
+    def render(
+        self,
+        ratios: float | Sequence[tuple[float, float]],
+        start: float = 0.0,
+        end: float | None = None,
+    ) -> np.ndarray:
+        """
+        Return the stretched segments overlapping ``[start, end)`` of the input.
+
+        Whole segments are returned, so the audio usually begins a little
+        before ``start`` and ends a little after ``end``; with the defaults
+        it is the whole stretched file.
+
+        Returns:
+            Stretched float32 audio as ``(channels, frames)``.
+        """
+        first = round(start * self.samplerate)
+        last = self.num_frames if end is None else round(end * self.samplerate)
+        indices = [
+            index
+            for index, (lo, hi) in enumerate(self.segments)
+            if lo < last and hi > first
+        ]
+        bodies = list(self._splice(self._ratio_map(ratios), indices))
+        if not bodies:
+            return np.zeros((self.num_channels, 0), np.float32)
+        return np.concatenate(bodies, axis=1)
+
+    def write(
+        self, ratios: float | Sequence[tuple[float, float]], output_path: str | Path
+    ) -> None:
+        """Stretch the whole file and write it, one segment at a time."""
+        ratio_map = self._ratio_map(ratios)
+        try:
+            out = WriteableAudioFile(
+                str(output_path),
+                samplerate=self.samplerate,
+                num_channels=self.num_channels,
+            )
+        except Exception as e:
+            raise OSError(f"Could not write {output_path}: {e}") from e
+        with out:
+            for body in self._splice(ratio_map, range(len(self.segments))):
+                with metrics.timed("encode"):
+                    out.write(body)
+
+    def _open(self) -> ReadableAudioFile:
+        """Open the source, reporting failures as :class:`OSError`."""
+        try:
+            return ReadableAudioFile(str(self.input_path))
+        except Exception as e:
+            raise OSError(f"Could not open audio file {self.input_path}: {e}") from e
+
+    def _hash_source(self) -> str:
+        """SHA-256 of the source file's bytes."""
+        digest = hashlib.sha256()
+        with self.input_path.open("rb") as f:
+            while chunk := f.read(READ_FRAMES):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _key(self, payload: object) -> str:
+        """Hash ``payload`` together with everything that shapes a render."""
+        return hashlib.sha256(
+            json.dumps(
+                {
+                    "version": RENDER_VERSION,
+                    "source": self.digest,
+                    "library": host()["library"],
+                    "params": self.params,
+                    "payload": payload,
+                },
+                sort_keys=True,
+            ).encode()
+        ).hexdigest()
+
+    def _load_segments(self, source: ReadableAudioFile) -> list[tuple[int, int]]:
+        """Segment bounds in frames, from the cache or :meth:`_find_segments`."""
+        path = self.cache_dir / f"{self._key(self.segment_seconds)}.json"
+        try:
+            return [(int(lo), int(hi)) for lo, hi in json.loads(path.read_text())]
+        except (OSError, ValueError):
+            pass
+        segments = self._find_segments(source)
+        _replace(path, json.dumps(segments).encode())
+        return segments
+
+    def _find_segments(self, source: ReadableAudioFile) -> list[tuple[int, int]]:
+        """Cut the source near every ``segment_seconds`` at its quietest frame."""
+        hop = max(1, round(ENERGY_SECONDS * self.samplerate))
+        energy = []
+        while True:
+            with metrics.timed("decode"):
+                block = source.read(READ_FRAMES // hop * hop)
+            if block.shape[1] == 0:
+                break
+            frames = block.shape[1] // hop
+            squares = np.square(block[:, : frames * hop], dtype=np.float64)
+            energy.append(squares.reshape(-1, frames, hop).mean(axis=(0, 2)))
+        levels = np.concatenate(energy) if energy else np.zeros(0)
+
+        length = max(1, round(self.segment_seconds / ENERGY_SECONDS))
+        search = round(length * CUT_SEARCH)
+        cuts = [0]
+        while cuts[-1] + length + search < len(levels):
+            target = cuts[-1] + length
+            window = levels[target - search : target + search + 1]
+            cuts.append(target - search + int(np.argmin(window)))
+        bounds = [0, *(cut * hop + hop // 2 for cut in cuts[1:]), self.num_frames]
+        return list(itertools.pairwise(bounds))
+
+    def _ratio_map(
+        self, ratios: float | Sequence[tuple[float, float]]
+    ) -> list[tuple[int, float]]:
+        """Validate ``ratios`` as ``(start_frame, ratio)`` breakpoints."""
+        if isinstance(ratios, int | float):
+            ratios = [(0.0, float(ratios))]
+        breakpoints = [
+            (round(start * self.samplerate), float(ratio)) for start, ratio in ratios
+        ]
+        if not breakpoints or breakpoints[0][0] != 0:
+            raise ValueError("The ratio map must start at 0 seconds")
+        if any(b[0] <= a[0] for a, b in itertools.pairwise(breakpoints)):
+            raise ValueError("The ratio map must be in increasing order of time")
+        if any(ratio <= 0 for _, ratio in breakpoints):
+            raise ValueError("Stretch ratios must be positive")
+        return breakpoints
+
+    def _splice(
+        self, ratio_map: list[tuple[int, float]], indices: Sequence[int]
+    ) -> Iterator[np.ndarray]:
+        """Yield the segments' audio with each trailing margin cross-faded."""
+        carry = None
+        with self._open() as source:
+            for index in indices:
+                piece, body = self._segment(source, ratio_map, index)
+                if carry is not None:
+                    frames = min(carry.shape[1], piece.shape[1])
+                    fade = np.linspace(0.0, 1.0, frames, dtype=np.float32)
+                    piece = piece.copy()
+                    piece[:, :frames] = (
+                        carry[:, :frames] * (1 - fade) + piece[:, :frames] * fade
+                    )
+                carry = piece[:, body:]
+                yield piece[:, :body]
+
+    def _segment(
+        self,
+        source: ReadableAudioFile,
+        ratio_map: list[tuple[int, float]],
+        index: int,
+    ) -> tuple[np.ndarray, int]:
+        """
+        Load or render one segment with its trailing margin.
+
+        Returns:
+            The stretched audio and how many of its frames precede the
+            trailing margin.
+        """
+        start, stop = self.segments[index]
+        lo = max(0, start - self.margin)
+        hi = min(self.num_frames, stop + self.margin)
+        # The ratio map clipped to [lo, hi), relative to lo.
+        spans = []
+        for (at, ratio), (until, _) in itertools.pairwise(
+            [*ratio_map, (self.num_frames, 0.0)]
+        ):
+            if at < hi and until > lo:
+                spans.append((max(at, lo) - lo, min(until, hi) - lo, ratio))
+        # Body lengths follow the ratio map exactly, so seams do not drift.
+        body = round(_stretched(ratio_map, stop)) - round(_stretched(ratio_map, start))
+
+        path = self.cache_dir / f"{self._key([lo, start, stop, hi, spans])}.npy"
+        try:
+            piece = np.load(path)
+        except (OSError, ValueError):
+            piece = None
+        if piece is not None and piece.shape[0] == self.num_channels:
+            metrics.count("render_cache_hits_total")
+            return piece, min(body, piece.shape[1])
+
+        metrics.count("render_cache_misses_total")
+        source.seek(lo)
+        with metrics.timed("decode"):
+            audio = source.read(hi - lo)
+        with StretchStream(
+            self.samplerate, self.num_channels, ratio=spans[0][2], **self.params
+        ) as stream:
+            pieces = []
+            for begin, end, ratio in spans:
+                stream.ratio = ratio
+                pieces.append(stream.process(audio[:, begin:end]))
+            pieces.append(stream.flush())
+        # Drop the stretched leading margin.
+        margin = round(_stretched(ratio_map, start) - _stretched(ratio_map, lo))
+        piece = np.concatenate(pieces, axis=1)[:, margin:]
+        piece = np.ascontiguousarray(piece, dtype=np.float32)
+        buffer = io.BytesIO()
+        np.save(buffer, piece)
+        _replace(path, buffer.getvalue())
+        return piece, min(body, piece.shape[1])
+
+
+def _stretched(ratio_map: list[tuple[int, float]], frame: int) -> float:
+    """Output position of input ``frame`` under ``ratio_map``."""
+    position = 0.0
+    for (at, ratio), (until, _) in itertools.pairwise([*ratio_map, (frame, 0.0)]):
+        position += (min(until, frame) - at) * ratio if at < frame else 0.0
+    return position
+
+
+def _replace(path: Path, data: bytes) -> None:
+    """Write ``data`` to ``path`` atomically."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_name(f".{path.name}.partial")
+    partial.write_bytes(data)
+    partial.replace(path)
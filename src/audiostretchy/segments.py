@@ -0,0 +1,170 @@
+# this_file: src/audiostretchy/segments.py
+"""Write audio as fixed-length segment files indexed by an HLS playlist.
+
+A long stretch written to one file cannot be played until the encoder closes
+it. :class:`SegmentedAudioFile` takes the same ``write()`` calls as a
+``WriteableAudioFile`` but cuts the audio into segments of a fixed duration,
+each finished, renamed into place and added to an HLS media playlist
+(``.m3u8``) as soon as it is full. A client polling the playlist can start
+after the first segment while the rest is still being stretched;
+``#EXT-X-ENDLIST`` marks the end once the writer is closed.
+"""
+
+import math
+from pathlib import Path
+from typing import BinaryIO
+
+import numpy as np
+from pedalboard.io import WriteableAudioFile
+
+# Segment format when none is given; the packed-audio format HLS players take.
+DEFAULT_SEGMENT_FORMAT = "mp3"
+
+
+class SegmentedAudioFile:
+    """
+    Audio writer producing ``<stem>_00000.<format>``, ... and a playlist.
+
+    Segments and the playlist are written under a temporary name and renamed,
+    so a web server never serves a partial file. Lossless formats join back
+    sample-exactly; lossy codecs add their encoder delay to every segment.
+    """
+
+    def __init__(
+        self,
+        playlist: str | Path,
+        samplerate: int,
+        num_channels: int,
+        segment_seconds: float = 6.0,
+        format: str | None = None,
+        bit_depth: int = 16,
+        quality: str | float | None = None,
+    ) -> None:
+        """
+        Prepare a segmented output; nothing is written before the first frames.
+
+        Args:
+            playlist: Path of the ``.m3u8`` playlist; segments go next to it
+            samplerate: Sample rate of the audio in Hz
+            num_channels: Number of channels in each block
+            segment_seconds: Duration of every segment but the last
+            format: Segment format (default: :data:`DEFAULT_SEGMENT_FORMAT`)
+            bit_depth: Sample bit depth for formats that have one
+            quality: Codec quality, e.g. ``"128k"`` for MP3
+
+        Raises:
+            ValueError: If ``segment_seconds`` is not positive
+        """
+        if segment_seconds <= 0:
+            raise ValueError("segment_seconds must be positive")
+        self.playlist = Path(playlist)
+        self.samplerate = samplerate
+        self.num_channels = num_channels
+        self.segment_seconds = segment_seconds
+        self.format = format or DEFAULT_SEGMENT_FORMAT
+        self.bit_depth = bit_depth
+        self.quality = quality
+        self.segment_frames = max(1, round(segment_seconds * samplerate))
+        # (file name, seconds) of every finished segment.
+        self.segments: list[tuple[str, float]] = []
+        # The segment being written: its open file and encoder.
+        self._current: tuple[BinaryIO, WriteableAudioFile] | None = None
+        self._frames = 0
+        self._closed = False
+
+    def write(self, samples: np.ndarray) -> None:
+        """Append ``(channels, frames)`` audio, finishing segments as they fill."""
+        position = 0
+        while position < samples.shape[1]:
+            if self._current is None:
+                self._current = self._open_segment()
+            take = min(samples.shape[1] - position, self.segment_frames - self._frames)
+            self._current[1].write(samples[:, position : position + take])
+            self._frames += take
+            position += take
+            if self._frames == self.segment_frames:
+                self._finish_segment()
+
+    def close(self) -> None:
+        """Finish the last segment and mark the playlist complete."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._current is not None:
+            self._finish_segment()
+        self._write_playlist(complete=True)
+
+    def __enter__(self) -> "SegmentedAudioFile":
+        """Return the writer for use as a context manager."""
+        return self
+
+    def __exit__(self, exc_type: type | None, *exc_info: object) -> None:
+        """Close the writer; on error, drop the unfinished segment instead."""
+        if exc_type is None:
+            self.close()
+            return
+        self._closed = True
+        if self._current is not None:
+            self._close_current()
+            self._partial().unlink(missing_ok=True)
+
+    def _name(self) -> str:
+        """File name of the segment being written."""
+        return f"{self.playlist.stem}_{len(self.segments):05d}.{self.format}"
+
+    def _partial(self) -> Path:
+        """Temporary path of the segment being written."""
+        return self.playlist.with_name(f".{self._name()}.partial")
+
+    def _open_segment(self) -> tuple[BinaryIO, WriteableAudioFile]:
+        """Start the next segment file."""
+        self.playlist.parent.mkdir(parents=True, exist_ok=True)
+        self._frames = 0
+        file = self._partial().open("wb")
+        try:
+            writer = WriteableAudioFile(
+                file,
+                samplerate=self.samplerate,
+                num_channels=self.num_channels,
+                bit_depth=self.bit_depth,
+                quality=self.quality,
+                format=self.format,
+            )
+        except Exception:
+            file.close()
+            raise
+        return file, writer
+
+    def _close_current(self) -> None:
+        """Close the encoder and file of the segment being written."""
+        if self._current is not None:
+            file, writer = self._current
+            self._current = None
+            writer.close()
+            file.close()
+
+    def _finish_segment(self) -> None:
+        """Close the current segment, move it into place and list it."""
+        self._close_current()
+        name = self._name()
+        self._partial().replace(self.playlist.with_name(name))
+        self.segments.append((name, self._frames / self.samplerate))
+        self._write_playlist(complete=False)
+
+    def _write_playlist(self, complete: bool) -> None:
+        """Rewrite the playlist atomically with the segments finished so far."""
+        lines = [
+            "#EXTM3U",
+            "#EXT-X-VERSION:3",
+            f"#EXT-X-TARGETDURATION:{math.ceil(self.segment_seconds)}",
+            "#EXT-X-MEDIA-SEQUENCE:0",
+            "#EXT-X-PLAYLIST-TYPE:EVENT",
+        ]
+        for name, seconds in self.segments:
+            lines += [f"#EXTINF:{seconds:.3f},", name]
+        if complete:
+            lines.append("#EXT-X-ENDLIST")
+        self.playlist.parent.mkdir(parents=True, exist_ok=True)
+        partial = self.playlist.with_name(f".{self.playlist.name}.partial")
+        partial.write_text("\n".join(lines) + "\n")
+        partial.replace(self.playlist)
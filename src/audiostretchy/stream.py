@@ -0,0 +1,361 @@
+# this_file: src/audiostretchy/stream.py
+"""Block-wise TDHS stretching with state kept between calls.
+
+:class:`AudioStretch` stretches a whole decoded signal in one go. The
+:class:`StretchStream` here does the same work one block at a time: it owns the
+TDHS contexts (one per channel group) and the conversion buffers, accepts
+Pedalboard-style ``(channels, frames)`` float blocks and returns whatever
+stretched audio the contexts have produced so far. Call :meth:`flush` after the
+last block to drain the tail.
+
+Runs of flat input (digital silence, or any signal that does not move by more
+than half an int16 step) are not sent to the library: once a run is two
+longest periods long the contexts are drained, and the stretched length of the
+run is written out directly as the held value. Fresh contexts take over when
+the signal moves again, just as at the start of a stream.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from . import metrics, profile
+from .c_interface import TDHSAudioStretch
+from .convert import (
+    INT16_SCALE,
+    ScratchBuffer,
+    deinterleave_from_int16,
+    interleave_to_int16,
+)
+
+# Blocks whose every channel stays within this peak-to-peak range convert to a
+# constant int16 signal, which TDHS can only stretch into the same constant.
+FLAT_LEVEL = 0.5 / INT16_SCALE
+# Longest periods of flat input after which the contexts are bypassed.
+FLAT_PERIODS = 2
+
+
+def channel_groups(
+    num_channels: int, linked: bool, unlinked: bool = False
+) -> list[slice]:
+    """
+    Split channels into the groups that share one TDHS context.
+
+    Mono and stereo use a single context by default. Wider layouts (5.1,
+    ambisonics, ...) are split into adjacent pairs, e.g. L/R, C/LFE, Ls/Rs,
+    unless ``linked`` asks for one context spanning every channel, which keeps
+    a single period estimate and splice timeline for the whole layout.
+    ``unlinked`` instead gives every channel its own mono context, for tracks
+    that have nothing in common (two-track interviews, dual-language audio);
+    each channel is then spliced on its own timeline.
+
+    Raises:
+        ValueError: If both ``linked`` and ``unlinked`` are set
+    """
+    if linked and unlinked:
+        raise ValueError("linked_channels and unlinked_channels are exclusive")
+    if unlinked:
+        return [slice(channel, channel + 1) for channel in range(num_channels)]
+    if linked or num_channels <= 2:
+        return [slice(0, num_channels)]
+    return [
+        slice(start, min(start + 2, num_channels))
+        for start in range(0, num_channels, 2)
+    ]
+
+
+def period_range(
+    samplerate: int, upper_freq: float, lower_freq: float
+) -> tuple[int, int]:
+    """Return the ``(shortest, longest)`` TDHS period in samples."""
+    return max(1, int(samplerate / upper_freq)), int(samplerate / lower_freq)
+
+
+def tdhs_flags(ratio: float, double_range: bool, fast_detection: bool) -> int:
+    """Return the TDHS flags for the given ratio and detection options."""
+    flags = 0
+    if fast_detection:
+        flags |= TDHSAudioStretch.STRETCH_FAST_FLAG
+    if double_range or ratio < 0.5 or ratio > 2.0:
+        flags |= TDHSAudioStretch.STRETCH_DUAL_FLAG
+    return flags
+
+
+class StretchStream:
+    """
+    Streaming TDHS time-stretcher.
+
+    Feed ``(channels, frames)`` float blocks to :meth:`process` in order; each
+    call returns the stretched float32 frames that are ready. The output lags
+    the input by a few pitch periods, which :meth:`flush` releases at the end.
+    """
+
+    def __init__(
+        self,
+        samplerate: int,
+        num_channels: int,
+        ratio: float = 1.0,
+        upper_freq: float = 333,
+        lower_freq: float = 55,
+        double_range: bool = False,
+        fast_detection: bool = False,
+        linked_channels: bool = False,
+        unlinked_channels: bool = False,
+        skip_flat: bool = True,
+    ) -> None:
+        """
+        Create the TDHS contexts for a stream.
+
+        Args:
+            samplerate: Sample rate of the incoming audio in Hz
+            num_channels: Number of channels in each block
+            ratio: Stretch ratio (>1.0 = slower, <1.0 = faster)
+            upper_freq: Upper frequency limit for period detection (Hz)
+            lower_freq: Lower frequency limit for period detection (Hz)
+            double_range: Enable extended ratio range (0.25-4.0)
+            fast_detection: Use faster period detection algorithm
+            linked_channels: Share one context across layouts wider than stereo
+            unlinked_channels: One mono context per channel; a block's
+                contexts are fed on a thread pool
+            skip_flat: Write runs of silent or constant input directly instead
+                of stretching them
+
+        Raises:
+            ValueError: If the ratio is not positive
+            RuntimeError: If a TDHS context cannot be created
+        """
+        if ratio <= 0:
+            raise ValueError("Stretch ratio must be positive")
+
+        self.samplerate = samplerate
+        self.num_channels = num_channels
+        self.shortest_period, self.longest_period = period_range(
+            samplerate, upper_freq, lower_freq
+        )
+        self._flags = tdhs_flags(ratio, double_range, fast_detection)
+        self._ratio = ratio
+        self._skip_flat = skip_flat
+        # Stretched frames owed for the input so far, and frames returned.
+        self._target = 0.0
+        self._emitted = 0
+        # Flat frames just fed to the contexts, and the value held by a run
+        # that bypasses them (None while the contexts are in use).
+        self._flat_run = 0
+        self._held: np.ndarray | None = None
+
+        self._groups = channel_groups(num_channels, linked_channels, unlinked_channels)
+        self._stretchers: list[TDHSAudioStretch] = []
+        self._open_contexts()
+
+        self._input_scratch = [ScratchBuffer(np.int16) for _ in self._groups]
+        self._output_scratch = [ScratchBuffer(np.int16) for _ in self._groups]
+        # Frames produced by one group but not yet matched by the others.
+        self._pending = [
+            np.empty((group.stop - group.start, 0), dtype=np.float32)
+            for group in self._groups
+        ]
+        self._pool = (
+            ThreadPoolExecutor(
+                max_workers=min(
+                    len(self._groups), profile.tuned("threads", len(self._groups))
+                )
+            )
+            if len(self._groups) > 1
+            else None
+        )
+
+    @property
+    def ratio(self) -> float:
+        """Stretch ratio applied to subsequent blocks."""
+        return self._ratio
+
+    @ratio.setter
+    def ratio(self, ratio: float) -> None:
+        if ratio <= 0:
+            raise ValueError("Stretch ratio must be positive")
+        dual = self._flags & TDHSAudioStretch.STRETCH_DUAL_FLAG
+        if not dual and (ratio < 0.5 or ratio > 2.0):
+            raise ValueError(
+                "Ratios outside 0.5-2.0 need a stream created with double_range=True"
+            )
+        self._ratio = ratio
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """
+        Stretch the next block of audio.
+
+        Args:
+            block: Float audio as ``(channels, frames)``
+
+        Returns:
+            Stretched float32 audio as ``(channels, frames)``; may be empty
+            while the contexts fill up.
+
+        Raises:
+            ValueError: If the block's channel count does not match the stream
+        """
+        if block.ndim != 2 or block.shape[0] != self.num_channels:
+            raise ValueError(
+                f"Expected a ({self.num_channels}, frames) block, got {block.shape}"
+            )
+        num_frames = block.shape[1]
+        flat = self._skip_flat and num_frames > 0 and self._is_flat(block)
+        self._target += num_frames * self._ratio
+
+        if self._held is not None:
+            if flat:
+                self._held = block[:, -1:].copy()
+                return self._catch_up(self._held)
+            # The signal moves again: start over like a new stream.
+            self._held = None
+            self._open_contexts()
+
+        bypass_at = FLAT_PERIODS * self.longest_period
+        if flat and num_frames >= bypass_at:
+            # Long enough on its own; the contexts never need to see it.
+            output = self._drain_into_flat(block)
+        else:
+            output = self._run(lambda index: self._process_group(index, block))
+            self._emitted += output.shape[1]
+            self._flat_run = self._flat_run + num_frames if flat else 0
+            if self._flat_run >= bypass_at:
+                output = np.concatenate([output, self._drain_into_flat(block)], axis=1)
+        return output
+
+    def flush(self) -> np.ndarray:
+        """
+        Drain the audio still buffered in the contexts and reset them.
+
+        Returns:
+            The remaining stretched float32 audio as ``(channels, frames)``.
+        """
+        if self._held is not None:
+            output = self._catch_up(self._held)
+        else:
+            output = self._run(self._flush_group, final=True)
+        self.reset()
+        return output
+
+    def reset(self) -> None:
+        """
+        Discard buffered audio and return every context to its initial state.
+
+        The contexts are recreated rather than passed through
+        ``stretch_reset()``: the library's reset keeps a little analysis
+        history, so a reset context can splice a few frames differently from
+        a fresh one. Recreating them costs about 0.1 ms and makes the output
+        after ``reset()`` identical to that of a new stream.
+        """
+        self._open_contexts()
+        self._pending = [pending[:, :0] for pending in self._pending]
+        self._target = 0.0
+        self._emitted = self._flat_run = 0
+        self._held = None
+
+    def close(self) -> None:
+        """Free the native contexts and worker threads."""
+        for stretcher in self._stretchers:
+            stretcher.deinit()
+        self._stretchers = []
+        pool = getattr(self, "_pool", None)
+        if pool is not None:
+            pool.shutdown()
+            self._pool = None
+
+    def __enter__(self) -> "StretchStream":
+        """Return the stream for use as a context manager."""
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Close the stream when leaving the ``with`` block."""
+        self.close()
+
+    def _open_contexts(self) -> None:
+        """(Re)create one native context per channel group."""
+        for stretcher in self._stretchers:
+            stretcher.deinit()
+        self._stretchers = []
+        try:
+            for group in self._groups:
+                self._stretchers.append(
+                    TDHSAudioStretch(
+                        self.shortest_period,
+                        self.longest_period,
+                        group.stop - group.start,
+                        self._flags,
+                    )
+                )
+        except Exception:
+            self.close()
+            raise
+
+    @staticmethod
+    def _is_flat(block: np.ndarray) -> bool:
+        """Whether every channel of ``block`` stays within :data:`FLAT_LEVEL`."""
+        return bool(np.all(block.max(axis=1) - block.min(axis=1) <= FLAT_LEVEL))
+
+    def _drain_into_flat(self, block: np.ndarray) -> np.ndarray:
+        """Flush the contexts and start holding the last value of ``block``."""
+        tail = self._run(self._flush_group, final=True)
+        self._emitted += tail.shape[1]
+        self._flat_run = 0
+        self._held = block[:, -1:].copy()
+        return np.concatenate([tail, self._catch_up(self._held)], axis=1)
+
+    def _catch_up(self, held: np.ndarray) -> np.ndarray:
+        """Repeat ``held`` until the output matches the stretched input."""
+        num_frames = max(0, round(self._target) - self._emitted)
+        self._emitted += num_frames
+        return np.repeat(held.astype(np.float32), num_frames, axis=1)
+
+    def _run(self, work, final: bool = False) -> np.ndarray:
+        """Run ``work(index)`` for every group and align their outputs."""
+        if self._pool is None:
+            return work(0)
+
+        outputs = list(self._pool.map(metrics.bound(work), range(len(self._groups))))
+        pending = [
+            np.concatenate([held, fresh], axis=1)
+            for held, fresh in zip(self._pending, outputs, strict=True)
+        ]
+        # Independent contexts produce slightly different frame counts; emit
+        # only what every group has, and drop the ragged tail on flush.
+        ready = min(group.shape[1] for group in pending)
+        self._pending = [
+            group[:, :0] if final else group[:, ready:] for group in pending
+        ]
+        return np.concatenate([group[:, :ready] for group in pending], axis=0)
+
+    def _process_group(self, index: int, block: np.ndarray) -> np.ndarray:
+        """Stretch one channel group's slice of ``block``."""
+        stretcher = self._stretchers[index]
+        samples = block[self._groups[index]]
+        num_channels, num_frames = samples.shape
+
+        interleaved = self._input_scratch[index].get(num_channels * num_frames)
+        with metrics.timed("convert"):
+            interleave_to_int16(samples, out=interleaved)
+
+        capacity = stretcher.output_capacity(num_frames, self._ratio)
+        output = self._output_scratch[index].get(capacity * num_channels)
+        produced = stretcher.process_samples(
+            interleaved, num_frames, output, self._ratio
+        )
+        return self._to_float(output[: produced * num_channels], num_channels)
+
+    def _flush_group(self, index: int) -> np.ndarray:
+        """Drain one channel group's context."""
+        stretcher = self._stretchers[index]
+        num_channels = self._groups[index].stop - self._groups[index].start
+
+        # The flush tail fits in the capacity of an empty block at 4x.
+        capacity = stretcher.output_capacity(0, 4.0)
+        output = self._output_scratch[index].get(capacity * num_channels)
+        produced = stretcher.flush(output)
+        return self._to_float(output[: produced * num_channels], num_channels)
+
+    @staticmethod
+    def _to_float(interleaved: np.ndarray, num_channels: int) -> np.ndarray:
+        """Convert interleaved int16 scratch output to a fresh float32 array."""
+        with metrics.timed("convert"):
+            return deinterleave_from_int16(interleaved, num_channels)
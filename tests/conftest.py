@@ -12,6 +12,17 @@ import numpy as np
 import pytest
 import soundfile as sf
 
+from audiostretchy import profile
+
+
+@pytest.fixture(autouse=True)
+def isolated_profile(tmp_path, monkeypatch):
+    """Keep the developer's tuning profile out of every test."""
+    path = tmp_path / "profile.json"
+    monkeypatch.setenv(profile.PROFILE_ENV, str(path))
+    monkeypatch.setattr(profile, "_cache", {})
+    return path
+
 
 @pytest.fixture(scope="session")
 def temp_audio_dir():
@@ -0,0 +1,100 @@
+# this_file: tests/test_analysis.py
+"""
+Tests for reusable period analysis and the analysis-driven stretch path.
+"""
+
+import io
+
+import numpy as np
+import pytest
+
+from audiostretchy.analysis import PeriodAnalysis, analyze, synthesize
+from audiostretchy.core import AudioStretch
+from audiostretchy.pitch import frame_periods
+
+
+def _voice_like(f0_start, f0_end, seconds=2.0, samplerate=44100, channels=1):
+    """Harmonic-rich tone whose fundamental glides from f0_start to f0_end."""
+    t = np.arange(int(seconds * samplerate)) / samplerate
+    f0 = np.linspace(f0_start, f0_end, len(t))
+    phase = 2 * np.pi * np.cumsum(f0) / samplerate
+    signal = sum(np.sin(k * phase) / k for k in range(1, 6))
+    return np.tile((0.3 * signal).astype(np.float32), (channels, 1))
+
+
+def _median_f0(samples, samplerate=44100):
+    _, periods = frame_periods(samples, samplerate, 132, 801)
+    return samplerate / np.median(periods[periods > 0])
+
+
+def test_analysis_tracks_period():
+    """The period track follows a constant fundamental sample-accurately."""
+    analysis = analyze(_voice_like(147, 147), 44100)
+    assert np.all(np.abs(analysis.periods - 44100 / 147) <= 1)
+
+
+@pytest.mark.parametrize("ratio", [0.5, 0.8, 1.25, 2.0])
+def test_synthesize_duration_and_pitch(ratio):
+    """One analysis renders any ratio with the right length and pitch."""
+    source = _voice_like(120, 120, channels=2)
+    analysis = analyze(source, 44100)
+
+    stretched = synthesize(source, analysis, ratio)
+
+    assert stretched.dtype == np.float32
+    assert stretched.shape[0] == 2
+    assert abs(stretched.shape[1] - source.shape[1] * ratio) < 2 * 44100 / 120
+    assert abs(_median_f0(stretched) - 120) < 120 * 0.03
+    # Cross-faded seams stay continuous.
+    assert np.abs(np.diff(stretched[0])).max() < 2 * np.abs(np.diff(source[0])).max()
+
+
+def test_sidecar_roundtrip(tmp_path):
+    """A sidecar reloads to the same track, from a path or a file object."""
+    analysis = analyze(_voice_like(100, 140), 44100)
+
+    path = tmp_path / "voice.tdhs"
+    analysis.save(path)
+    buffer = io.BytesIO()
+    analysis.save(file=buffer)
+    buffer.seek(0)
+
+    for loaded in (PeriodAnalysis.load(path), PeriodAnalysis.load(file=buffer)):
+        assert loaded.samplerate == analysis.samplerate
+        assert loaded.num_frames == analysis.num_frames
+        assert loaded.hop == analysis.hop
+        np.testing.assert_array_equal(loaded.periods, analysis.periods)
+
+
+def test_stretch_with_sidecar_path(tmp_path):
+    """stretch(analysis=...) accepts a sidecar path and skips the native pass."""
+    processor = AudioStretch()
+    processor.samples = _voice_like(100, 140)
+    path = tmp_path / "voice.tdhs"
+    processor.analyze().save(path)
+    source = processor.samples
+
+    processor.stretch(ratio=1.5, analysis=path)
+
+    assert abs(processor.samples.shape[1] - source.shape[1] * 1.5) < 44100 / 100
+    np.testing.assert_array_equal(
+        processor.samples, synthesize(source, PeriodAnalysis.load(path), 1.5)
+    )
+
+
+def test_stretch_rejects_mismatched_analysis():
+    """An analysis of different audio is refused rather than misapplied."""
+    processor = AudioStretch()
+    processor.samples = _voice_like(100, 140, seconds=1.0)
+    analysis = analyze(_voice_like(100, 140, seconds=2.0), 44100)
+
+    with pytest.raises(ValueError, match="Analysis is for"):
+        processor.stretch(ratio=1.2, analysis=analysis)
+
+
+def test_analyze_silence():
+    """Silence still yields a usable track."""
+    silence = np.zeros((1, 44100), dtype=np.float32)
+    analysis = analyze(silence, 44100)
+    assert analysis.periods.min() > 0
+    assert synthesize(silence, analysis, 1.5).shape[1] == pytest.approx(66150, abs=801)
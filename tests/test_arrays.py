@@ -0,0 +1,98 @@
+# this_file: tests/test_arrays.py
+"""
+Tests for the NumPy array API (stretch_array / required_output_frames).
+"""
+
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from audiostretchy import required_output_frames, stretch_array
+from audiostretchy.core import AudioStretch
+
+
+@pytest.fixture(scope="module")
+def stereo():
+    """Two seconds of a stereo harmonic tone as float32 (channels, frames)."""
+    t = np.arange(88200) / 44100
+    left = sum(np.sin(2 * np.pi * 140 * k * t) / k for k in range(1, 5))
+    right = sum(np.sin(2 * np.pi * 190 * k * t) / k for k in range(1, 5))
+    return (0.3 * np.stack([left, right])).astype(np.float32)
+
+
+@pytest.fixture(scope="module")
+def reference(stereo):
+    """AudioStretch output the array API has to reproduce."""
+    processor = AudioStretch()
+    processor.samples = stereo.copy()
+    processor.num_channels = 2
+    processor.stretch(ratio=1.3)
+    return processor.samples
+
+
+def test_matches_audio_stretch(stereo, reference):
+    """Planar and interleaved float input give the AudioStretch result."""
+    np.testing.assert_array_equal(stretch_array(stereo, 44100, 1.3), reference)
+
+    interleaved = stretch_array(np.ascontiguousarray(stereo.T), 44100, 1.3)
+    assert interleaved.shape == reference.T.shape
+    np.testing.assert_array_equal(interleaved, reference.T)
+
+
+@pytest.mark.parametrize("dtype", [np.float64, np.int16])
+def test_dtype_roundtrip(stereo, reference, dtype):
+    """float64 and int16 input come back in their own dtype."""
+    if dtype == np.int16:
+        samples = (stereo * 32767).astype(np.int16)
+        scale = 32767
+    else:
+        samples, scale = stereo.astype(np.float64), 1
+
+    stretched = stretch_array(samples, 44100, 1.3)
+
+    assert stretched.dtype == dtype
+    np.testing.assert_allclose(stretched / scale, reference, atol=1e-4)
+
+
+def test_mono_1d(stereo, reference):
+    """1-D input is treated as mono and returned as 1-D."""
+    stretched = stretch_array(stereo[0].copy(), 44100, 0.8)
+    assert stretched.ndim == 1
+    assert abs(len(stretched) - 88200 * 0.8) < 88200 * 0.05
+
+
+def test_out_buffer_without_allocations(stereo):
+    """Interleaved int16 into a preallocated out makes no array allocations."""
+    samples = np.ascontiguousarray((stereo.T * 32767).astype(np.int16))
+    out = np.empty((required_output_frames(len(samples), 1.3), 2), np.int16)
+    expected = stretch_array(samples, 44100, 1.3)
+
+    tracemalloc.start()
+    try:
+        stretched = stretch_array(samples, 44100, 1.3, out=out)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert np.shares_memory(stretched, out)
+    np.testing.assert_array_equal(stretched, expected)
+    assert peak < samples.nbytes / 10
+
+
+def test_out_buffer_planar_float(stereo, reference):
+    """A planar float out is filled in place and a trimmed view returned."""
+    out = np.zeros((2, required_output_frames(stereo.shape[1], 1.3)), np.float32)
+    stretched = stretch_array(stereo, 44100, 1.3, out=out)
+    assert np.shares_memory(stretched, out)
+    np.testing.assert_array_equal(stretched, reference)
+
+
+def test_out_buffer_validation(stereo):
+    """Undersized or mismatched out buffers are rejected."""
+    with pytest.raises(ValueError, match="required_output_frames"):
+        stretch_array(stereo, 44100, 1.3, out=np.empty((2, 1000), np.float32))
+    with pytest.raises(ValueError, match="same dtype"):
+        stretch_array(stereo, 44100, 1.3, out=np.empty((2, 200000), np.float64))
+    with pytest.raises(ValueError, match="Unsupported sample dtype"):
+        stretch_array(stereo.astype(np.int32), 44100, 1.3)
@@ -0,0 +1,179 @@
+# this_file: tests/test_batch.py
+"""
+Tests for manifest-driven batch rendering.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from audiostretchy.batch import (
+    Job,
+    load_manifest,
+    parse_shard,
+    probe_duration,
+    run_batch,
+    shard_of,
+)
+
+
+@pytest.fixture
+def sources(tmp_path):
+    """Three short WAV inputs of different lengths."""
+    paths = []
+    for index, seconds in enumerate([0.5, 1.5, 1.0]):
+        t = np.arange(int(seconds * 44100)) / 44100
+        path = tmp_path / f"in{index}.wav"
+        sf.write(path, (0.3 * np.sin(2 * np.pi * 150 * t)).astype(np.float32), 44100)
+        paths.append(path)
+    return paths
+
+
+def _manifest(tmp_path, sources, **params):
+    manifest = tmp_path / "jobs.jsonl"
+    lines = [
+        json.dumps(
+            {"input": str(source), "output": str(tmp_path / "out" / source.name)}
+            | params
+        )
+        for source in sources
+    ]
+    manifest.write_text("\n".join(lines) + "\n")
+    return manifest
+
+
+def test_render_then_skip(tmp_path, sources):
+    """A second run skips outputs that are newer and have the same hash."""
+    manifest = _manifest(tmp_path, sources, ratio=1.25)
+
+    assert run_batch(manifest, workers=1) == {"rendered": 3, "skipped": 0, "failed": 0}
+    for source in sources:
+        output = tmp_path / "out" / source.name
+        assert sf.info(output).frames == pytest.approx(
+            sf.info(source).frames * 1.25, rel=0.05
+        )
+    assert not (tmp_path / "jobs.jsonl.journal").exists()
+
+    assert run_batch(manifest, workers=1) == {"rendered": 0, "skipped": 3, "failed": 0}
+
+
+def test_changed_parameters_or_input_rerender(tmp_path, sources):
+    """A new parameter hash or a touched input makes a job run again."""
+    run_batch(_manifest(tmp_path, sources, ratio=1.25), workers=1)
+
+    summary = run_batch(_manifest(tmp_path, sources, ratio=0.8), workers=1)
+    assert summary["rendered"] == 3
+
+    later = (tmp_path / "out" / sources[0].name).stat().st_mtime + 10
+    os.utime(sources[0], (later, later))
+    assert run_batch(tmp_path / "jobs.jsonl", workers=1)["rendered"] == 1
+
+
+def test_resume_from_journal(tmp_path, sources):
+    """Jobs an interrupted run journaled as done are not rendered again."""
+    manifest = _manifest(tmp_path, sources, ratio=1.25)
+    first = load_manifest(manifest)[0]
+    first.output.parent.mkdir()
+    first.output.write_bytes(b"rendered before the crash")
+    journal = tmp_path / "jobs.jsonl.journal"
+    entry = {"output": str(first.output), "hash": first.digest, "status": "done"}
+    journal.write_text(json.dumps(entry) + "\n" + '{"output": "cut sh')
+
+    assert run_batch(manifest, workers=1) == {"rendered": 2, "skipped": 1, "failed": 0}
+    assert first.output.read_bytes() == b"rendered before the crash"
+
+
+def test_failures_are_journaled(tmp_path, sources):
+    """A failing job is recorded and the journal kept for the next run."""
+    manifest = _manifest(tmp_path, [*sources[:1], tmp_path / "missing.wav"])
+
+    summary = run_batch(manifest, workers=1)
+
+    assert summary == {"rendered": 1, "skipped": 0, "failed": 1}
+    entries = [
+        json.loads(line)
+        for line in (tmp_path / "jobs.jsonl.journal").read_text().splitlines()
+    ]
+    assert [entry["status"] for entry in entries] == ["done", "failed"]
+    assert not list((tmp_path / "out").glob(".*partial*"))
+
+
+def test_unknown_parameter(tmp_path):
+    """Manifest lines may only use stretch_audio parameters."""
+    with pytest.raises(ValueError, match="Unknown stretch parameters: speed"):
+        Job(input="a.wav", output="b.wav", speed=2)
+
+
+@pytest.mark.parametrize(
+    "params", [{"outputs": [{"path": "c.wav"}]}, {"segment_seconds": 6}]
+)
+def test_unsupported_parameter(tmp_path, params):
+    """Parameters writing anything but the one output file are rejected."""
+    manifest = tmp_path / "jobs.jsonl"
+    manifest.write_text(json.dumps({"input": "a.wav", "output": "b.wav"} | params))
+    with pytest.raises(ValueError, match=r"jobs.jsonl:1: .*Not supported in batch"):
+        load_manifest(manifest)
+
+
+def test_cli_batch(tmp_path, sources):
+    """`audiostretchy batch --manifest` runs the manifest on a process pool."""
+    manifest = _manifest(tmp_path, sources, ratio=0.9)
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "audiostretchy",
+            "batch",
+            "--manifest",
+            str(manifest),
+            "--workers",
+            "2",
+        ],
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    assert all((tmp_path / "out" / source.name).exists() for source in sources)
+
+
+def test_shards_partition_jobs(tmp_path, sources):
+    """Shards are disjoint, cover every job and do not depend on job order."""
+    jobs = [Job(input="in.wav", output=f"out/{index}.wav") for index in range(200)]
+    shards = [
+        {str(job.output) for job in jobs if shard_of(job, 4) == index}
+        for index in range(1, 5)
+    ]
+    assert sum(len(shard) for shard in shards) == 200
+    assert set().union(*shards) == {str(job.output) for job in jobs}
+    assert all(len(shard) > 20 for shard in shards)
+    reordered = [job for job in reversed(jobs) if shard_of(job, 4) == 1]
+    assert {str(job.output) for job in reordered} == shards[0]
+
+    manifest = _manifest(tmp_path, sources, ratio=1.1)
+    totals = [run_batch(manifest, workers=1, shard=f"{i}/2") for i in (1, 2)]
+    assert sum(total["rendered"] for total in totals) == 3
+
+
+def test_parse_shard():
+    """Shard specifications are 1-based i/n."""
+    assert parse_shard("2/5") == (2, 5)
+    for bad in ("0/3", "4/3", "two/3", "1"):
+        with pytest.raises(ValueError, match="Shard"):
+            parse_shard(bad)
+
+
+def test_longest_first(tmp_path, sources, monkeypatch):
+    """Pending jobs are submitted in order of decreasing duration."""
+    order = []
+    monkeypatch.setattr(
+        "audiostretchy.batch.render_job", lambda job: order.append(job.input.name)
+    )
+    run_batch(_manifest(tmp_path, sources), workers=1)
+    assert order == ["in1.wav", "in2.wav", "in0.wav"]
+    assert probe_duration(sources[1]) == pytest.approx(1.5)
+    assert probe_duration(tmp_path / "missing.wav") == 0.0
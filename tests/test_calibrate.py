@@ -0,0 +1,108 @@
+# this_file: tests/test_calibrate.py
+"""
+Tests for host calibration and the tuning profile.
+"""
+
+import json
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from audiostretchy import calibrate as calibrate_module
+from audiostretchy import estimate, profile
+from audiostretchy.calibrate import BLOCK_SIZES, calibrate
+from audiostretchy.cost import CALIBRATION
+
+
+@pytest.fixture
+def profile_file(isolated_profile):
+    """The temporary tuning profile path every test runs with."""
+    return isolated_profile
+
+
+def test_calibrate_writes_profile(profile_file):
+    written = calibrate(seconds=0.5, repeats=1)
+
+    assert json.loads(profile_file.read_text()) == json.loads(json.dumps(written))
+    assert written["host"] == profile.host()
+    assert written["stream_block_frames"] in BLOCK_SIZES
+    assert 1 <= written["threads"] <= 3
+    assert written["workers"] >= 1
+    assert set(written["calibration"]) == {
+        "tdhs_seconds",
+        "fast_tdhs_seconds",
+        "channel_weight",
+        "io_seconds",
+    }
+    assert profile.tuned("stream_block_frames", None) == written["stream_block_frames"]
+
+
+def test_search_cost_never_stored_as_zero(profile_file, monkeypatch):
+    """A search cost lost in timing noise keeps the built-in constant."""
+    lengths = []
+
+    def flat(samples, lower, fast):
+        lengths.append(samples.shape[1])
+        return 1.0
+
+    assert calibrate_module._search_seconds(flat, np.zeros((1, 100)), False) is None
+    assert lengths == [100, 100, 200, 200, 400, 400]
+
+    monkeypatch.setattr(calibrate_module, "_search_seconds", lambda *args: None)
+    written = calibrate(seconds=0.5, repeats=1)
+    assert written["calibration"]["tdhs_seconds"] == CALIBRATION["tdhs_seconds"]
+    assert (
+        written["calibration"]["fast_tdhs_seconds"] == CALIBRATION["fast_tdhs_seconds"]
+    )
+
+
+def test_profile_from_other_host_is_ignored(profile_file):
+    other = {"version": profile.PROFILE_VERSION, "workers": 7}
+    profile.save_profile(other | {"host": {"machine": "sparc", "library": "int16"}})
+    assert profile.tuned("workers", None) is None
+
+    profile.save_profile(other | {"host": profile.host()})
+    assert profile.tuned("workers", None) == 7
+
+
+def test_unreadable_profile_is_ignored(profile_file):
+    profile_file.write_text("{not json")
+    assert profile.load_profile() == {}
+
+
+def test_estimate_uses_profile_constants(profile_file):
+    before = estimate(44100, 44100, 1, ratio=1.25)
+    profile.save_profile(
+        {
+            "version": profile.PROFILE_VERSION,
+            "host": profile.host(),
+            "calibration": {"tdhs_seconds": 1e-8},
+        }
+    )
+    after = estimate(44100, 44100, 1, ratio=1.25)
+    assert after.cpu_seconds > 10 * before.cpu_seconds
+
+
+def test_cli_calibrate(tmp_path):
+    """`audiostretchy calibrate --output` writes the profile there."""
+    output = tmp_path / "tuning.json"
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "audiostretchy",
+            "calibrate",
+            "--output",
+            str(output),
+            "--seconds",
+            "0.3",
+            "--repeats",
+            "1",
+        ],
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    assert json.loads(output.read_text())["version"] == profile.PROFILE_VERSION
@@ -0,0 +1,79 @@
+# this_file: tests/test_concat.py
+"""
+Tests for stretching many clips into one file.
+"""
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from audiostretchy import metrics, stretch_audio, stretch_concat
+
+
+def _clip(path, seconds, f0, samplerate=44100, channels=2):
+    """Write a short vowel-like clip and return its path."""
+    t = np.arange(int(seconds * samplerate)) / samplerate
+    phase = 2 * np.pi * f0 * t
+    voiced = 0.2 * sum(np.sin(k * phase) / k for k in range(1, 6))
+    sf.write(path, np.tile(voiced[:, None], (1, channels)), samplerate)
+    return path
+
+
+@pytest.fixture
+def clips(tmp_path):
+    return [
+        _clip(tmp_path / f"clip{index}.wav", 0.4 + 0.05 * index, 110 + 10 * index)
+        for index in range(12)
+    ]
+
+
+def _contexts(inputs, output):
+    with metrics.collecting() as registry:
+        stretch_concat(inputs, output, ratio=1.25)
+    return registry.to_json()["counters"]["audiostretchy_contexts_created_total"]
+
+
+def test_concat_matches_stretching_the_joined_file(clips, tmp_path):
+    """Without a gap the clips stream through one context as one signal."""
+    joined = tmp_path / "joined.wav"
+    sf.write(joined, np.concatenate([sf.read(clip)[0] for clip in clips]), 44100)
+    stretch_audio(joined, tmp_path / "expected.wav", ratio=1.25, streaming=True)
+    stretch_concat(clips, tmp_path / "out.wav", ratio=1.25)
+
+    np.testing.assert_array_equal(
+        sf.read(tmp_path / "out.wav")[0], sf.read(tmp_path / "expected.wav")[0]
+    )
+    # The context count does not grow with the number of clips.
+    assert _contexts(clips, tmp_path / "all.wav") == _contexts(
+        clips[:1], tmp_path / "one.wav"
+    )
+
+
+def test_concat_gaps_and_mixed_formats(clips, tmp_path):
+    mono = _clip(tmp_path / "mono.wav", 0.5, 150, samplerate=22050, channels=1)
+    inputs = (path for path in [*clips[:3], mono])
+    output = tmp_path / "out.wav"
+    stretch_concat(inputs, output, ratio=0.8, gap_ms=200)
+
+    seconds = sum(sf.info(clip).duration for clip in clips[:3]) + 0.5
+    with sf.SoundFile(output) as f:
+        assert f.samplerate == 44100
+        assert f.channels == 2
+        assert f.frames / 44100 == pytest.approx(0.8 * seconds + 3 * 0.2, abs=0.02)
+        audio = f.read()
+    # The gaps are silent.
+    gap_start = round(0.8 * sf.info(clips[0]).duration * 44100) + 441
+    np.testing.assert_array_equal(audio[gap_start : gap_start + 4410], 0)
+
+
+def test_concat_validation(clips, tmp_path):
+    output = tmp_path / "out.wav"
+    with pytest.raises(ValueError, match="empty"):
+        stretch_concat([], output)
+    with pytest.raises(ValueError, match="gap_ms"):
+        stretch_concat(clips, output, gap_ms=-1)
+    surround = _clip(tmp_path / "surround.wav", 0.5, 150, channels=6)
+    with pytest.raises(ValueError, match="6 channels"):
+        stretch_concat([clips[0], surround], output)
+    with pytest.raises(OSError):
+        stretch_concat([clips[0], tmp_path / "missing.wav"], output)
@@ -0,0 +1,75 @@
+# this_file: tests/test_convert.py
+"""
+Tests for the blocked sample-format conversion layer.
+"""
+
+import tracemalloc
+
+import numpy as np
+
+from audiostretchy.convert import (
+    BLOCK_FRAMES,
+    ScratchBuffer,
+    deinterleave_from_int16,
+    interleave_to_int16,
+)
+from audiostretchy.core import AudioStretch
+
+
+def test_interleave_matches_reference_across_blocks():
+    """Blocked conversion equals the whole-array expression, including clipping."""
+    rng = np.random.default_rng(0)
+    samples = rng.uniform(-1.5, 1.5, (3, BLOCK_FRAMES * 2 + 17)).astype(np.float32)
+
+    expected = (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16).T.ravel()
+    np.testing.assert_array_equal(interleave_to_int16(samples), expected)
+
+
+def test_interleave_writes_into_provided_buffer():
+    """Conversion writes into the caller's buffer instead of allocating."""
+    samples = np.full((2, 10), 0.5, dtype=np.float32)
+    out = np.ones(64, dtype=np.int16)
+
+    result = interleave_to_int16(samples, out=out)
+
+    assert np.shares_memory(result, out)
+    assert result.size == 20
+    assert (out[:20] == 16383).all()
+    assert (out[20:] == 1).all()
+
+
+def test_deinterleave_roundtrip():
+    """De-interleaving restores (channels, frames) float32."""
+    samples = np.array([[0.25, -0.5], [1.0, -1.0]], dtype=np.float32)
+    restored = deinterleave_from_int16(interleave_to_int16(samples), 2)
+
+    assert restored.dtype == np.float32
+    np.testing.assert_array_almost_equal(restored, samples, decimal=4)
+
+
+def test_scratch_buffer_reuses_memory():
+    """Smaller requests are served from the existing allocation."""
+    scratch = ScratchBuffer(np.int16)
+    first = scratch.get(100)
+    second = scratch.get(50)
+
+    assert np.shares_memory(first, second)
+    assert scratch.get(200).size == 200
+
+
+def test_stretch_peak_memory():
+    """Stretching allocates at most ~2.5x the input size at its peak."""
+    processor = AudioStretch()
+    processor.num_channels = 2
+    rng = np.random.default_rng(1)
+    source = (0.3 * rng.standard_normal((2, 441000))).astype(np.float32)
+
+    for _ in range(2):  # first call sizes the scratch buffer, second reuses it
+        processor.samples = source
+        tracemalloc.start()
+        try:
+            processor.stretch(1.2)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        assert peak <= 2.5 * source.nbytes
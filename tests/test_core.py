@@ -151,20 +151,97 @@ class TestAudioStretch:
         )
         np.testing.assert_array_almost_equal(float_samples, expected, decimal=5)
 
-    def test_unsupported_channels(self):
-        """Test error handling for unsupported channel counts."""
+    def test_convert_multichannel_roundtrip(self):
+        """Test interleaving and de-interleaving of a 5.1 layout."""
         processor = AudioStretch()
-        processor.num_channels = 3  # Unsupported
+        processor.num_channels = 6
 
-        float_samples = np.random.random((3, 100)).astype(np.float32)
+        # Each channel holds a distinct constant so interleaving is visible
+        levels = np.array([0.1, 0.2, 0.3, 0.4, 0.5, 0.6], dtype=np.float32)
+        float_samples = np.repeat(levels[:, None], 4, axis=1)
 
-        with pytest.raises(ValueError, match="Unsupported channel count: 3"):
-            processor._convert_to_int16(float_samples)
+        int16_samples = processor._convert_to_int16(float_samples)
+        np.testing.assert_array_equal(
+            int16_samples[:6], (levels * 32767).astype(np.int16)
+        )
+
+        restored = processor._convert_from_int16(int16_samples)
+        assert restored.shape == (6, 4)
+        np.testing.assert_array_almost_equal(restored, float_samples, decimal=4)
+
+    @pytest.mark.parametrize("linked_channels", [False, True])
+    def test_stretch_multichannel(self, linked_channels):
+        """Test stretching 5.1 audio keeps every channel distinct."""
+        processor = AudioStretch()
+        t = np.arange(44100) / 44100
+        freqs = [110, 165, 220, 275, 330, 385]
+        processor.samples = np.stack(
+            [0.5 * np.sin(2 * np.pi * f * t) for f in freqs]
+        ).astype(np.float32)
+        processor.num_channels = 6
+
+        processor.stretch(1.25, linked_channels=linked_channels)
+
+        assert processor.samples.shape[0] == 6
+        assert abs(processor.samples.shape[1] - 55125) < 44100 * 0.05
+        # Each output channel still peaks at its own frequency
+        spectrum = np.abs(np.fft.rfft(processor.samples, axis=1))
+        peaks = np.argmax(spectrum, axis=1) * 44100 / processor.samples.shape[1]
+        np.testing.assert_allclose(peaks, freqs, rtol=0.05)
+
+    def test_stretch_unlinked_stereo(self):
+        """Unlinked stereo stretches each channel exactly like mono."""
+        t = np.arange(44100) / 44100
+        channels = [0.5 * np.sin(2 * np.pi * f * t) for f in (120, 210)]
+        processor = AudioStretch()
+        processor.samples = np.stack(channels).astype(np.float32)
+        processor.num_channels = 2
+
+        processor.stretch(1.25, unlinked_channels=True)
 
-        int16_samples = np.random.randint(-32767, 32767, 300, dtype=np.int16)
+        for channel, samples in enumerate(channels):
+            mono = AudioStretch()
+            mono.samples = samples[None, :].astype(np.float32)
+            mono.stretch(1.25)
+            num_frames = processor.samples.shape[1]
+            assert num_frames <= mono.samples.shape[1]
+            np.testing.assert_array_equal(
+                processor.samples[channel], mono.samples[0, :num_frames]
+            )
+
+        with pytest.raises(ValueError, match="exclusive"):
+            processor.stretch(1.25, linked_channels=True, unlinked_channels=True)
+
+    def test_stretch_preview_then_full(self):
+        """A preview render keeps the decoded audio for the full render."""
+        processor = AudioStretch()
+        processor.open("tests/audio.wav")
+        decoded = processor.samples.copy()
+
+        processor.stretch(1.25, quality="preview")
+        assert abs(processor.samples.shape[1] - decoded.shape[1] * 1.25) < 0.01 * 44100
+        processor.stretch(1.25, quality="full")
+
+        reference = AudioStretch()
+        reference.samples = decoded
+        reference.stretch(1.25)
+        np.testing.assert_array_equal(processor.samples, reference.samples)
+
+        with pytest.raises(ValueError, match="quality"):
+            processor.stretch(1.25, quality="draft")
+
+    @pytest.mark.parametrize("num_frames", [0, 2, 3])
+    def test_stretch_preview_tiny_input(self, num_frames):
+        """Audio shorter than one decimated frame falls back to a full render."""
+        samples = np.full((1, num_frames), 0.1, dtype=np.float32)
+        processor = AudioStretch()
+        processor.samples = samples.copy()
+        processor.stretch(1.25, quality="preview")
 
-        with pytest.raises(ValueError, match="Unsupported channel count: 3"):
-            processor._convert_from_int16(int16_samples)
+        reference = AudioStretch()
+        reference.samples = samples.copy()
+        reference.stretch(1.25)
+        np.testing.assert_array_equal(processor.samples, reference.samples)
 
 
 def test_stretch_audio_function():
@@ -0,0 +1,69 @@
+# this_file: tests/test_cost.py
+"""
+Tests for the cost estimator.
+"""
+
+import tracemalloc
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from audiostretchy import AudioStretch, estimate
+from audiostretchy.cost import CALIBRATION
+
+
+@pytest.fixture
+def stereo(tmp_path):
+    """Two seconds of stereo tone."""
+    t = np.arange(2 * 44100) / 44100
+    tone = (0.3 * np.sin(2 * np.pi * 150 * t)).astype(np.float32)
+    path = tmp_path / "stereo.wav"
+    sf.write(path, np.stack([tone, tone], axis=1), 44100)
+    return path
+
+
+def test_reads_the_header(stereo):
+    result = estimate(stereo, ratio=1.5)
+    assert result.output_frames == 3 * 44100
+    assert not result.streaming
+    assert result == estimate(2 * 44100, 44100, 2, ratio=1.5)
+
+
+def test_length_needs_format():
+    with pytest.raises(ValueError, match="samplerate and channels"):
+        estimate(44100, ratio=1.5)
+    with pytest.raises(ValueError, match="positive"):
+        estimate(44100, 44100, 1, ratio=0)
+
+
+def test_cpu_follows_period_range_and_detection():
+    wide = estimate(44100, 44100, 1, ratio=1.25)
+    narrow = estimate(44100, 44100, 1, ratio=1.25, lower_freq=110)
+    fast = estimate(44100, 44100, 1, ratio=1.25, fast_detection=True)
+    stereo = estimate(44100, 44100, 2, ratio=1.25)
+    assert narrow.cpu_seconds < wide.cpu_seconds
+    assert fast.cpu_seconds < wide.cpu_seconds
+    assert wide.cpu_seconds < stereo.cpu_seconds < 2 * wide.cpu_seconds
+
+
+def test_streaming_memory_is_bounded():
+    hours = 3 * 3600 * 44100
+    streamed = estimate(hours, 44100, 2, ratio=1.25, streaming=True)
+    loaded = estimate(hours, 44100, 2, ratio=1.25, streaming=False)
+    assert streamed.peak_bytes < CALIBRATION["base_bytes"] + (64 << 20)
+    assert loaded.peak_bytes > 10 * streamed.peak_bytes
+    assert estimate(hours, 44100, 2, ratio=1.25).streaming
+
+
+def test_peak_bounds_measured_allocation(stereo):
+    tracemalloc.start()
+    try:
+        processor = AudioStretch()
+        processor.open(stereo)
+        processor.stretch(ratio=1.5)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    predicted = estimate(stereo, ratio=1.5, calibration={"base_bytes": 0})
+    assert peak <= predicted.peak_bytes < 2 * peak
@@ -0,0 +1,177 @@
+# this_file: tests/test_metrics.py
+"""
+Tests for the metrics registry and its instrumentation points.
+"""
+
+import json
+import threading
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from audiostretchy import metrics, stretch_audio
+from audiostretchy.batch import run_batch
+
+
+@pytest.fixture
+def source(tmp_path):
+    """One second of a 150 Hz tone."""
+    t = np.arange(44100) / 44100
+    path = tmp_path / "in.wav"
+    sf.write(path, (0.3 * np.sin(2 * np.pi * 150 * t)).astype(np.float32), 44100)
+    return path
+
+
+def test_counters_and_histograms_render():
+    registry = metrics.Metrics()
+    registry.count("jobs_total")
+    registry.count("job_errors_total", type="ValueError")
+    registry.observe("stage_seconds", 0.003, stage="tdhs")
+    registry.observe("stage_seconds", 100.0, stage="tdhs")
+
+    text = registry.to_prometheus()
+    assert "# TYPE audiostretchy_jobs_total counter" in text
+    assert 'audiostretchy_job_errors_total{type="ValueError"} 1' in text
+    assert 'audiostretchy_stage_seconds_bucket{stage="tdhs",le="0.001"} 0' in text
+    assert 'audiostretchy_stage_seconds_bucket{stage="tdhs",le="0.005"} 1' in text
+    assert 'audiostretchy_stage_seconds_bucket{stage="tdhs",le="+Inf"} 2' in text
+    assert 'audiostretchy_stage_seconds_count{stage="tdhs"} 2' in text
+
+    summary = registry.to_json()
+    histogram = summary["histograms"]['audiostretchy_stage_seconds{stage="tdhs"}']
+    assert histogram["count"] == 2
+    assert histogram["mean"] == pytest.approx(50.0015)
+
+
+def test_merge_adds_states():
+    first, second = metrics.Metrics(), metrics.Metrics()
+    for registry in (first, second):
+        registry.count("jobs_total", 2)
+        registry.observe("realtime_factor", 30.0)
+    first.merge(json.loads(json.dumps(second.state())))
+
+    summary = first.to_json()
+    assert summary["counters"]["audiostretchy_jobs_total"] == 4
+    assert summary["histograms"]["audiostretchy_realtime_factor"]["count"] == 2
+
+
+def test_collecting_is_local_to_each_thread(tmp_path, source):
+    """Concurrent collecting() blocks each see only their own jobs."""
+    barrier = threading.Barrier(2)
+
+    def job(ratio, streaming):
+        with metrics.collecting() as registry:
+            barrier.wait()
+            stretch_audio(
+                source, tmp_path / f"{ratio}.wav", ratio=ratio, streaming=streaming
+            )
+            barrier.wait()
+        return registry.to_json()
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        summaries = list(pool.map(job, (1.25, 0.8), (False, True)))
+
+    for summary in summaries:
+        counters = summary["counters"]
+        assert counters["audiostretchy_jobs_total"] == 1
+        assert counters["audiostretchy_audio_input_seconds_total"] == pytest.approx(1.0)
+        # Recorded on the pipeline's encode thread.
+        assert 'audiostretchy_stage_seconds{stage="encode"}' in summary["histograms"]
+
+
+def test_stretch_audio_records_stages(tmp_path, source):
+    with metrics.collecting() as registry:
+        stretch_audio(source, tmp_path / "out.wav", ratio=1.25)
+    summary = registry.to_json()
+
+    counters = summary["counters"]
+    assert counters["audiostretchy_jobs_total"] == 1
+    assert counters["audiostretchy_contexts_created_total"] == 1
+    assert counters["audiostretchy_audio_input_seconds_total"] == pytest.approx(1.0)
+    assert counters["audiostretchy_audio_output_seconds_total"] == pytest.approx(
+        1.25, abs=0.05
+    )
+    for stage in ("decode", "convert", "tdhs", "flush", "encode"):
+        assert (
+            f'audiostretchy_stage_seconds{{stage="{stage}"}}' in summary["histograms"]
+        )
+    assert summary["histograms"]["audiostretchy_realtime_factor"]["count"] == 1
+
+
+def test_multichannel_input_seconds(tmp_path):
+    """Per-group contexts count the input length, not the output length."""
+    t = np.arange(44100) / 44100
+    tone = 0.3 * np.sin(2 * np.pi * 150 * t)
+    path = tmp_path / "six.wav"
+    sf.write(path, np.stack([tone] * 6, axis=1).astype(np.float32), 44100)
+
+    with metrics.collecting() as registry:
+        stretch_audio(path, tmp_path / "out.wav", ratio=1.5)
+        stretch_audio(path, tmp_path / "out2.wav", ratio=1.5, unlinked_channels=True)
+    counters = registry.to_json()["counters"]
+
+    assert counters["audiostretchy_audio_input_seconds_total"] == pytest.approx(2.0)
+    assert counters["audiostretchy_audio_output_seconds_total"] == pytest.approx(
+        3.0, abs=0.1
+    )
+
+
+def test_streaming_path_records_stages(tmp_path, source):
+    with metrics.collecting() as registry:
+        stretch_audio(source, tmp_path / "out.wav", ratio=0.8, streaming=True)
+    summary = registry.to_json()
+
+    counters = summary["counters"]
+    assert counters["audiostretchy_audio_input_seconds_total"] == pytest.approx(1.0)
+    assert counters["audiostretchy_audio_output_seconds_total"] == pytest.approx(
+        0.8, abs=0.05
+    )
+    assert 'audiostretchy_stage_seconds{stage="encode"}' in summary["histograms"]
+
+
+def test_job_errors_are_counted_by_type(tmp_path):
+    with metrics.collecting() as registry, pytest.raises(OSError):
+        stretch_audio(tmp_path / "missing.wav", tmp_path / "out.wav", ratio=1.1)
+    counters = registry.to_json()["counters"]
+    assert counters["audiostretchy_jobs_total"] == 1
+    assert counters['audiostretchy_job_errors_total{type="OSError"}'] == 1
+
+
+def test_batch_writes_merged_metrics(tmp_path, source):
+    manifest = tmp_path / "jobs.jsonl"
+    manifest.write_text(
+        json.dumps({"input": str(source), "output": str(tmp_path / "a.wav")})
+        + "\n"
+        + json.dumps({"input": "missing.wav", "output": str(tmp_path / "b.wav")})
+        + "\n"
+    )
+    with metrics.collecting():
+        run_batch(
+            manifest,
+            workers=1,
+            metrics_json=tmp_path / "metrics.json",
+            metrics_textfile=tmp_path / "metrics.prom",
+        )
+
+    counters = json.loads((tmp_path / "metrics.json").read_text())["counters"]
+    assert counters["audiostretchy_jobs_total"] == 2
+    assert counters["audiostretchy_batch_rendered_total"] == 1
+    assert counters["audiostretchy_batch_failed_total"] == 1
+    assert "audiostretchy_jobs_total 2" in (tmp_path / "metrics.prom").read_text()
+
+
+def test_serve_exposes_registry():
+    registry = metrics.Metrics()
+    registry.count("jobs_total", 3)
+    server = metrics.serve(0, registry)
+    try:
+        port = server.server_address[1]
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+            body = response.read().decode()
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert "audiostretchy_jobs_total 3" in body
@@ -0,0 +1,74 @@
+# this_file: tests/test_parallel.py
+"""
+Tests for shared-memory batch stretching.
+"""
+
+import multiprocessing
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from audiostretchy import parallel
+from audiostretchy.arrays import stretch_array
+from audiostretchy.parallel import stretch_arrays_parallel
+
+
+def _tone(f0, seconds=1.0, channels=2):
+    t = np.arange(int(seconds * 44100)) / 44100
+    tone = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 4))
+    return np.tile((0.3 * tone).astype(np.float32), (channels, 1))
+
+
+def _segments():
+    shm = Path("/dev/shm")
+    return set(shm.iterdir()) if shm.is_dir() else set()
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_matches_stretch_array(workers):
+    """Workers produce exactly what stretch_array produces in-process."""
+    arrays = [_tone(110 + 15 * i, seconds=0.5 + 0.1 * i) for i in range(6)]
+    arrays.append(_tone(200, channels=1)[0])
+    ratios = [0.7, 0.9, 1.1, 1.3, 1.5, 1.0, 1.2]
+    before = _segments()
+
+    results = stretch_arrays_parallel(arrays, ratios, workers=workers)
+
+    assert _segments() == before
+    for array, ratio, result in zip(arrays, ratios, results, strict=True):
+        assert result.shape[:-1] == array.shape[:-1]
+        np.testing.assert_array_equal(result, stretch_array(array, 44100, ratio))
+
+
+def test_int16_inputs():
+    """int16 arrays are scaled to float32 on the way in."""
+    tone = _tone(150)
+    (result,) = stretch_arrays_parallel([(tone * 32767).astype(np.int16)], 1.25)
+    expected = stretch_array(tone, 44100, 1.25)
+    np.testing.assert_allclose(result, expected, atol=1e-3)
+
+
+def test_validation():
+    """Ratios must line up with the arrays; an empty batch is a no-op."""
+    assert stretch_arrays_parallel([], 1.2) == []
+    with pytest.raises(ValueError, match="ratios"):
+        stretch_arrays_parallel([_tone(100)], [1.1, 1.2])
+    with pytest.raises(ValueError, match="ratio must be positive"):
+        stretch_arrays_parallel([_tone(100), _tone(120)], [1.1, 0.0])
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_failed_job_releases_segments(workers, monkeypatch):
+    """A job raising in a worker still closes and unlinks both segments."""
+    if workers > 1 and multiprocessing.get_start_method() != "fork":
+        pytest.skip("Workers only inherit the patched stretch_array when forked")
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("native failure")
+
+    monkeypatch.setattr(parallel, "stretch_array", fail)
+    before = _segments()
+    with pytest.raises(RuntimeError, match="native failure"):
+        stretch_arrays_parallel([_tone(120), _tone(140)], 1.2, workers=workers)
+    assert _segments() == before
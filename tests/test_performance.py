@@ -1,5 +1,6 @@
 import time
 
+import numpy as np
 import pytest
 
 from audiostretchy.core import AudioStretch, stretch_audio
@@ -86,3 +87,94 @@ def test_memory_usage_stability(generate_test_files):
 
     # If we get here without crashing, memory is probably stable
     assert True
+
+
+@pytest.mark.performance
+def test_auto_range_speedup():
+    """Benchmark auto_range against the default 55-333 Hz period search."""
+    processor = AudioStretch()
+    processor.open("tests/audio.wav")
+    source = processor.samples
+
+    timings = {}
+    for auto_range in (False, True):
+        best = float("inf")
+        for _ in range(3):
+            processor.samples = source
+            start_time = time.perf_counter()
+            processor.stretch(ratio=1.5, auto_range=auto_range)
+            best = min(best, time.perf_counter() - start_time)
+        timings[auto_range] = best
+
+    speedup = timings[False] / timings[True]
+    print(
+        f"auto_range: {timings[True]:.3f}s vs default {timings[False]:.3f}s "
+        f"({speedup:.2f}x)"
+    )
+    assert speedup > 1.2
+
+
+@pytest.mark.performance
+def test_analysis_reuse_speedup():
+    """Benchmark extra ratios rendered from one analysis against native TDHS."""
+    processor = AudioStretch()
+    processor.open("tests/audio.wav")
+    source = processor.samples
+    ratios = (0.8, 0.9, 1.1, 1.25)
+
+    start_time = time.perf_counter()
+    for ratio in ratios:
+        processor.samples = source
+        processor.stretch(ratio=ratio)
+    native = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    processor.samples = source
+    analysis = processor.analyze()
+    for ratio in ratios:
+        processor.samples = source
+        processor.stretch(ratio=ratio, analysis=analysis)
+    reused = time.perf_counter() - start_time
+
+    speedup = native / reused
+    print(f"analysis reuse: {reused:.3f}s vs native {native:.3f}s ({speedup:.2f}x)")
+    assert speedup > 3.0
+
+
+@pytest.mark.performance
+def test_preview_tier_speedup():
+    """Benchmark quality="preview" against the full render of the same audio."""
+    processor = AudioStretch()
+    processor.open("tests/audio.wav")
+    source = processor.samples
+
+    timings, renders = {}, {}
+    for quality in ("full", "preview"):
+        best = float("inf")
+        for _ in range(3):
+            processor.samples = source
+            start_time = time.perf_counter()
+            processor.stretch(ratio=1.25, quality=quality)
+            best = min(best, time.perf_counter() - start_time)
+        timings[quality] = best
+        renders[quality] = processor.samples[0]
+
+    # Long-term spectra in 50 Hz bands agree up to the preview's ~5.5 kHz
+    # bandwidth.
+    num_frames = min(len(render) for render in renders.values())
+    bins = num_frames * 50 // 44100
+    spectra = [
+        np.abs(np.fft.rfft(render[:num_frames]))[: 100 * bins]
+        .reshape(100, bins)
+        .mean(axis=1)
+        for render in renders.values()
+    ]
+    similarity = np.corrcoef(*spectra)[0, 1]
+    speedup = timings["full"] / timings["preview"]
+    print(
+        f"preview: {timings['preview'] * 1000:.1f}ms vs full "
+        f"{timings['full'] * 1000:.1f}ms ({speedup:.1f}x), "
+        f"spectral similarity below 5 kHz {similarity:.2f}"
+    )
+    assert speedup > 3.0
+    assert similarity > 0.8
@@ -0,0 +1,70 @@
+# this_file: tests/test_pipeline.py
+"""
+Tests for the threaded decode -> stretch -> encode pipeline.
+"""
+
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from audiostretchy.pipeline import run_pipeline
+
+
+def _blocks(count, delay=0.0):
+    for index in range(count):
+        time.sleep(delay)
+        yield np.full((1, 4), index, dtype=np.float32)
+
+
+def test_order_and_finish():
+    """Blocks are written in order, followed by the finish() output."""
+    written = []
+    run_pipeline(
+        _blocks(20),
+        lambda block: block * 2,
+        lambda: np.full((1, 4), -1, dtype=np.float32),
+        written.append,
+        depth=2,
+    )
+    assert [int(block[0, 0]) for block in written] == [*range(0, 40, 2), -1]
+
+
+def test_stages_overlap():
+    """Three equally slow stages take about one stage's time, not three."""
+    delay, count = 0.02, 12
+    start = time.perf_counter()
+    run_pipeline(
+        _blocks(count, delay),
+        lambda block: (time.sleep(delay), block)[1],
+        lambda: np.empty((1, 0), dtype=np.float32),
+        lambda block: time.sleep(delay),
+    )
+    elapsed = time.perf_counter() - start
+    assert elapsed < 0.7 * 3 * delay * count
+
+
+@pytest.mark.parametrize("stage", ["decode", "process", "write"])
+def test_errors_propagate(stage):
+    """A failure in any stage is re-raised and no thread is left behind."""
+
+    def blocks():
+        yield from _blocks(3)
+        if stage == "decode":
+            raise RuntimeError("decode failed")
+        yield from _blocks(100)
+
+    def process(block):
+        if stage == "process" and block[0, 0] == 2:
+            raise RuntimeError("process failed")
+        return block
+
+    def write(block):
+        if stage == "write":
+            raise RuntimeError("write failed")
+
+    before = threading.active_count()
+    with pytest.raises(RuntimeError, match=f"{stage} failed"):
+        run_pipeline(blocks(), process, lambda: np.empty((1, 0)), write, depth=1)
+    assert threading.active_count() == before
@@ -0,0 +1,66 @@
+# this_file: tests/test_pitch.py
+"""
+Tests for F0 range estimation and the auto_range stretch option.
+"""
+
+import numpy as np
+
+from audiostretchy.core import AudioStretch
+from audiostretchy.pitch import estimate_period_range, frame_periods
+
+
+def _voice_like(f0_start, f0_end, seconds=2.0, samplerate=44100):
+    """Harmonic-rich tone whose fundamental glides from f0_start to f0_end."""
+    t = np.arange(int(seconds * samplerate)) / samplerate
+    f0 = np.linspace(f0_start, f0_end, len(t))
+    phase = 2 * np.pi * np.cumsum(f0) / samplerate
+    signal = sum(np.sin(k * phase) / k for k in range(1, 6))
+    return (0.3 * signal).astype(np.float32).reshape(1, -1)
+
+
+def _median_f0(samples, samplerate=44100):
+    _, periods = frame_periods(samples, samplerate, 132, 801)
+    return samplerate / np.median(periods[periods > 0])
+
+
+def test_estimate_period_range_brackets_f0():
+    """The estimated window covers the glide and is narrower than the default."""
+    samples = _voice_like(100, 140)
+    shortest, longest = estimate_period_range(samples, 44100, 132, 801)
+
+    assert shortest <= 44100 / 140
+    assert longest >= 44100 / 100
+    assert longest - shortest < (801 - 132) / 2
+
+
+def test_estimate_period_range_silence():
+    """Silence has no voiced frames, so no estimate is returned."""
+    samples = np.zeros((1, 44100), dtype=np.float32)
+    assert estimate_period_range(samples, 44100, 132, 801) is None
+
+
+def test_estimate_period_range_stays_within_bounds():
+    """The estimate never widens the caller's window."""
+    samples = _voice_like(60, 70)
+    shortest, longest = estimate_period_range(samples, 44100, 200, 700)
+    assert shortest >= 200
+    assert longest <= 700
+
+
+def test_auto_range_quality_parity():
+    """auto_range keeps duration and pitch on par with the full search."""
+    source = _voice_like(100, 140)
+    results = {}
+    for auto_range in (False, True):
+        processor = AudioStretch()
+        processor.samples = source.copy()
+        processor.stretch(ratio=1.3, auto_range=auto_range)
+        results[auto_range] = processor.samples
+
+    expected_frames = int(source.shape[1] * 1.3)
+    for stretched in results.values():
+        assert abs(stretched.shape[1] - expected_frames) < source.shape[1] * 0.05
+
+    input_f0 = _median_f0(source)
+    assert abs(_median_f0(results[True]) - input_f0) < input_f0 * 0.03
+    assert abs(_median_f0(results[True]) - _median_f0(results[False])) < 2.0
@@ -0,0 +1,90 @@
+# this_file: tests/test_quality.py
+"""
+Tests for the objective quality measures and the benchmark matrix script.
+"""
+
+import csv
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from audiostretchy import stretch_array
+from audiostretchy.quality import (
+    count_clicks,
+    duration_error,
+    f0_error_cents,
+    spectral_distortion,
+)
+
+SAMPLERATE = 44100
+SCRIPT = Path(__file__).parent.parent / "scripts" / "benchmark_quality.py"
+
+
+def _tone(seconds=1.0, freq=220.0):
+    t = np.arange(int(seconds * SAMPLERATE)) / SAMPLERATE
+    return (0.3 * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+
+def test_stretched_tone_keeps_pitch():
+    tone = _tone()
+    stretched = stretch_array(tone, SAMPLERATE, 1.25)
+    assert f0_error_cents(tone, stretched, SAMPLERATE, 1.25) < 20
+    assert f0_error_cents(tone, _tone(freq=233.08), SAMPLERATE, 1.0) == pytest.approx(
+        100, abs=10
+    )
+    assert abs(duration_error(len(tone), len(stretched), 1.25)) < 0.01
+
+
+def test_duration_error():
+    assert duration_error(1000, 1250, 1.25) == 0.0
+    assert duration_error(1000, 1100, 1.0) == pytest.approx(0.1)
+
+
+def test_spectral_distortion_ignores_level():
+    tone = _tone()
+    assert spectral_distortion(tone, 0.5 * tone, SAMPLERATE) == pytest.approx(0)
+    assert spectral_distortion(tone, _tone(freq=440), SAMPLERATE) > 10
+
+
+def test_count_clicks():
+    tone = _tone()
+    assert count_clicks(tone, SAMPLERATE) == 0
+    broken = np.concatenate([tone[:20000], tone[20050:]])
+    assert count_clicks(broken, SAMPLERATE) == 1
+    assert count_clicks(np.zeros(SAMPLERATE), SAMPLERATE) == 0
+
+
+def test_benchmark_script(tmp_path):
+    """The quick matrix writes one CSV row per signal and option combination."""
+    output = tmp_path / "quality.csv"
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [str(SCRIPT.parent.parent / "src"), env.get("PYTHONPATH")])
+    )
+    result = subprocess.run(
+        [
+            sys.executable,
+            str(SCRIPT),
+            "--quick",
+            "--seconds",
+            "0.5",
+            "--repeats",
+            "1",
+            "--output",
+            str(output),
+        ],
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+    assert result.returncode == 0, result.stderr
+    with output.open() as f:
+        rows = list(csv.DictReader(f))
+    signals = {row["signal"] for row in rows}
+    assert {"tone", "voice", "syllables"} <= signals
+    assert len(rows) == len(signals) * 2 * 2 * 2
+    assert all(float(row["realtime_factor"]) > 0 for row in rows)
@@ -0,0 +1,93 @@
+# this_file: tests/test_render_cache.py
+"""
+Tests for segment-level incremental re-rendering.
+"""
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from audiostretchy import RenderCache, metrics
+from audiostretchy.quality import count_clicks
+
+SAMPLERATE = 44100
+
+
+@pytest.fixture
+def narration(tmp_path):
+    """Twelve seconds of syllable-like bursts with short pauses."""
+    t = np.arange(12 * SAMPLERATE) / SAMPLERATE
+    f0 = 140 + 30 * np.sin(2 * np.pi * 0.3 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / SAMPLERATE
+    voiced = 0.2 * sum(np.sin(k * phase) / k for k in range(1, 6))
+    envelope = np.clip(np.sin(2 * np.pi * 1.3 * t), 0, None) ** 0.5
+    path = tmp_path / "narration.wav"
+    sf.write(path, voiced * envelope, SAMPLERATE)
+    return path
+
+
+def _render(cache, ratios, **kwargs):
+    """Render and return the audio with the number of segments stretched."""
+    with metrics.collecting() as registry:
+        audio = cache.render(ratios, **kwargs)
+    counters = registry.to_json()["counters"]
+    return audio, counters.get("audiostretchy_render_cache_misses_total", 0)
+
+
+def test_segments_cut_in_quiet_passages(narration, tmp_path):
+    cache = RenderCache(narration, tmp_path / "cache", segment_seconds=2.0)
+    assert cache.segments[0][0] == 0
+    assert cache.segments[-1][1] == cache.num_frames
+    assert all(a[1] == b[0] for a, b in zip(cache.segments, cache.segments[1:]))
+    audio = sf.read(narration)[0]
+    for start, _ in cache.segments[1:]:
+        assert np.abs(audio[start - 220 : start + 220]).max() < 0.1
+
+
+def test_edit_rerenders_only_touched_segments(narration, tmp_path):
+    cache = RenderCache(narration, tmp_path / "cache", segment_seconds=2.0)
+    full, misses = _render(cache, 1.25)
+    assert misses == len(cache.segments)
+    assert abs(full.shape[1] - 1.25 * cache.num_frames) < 0.001 * cache.num_frames
+    # The seams add no clicks to those of the source.
+    source_clicks = count_clicks(sf.read(narration)[0], SAMPLERATE)
+    assert count_clicks(full, SAMPLERATE) <= source_clicks
+
+    again, misses = _render(cache, 1.25)
+    assert misses == 0
+    np.testing.assert_array_equal(again, full)
+
+    # Slow down 5-6 s; only segments within a margin of it change.
+    edit = [(0, 1.25), (5.0, 1.5), (6.0, 1.25)]
+    edited, misses = _render(cache, edit)
+    lo, hi = 5 * SAMPLERATE - cache.margin, 6 * SAMPLERATE + cache.margin
+    touched = sum(start < hi and stop > lo for start, stop in cache.segments)
+    assert 1 <= misses == touched < len(cache.segments)
+    expected = cache.num_frames * 1.25 + SAMPLERATE * 0.25
+    assert abs(edited.shape[1] - expected) < 0.001 * cache.num_frames
+
+    # A new session over the same cache directory reuses every segment.
+    reopened = RenderCache(narration, tmp_path / "cache", segment_seconds=2.0)
+    assert reopened.segments == cache.segments
+    _, misses = _render(reopened, edit)
+    assert misses == 0
+
+    preview, _ = _render(cache, edit, start=5.0, end=6.0)
+    assert 1.5 * SAMPLERATE < preview.shape[1] < edited.shape[1]
+
+
+def test_write_matches_render(narration, tmp_path):
+    cache = RenderCache(narration, tmp_path / "cache", segment_seconds=3.0)
+    output = tmp_path / "out.wav"
+    cache.write(0.8, output)
+    written = sf.read(output, always_2d=True)[0].T
+    np.testing.assert_allclose(written, cache.render(0.8), atol=1 / 32767)
+
+
+def test_ratio_map_validation(narration, tmp_path):
+    cache = RenderCache(narration, tmp_path / "cache")
+    for ratios in ([], [(1.0, 1.2)], [(0, 1.2), (3, 1.1), (2, 1.0)], [(0, -1)]):
+        with pytest.raises(ValueError):
+            cache.render(ratios)
+    with pytest.raises(ValueError):
+        RenderCache(narration, tmp_path / "cache", segment_seconds=0)
@@ -0,0 +1,95 @@
+# this_file: tests/test_segments.py
+"""
+Tests for segmented output with an HLS playlist.
+"""
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from audiostretchy import SegmentedAudioFile, stretch_audio
+
+
+@pytest.fixture
+def source(tmp_path):
+    """Three seconds of a 150 Hz tone, stereo."""
+    t = np.arange(3 * 44100) / 44100
+    tone = 0.3 * np.sin(2 * np.pi * 150 * t)
+    path = tmp_path / "in.wav"
+    sf.write(path, np.stack([tone, tone], axis=1), 44100)
+    return path
+
+
+def _playlist(path):
+    lines = path.read_text().splitlines()
+    segments = [line for line in lines if line and not line.startswith("#")]
+    seconds = [float(line[8:-1]) for line in lines if line.startswith("#EXTINF:")]
+    return lines, segments, seconds
+
+
+def test_segments_are_published_as_they_fill(tmp_path):
+    playlist = tmp_path / "hls" / "index.m3u8"
+    block = np.zeros((2, 15000), np.float32)
+    with SegmentedAudioFile(playlist, 10000, 2, segment_seconds=1.0, format="wav") as f:
+        f.write(block)
+        lines, segments, _ = _playlist(playlist)
+        assert segments == ["index_00000.wav"]
+        assert "#EXT-X-ENDLIST" not in lines
+        # Only finished segments are visible under their final name.
+        assert sorted(p.name for p in playlist.parent.glob("*.wav")) == segments
+    lines, segments, seconds = _playlist(playlist)
+    assert segments == ["index_00000.wav", "index_00001.wav"]
+    assert seconds == [1.0, 0.5]
+    assert lines[-1] == "#EXT-X-ENDLIST"
+    assert "#EXT-X-TARGETDURATION:1" in lines
+
+
+def test_failed_write_leaves_no_partial_segment(tmp_path):
+    playlist = tmp_path / "index.m3u8"
+    with (
+        pytest.raises(RuntimeError),
+        SegmentedAudioFile(playlist, 10000, 1, segment_seconds=1.0, format="wav") as f,
+    ):
+        f.write(np.zeros((1, 12000), np.float32))
+        raise RuntimeError("stretch failed")
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "index.m3u8",
+        "index_00000.wav",
+    ]
+    assert "#EXT-X-ENDLIST" not in playlist.read_text()
+
+
+@pytest.mark.parametrize("streaming", [None, False])
+def test_stretch_audio_segments_join_to_the_full_output(source, tmp_path, streaming):
+    playlist = tmp_path / "hls" / "index.m3u8"
+    full = tmp_path / "full.wav"
+    stretch_audio(
+        source,
+        outputs=[
+            {"path": playlist, "segment_seconds": 1.0, "format": "wav"},
+            {"path": full},
+        ],
+        ratio=1.25,
+        streaming=streaming,
+    )
+
+    _, segments, seconds = _playlist(playlist)
+    assert len(segments) == 4
+    assert seconds[:3] == [1.0, 1.0, 1.0]
+    joined = np.concatenate([sf.read(playlist.parent / name)[0] for name in segments])
+    np.testing.assert_array_equal(joined, sf.read(full)[0])
+
+
+def test_stretch_audio_segment_seconds_defaults_to_mp3(source, tmp_path):
+    playlist = tmp_path / "talk.m3u8"
+    stretch_audio(source, playlist, ratio=0.8, segment_seconds=2.0)
+
+    _, segments, seconds = _playlist(playlist)
+    assert segments == ["talk_00000.mp3", "talk_00001.mp3"]
+    assert sum(seconds) == pytest.approx(2.4, abs=0.01)
+    assert sf.info(tmp_path / segments[0]).samplerate == 44100
+
+
+def test_segment_seconds_must_be_positive(tmp_path):
+    with pytest.raises(ValueError, match="segment_seconds"):
+        SegmentedAudioFile(tmp_path / "index.m3u8", 44100, 1, segment_seconds=0)
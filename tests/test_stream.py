@@ -0,0 +1,181 @@
+# this_file: tests/test_stream.py
+"""
+Tests for block-wise streaming and the Pedalboard-style plugin adapter.
+"""
+
+import weakref
+
+import numpy as np
+import pytest
+from pedalboard import Gain, Pedalboard
+
+from audiostretchy import AudioStretch, StretchPlugin, StretchStream, metrics
+
+
+@pytest.fixture(scope="module")
+def speech():
+    processor = AudioStretch()
+    processor.open("tests/audio.wav")
+    return processor.samples
+
+
+def _one_shot(samples, ratio):
+    processor = AudioStretch()
+    processor.samples = samples.copy()
+    processor.num_channels = samples.shape[0]
+    processor.stretch(ratio)
+    return processor.samples
+
+
+def test_stream_matches_one_shot(speech):
+    """Block-wise streaming produces exactly the one-shot result."""
+    with StretchStream(44100, 1, ratio=1.3) as stream:
+        blocks = [
+            stream.process(speech[:, start : start + 4096])
+            for start in range(0, speech.shape[1], 4096)
+        ]
+        blocks.append(stream.flush())
+
+    np.testing.assert_array_equal(
+        np.concatenate(blocks, axis=1), _one_shot(speech, 1.3)
+    )
+
+
+def test_stream_is_reusable_after_flush(speech):
+    """A flushed stream starts over from a clean state."""
+    with StretchStream(44100, 1, ratio=0.8) as stream:
+        outputs = [
+            np.concatenate([stream.process(speech), stream.flush()], axis=1)
+            for _ in range(2)
+        ]
+    np.testing.assert_array_equal(outputs[0], outputs[1])
+
+
+def test_stream_aligns_channel_groups():
+    """Concurrent channel groups are emitted frame-aligned."""
+    rng = np.random.default_rng(0)
+    samples = (0.2 * rng.standard_normal((4, 44100))).astype(np.float32)
+    with StretchStream(44100, 4, ratio=1.5) as stream:
+        blocks = [
+            stream.process(samples[:, start : start + 1000])
+            for start in range(0, samples.shape[1], 1000)
+        ]
+        blocks.append(stream.flush())
+
+    assert all(block.shape[0] == 4 for block in blocks)
+    total = sum(block.shape[1] for block in blocks)
+    assert abs(total - 66150) < 44100 * 0.05
+
+
+def test_stream_validation():
+    """Mismatched blocks and out-of-range ratios are rejected."""
+    with StretchStream(44100, 2, ratio=1.2) as stream:
+        with pytest.raises(ValueError, match="Expected a"):
+            stream.process(np.zeros((1, 100), dtype=np.float32))
+        with pytest.raises(ValueError, match="double_range"):
+            stream.ratio = 3.0
+
+
+def test_plugin_one_shot_and_layouts(speech):
+    """reset=True returns the complete result in the caller's layout."""
+    expected = _one_shot(speech, 1.3)
+    plugin = StretchPlugin(ratio=1.3)
+
+    np.testing.assert_array_equal(plugin(speech, 44100), expected)
+    np.testing.assert_array_equal(plugin(speech.T.copy(), 44100), expected.T)
+    np.testing.assert_array_equal(plugin(speech[0], 44100), expected[0])
+
+
+def test_plugin_keeps_layout_for_short_tail(speech):
+    """A (1, 2) stereo tail in a frames-first run is not taken for mono."""
+    stereo = np.concatenate([speech, 0.5 * speech])
+    frames = stereo.T.copy()
+    plugin = StretchPlugin(ratio=1.3)
+
+    head = plugin(frames[:-1], 44100, reset=False)
+    tail = plugin(frames[-1:], 44100, reset=False)
+    rest = plugin.flush()
+    plugin.close()
+
+    assert tail.shape[1] == rest.shape[1] == 2
+    streamed = np.concatenate([head, tail, rest])
+    np.testing.assert_array_equal(streamed, _one_shot(stereo, 1.3).T)
+
+
+def test_plugin_rejects_new_channel_count_mid_run(speech):
+    """A run is not silently restarted when the channel count changes."""
+    stereo = np.concatenate([speech, speech])
+    plugin = StretchPlugin(ratio=1.3)
+    plugin(stereo[:, :4096], 44100, reset=False)
+    with pytest.raises(ValueError, match="until flush"):
+        plugin(stereo[0, 4096:8192], 44100, reset=False)
+    plugin.flush()
+    assert plugin(stereo[0, :4096], 44100, reset=False).ndim == 1
+    plugin.close()
+
+
+def test_plugin_between_pedalboards(speech):
+    """Blocks stream through pre-board, stretcher and post-board."""
+    pre, post = Pedalboard([Gain(-6)]), Pedalboard([Gain(6)])
+    plugin = StretchPlugin(ratio=0.75)
+
+    blocks = []
+    for start in range(0, speech.shape[1], 8192):
+        block = pre(speech[:, start : start + 8192], 44100, reset=False)
+        block = plugin(block, 44100, reset=False)
+        blocks.append(post(block, 44100, reset=False))
+    blocks.append(post(plugin.flush(), 44100, reset=False))
+    plugin.close()
+
+    streamed = np.concatenate(blocks, axis=1)
+    expected = _one_shot(speech * 10 ** (-6 / 20), 0.75) * 10 ** (6 / 20)
+    assert streamed.shape == expected.shape
+    np.testing.assert_allclose(streamed, expected, atol=1e-3)
+
+
+def _stream(samples, ratio, block, **options):
+    with StretchStream(44100, samples.shape[0], ratio=ratio, **options) as stream:
+        blocks = [
+            stream.process(samples[:, start : start + block])
+            for start in range(0, samples.shape[1], block)
+        ]
+        blocks.append(stream.flush())
+    return np.concatenate(blocks, axis=1)
+
+
+@pytest.mark.parametrize("block", [512, 65536])
+def test_stream_bypasses_silence(speech, block):
+    """Padding is written directly and keeps the stretched duration exact."""
+    pad = np.zeros((1, 3 * 44100), dtype=np.float32)
+    padded = np.concatenate([pad, speech, pad, speech, pad], axis=1)
+
+    skipped = _stream(padded, 1.25, block)
+    assert skipped.shape[1] == round(padded.shape[1] * 1.25)
+    # The padding comes out as silence and the speech as speech.
+    assert not skipped[:, : 3 * 44100].any()
+    assert not skipped[:, -3 * 44100 :].any()
+    full = _stream(padded, 1.25, block, skip_flat=False)
+    assert abs(
+        np.sqrt(np.mean(skipped**2)) - np.sqrt(np.mean(full**2))
+    ) < 0.02 * np.sqrt(np.mean(full**2))
+
+
+def test_stream_holds_constant_blocks():
+    """A constant (DC) input never reaches the library and stays constant."""
+    samples = np.full((2, 44100), 0.25, dtype=np.float32)
+    with metrics.collecting() as registry:
+        stretched = _stream(samples, 0.8, 8192)
+    np.testing.assert_array_equal(stretched, np.full((2, 35280), 0.25, np.float32))
+    assert "tdhs" not in str(registry.to_json()["histograms"])
+
+
+def test_stream_does_not_keep_caller_block_alive():
+    """The held value is a copy, not a view pinning the caller's buffer."""
+    buffer = np.full((2, 44100), 0.25, dtype=np.float32)
+    alive = weakref.ref(buffer)
+    with StretchStream(44100, 2, ratio=1.5) as stream:
+        stretched = stream.process(buffer)
+        del buffer
+        assert alive() is None
+        stretched = np.concatenate([stretched, stream.flush()], axis=1)
+    np.testing.assert_array_equal(stretched, np.full((2, 66150), 0.25, np.float32))
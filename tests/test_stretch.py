@@ -4,7 +4,8 @@ import numpy as np
 import pytest
 import soundfile  # Using soundfile for reliable audio properties comparison
 
-from audiostretchy.core import AudioStretch, stretch_audio
+from audiostretchy import metrics
+from audiostretchy.core import AudioStretch, stretch_audio, stretch_bytes
 
 
 # Helper function to get audio properties
@@ -237,6 +238,38 @@ def test_stretch_with_gap_ratio(audio_processor, sample_wav_path):
     assert abs(current_frames - expected_frames) < original_frames * 0.05
 
 
+def test_open_region(audio_processor, sample_wav_path):
+    """open(start, duration) decodes exactly the requested window."""
+    audio_processor.open(sample_wav_path)
+    full = audio_processor.samples
+    rate = audio_processor.samplerate
+
+    audio_processor.open(sample_wav_path, start=2.0, duration=1.5)
+    assert audio_processor.samples.shape == (full.shape[0], int(1.5 * rate))
+    np.testing.assert_array_equal(
+        audio_processor.samples, full[:, 2 * rate : int(3.5 * rate)]
+    )
+
+
+def test_stretch_region_discards_preroll(audio_processor, sample_wav_path):
+    """Stretching a region yields the region's duration times the ratio."""
+    audio_processor.open(sample_wav_path, start=3.0, duration=2.0)
+    region_frames = audio_processor.samples.shape[1]
+    audio_processor.stretch(ratio=1.3)
+
+    expected_frames = int(region_frames * 1.3)
+    assert (
+        abs(audio_processor.samples.shape[1] - expected_frames) < 0.02 * region_frames
+    )
+
+
+def test_open_region_validation(audio_processor, sample_wav_path):
+    with pytest.raises(ValueError, match="beyond the end"):
+        audio_processor.open(sample_wav_path, start=60.0)
+    with pytest.raises(ValueError, match="duration must be positive"):
+        audio_processor.open(sample_wav_path, start=1.0, duration=0)
+
+
 # --- Test File-like object I/O ---
 def test_open_wav_filelike(audio_processor, sample_wav_path):
     sf_rate, sf_channels, sf_frames = get_audio_properties(sample_wav_path)
@@ -282,6 +315,20 @@ def test_save_wav_filelike(audio_processor, sample_wav_path, tmp_path):
         )  # Compare content
 
 
+def test_save_filelike_bit_depth(audio_processor, sample_wav_path):
+    """bit_depth overrides the 32-bit default for file objects (e.g. FLAC)."""
+    import io
+
+    audio_processor.open(sample_wav_path)
+    buffer = io.BytesIO()
+    audio_processor.save(file=buffer, format="flac", bit_depth=16)
+
+    buffer.seek(0)
+    info = soundfile.info(buffer)
+    assert info.format == "FLAC"
+    assert info.subtype == "PCM_16"
+
+
 # --- Test stretch_audio global function (CLI entry point) ---
 
 
@@ -302,6 +349,102 @@ def test_stretch_audio_func_wav_to_wav(sample_wav_path, tmp_path):
     assert abs(out_frames - expected_frames) < in_frames * 0.05  # 5% leeway
 
 
+def test_stretch_audio_func_region(sample_wav_path, tmp_path):
+    output_path = tmp_path / "region.wav"
+    stretch_audio(str(sample_wav_path), str(output_path), ratio=1.3, start=1.0, end=3.0)
+
+    in_rate, _, _ = get_audio_properties(sample_wav_path)
+    _, _, out_frames = get_audio_properties(output_path)
+    assert abs(out_frames - 2.0 * in_rate * 1.3) < in_rate * 0.05
+
+
+@pytest.mark.parametrize("region", [{}, {"start": 2.0, "end": 6.0}])
+def test_stretch_audio_func_streaming(sample_wav_path, tmp_path, region):
+    """The block-streaming file path writes the same audio as the in-memory one."""
+    outputs = []
+    for streaming in (False, True):
+        output_path = tmp_path / f"streamed_{streaming}.wav"
+        stretch_audio(
+            sample_wav_path, output_path, ratio=1.3, streaming=streaming, **region
+        )
+        outputs.append(soundfile.read(output_path)[0])
+
+    np.testing.assert_array_equal(outputs[0], outputs[1])
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_stretch_audio_func_outputs(sample_wav_path, tmp_path, streaming):
+    """One decode and stretch feed every output, each at its own rate and format."""
+    outputs = [
+        {"path": tmp_path / "out48.wav", "sample_rate": 48000, "bit_depth": 24},
+        {"path": tmp_path / "out.mp3", "quality": "128k"},
+        {"path": tmp_path / "out24.ogg", "sample_rate": 24000},
+        {"path": tmp_path / "out24.bin", "sample_rate": 24000, "format": "flac"},
+    ]
+    contexts = []
+    for targets in (outputs[:1], outputs):
+        with metrics.collecting() as registry:
+            stretch_audio(
+                sample_wav_path, outputs=targets, ratio=1.3, streaming=streaming
+            )
+        contexts.append(
+            registry.to_json()["counters"]["audiostretchy_contexts_created_total"]
+        )
+    assert contexts[0] == contexts[1]
+
+    in_rate, in_channels, in_frames = get_audio_properties(sample_wav_path)
+    expected_seconds = in_frames / in_rate * 1.3
+    for output, (rate, subtype) in zip(
+        outputs,
+        [(48000, "PCM_24"), (in_rate, "MPEG_LAYER_III"), (24000, None), (24000, None)],
+    ):
+        with soundfile.SoundFile(output["path"]) as sf:
+            assert sf.samplerate == rate
+            assert sf.channels == in_channels
+            assert abs(sf.frames / rate - expected_seconds) < 0.05 * expected_seconds
+            if subtype:
+                assert sf.subtype == subtype
+    with soundfile.SoundFile(outputs[3]["path"]) as sf:
+        assert sf.format == "FLAC"
+
+
+def test_stretch_audio_func_outputs_validation(sample_wav_path, tmp_path):
+    output = tmp_path / "out.wav"
+    with pytest.raises(ValueError, match="exactly one"):
+        stretch_audio(sample_wav_path, output, outputs=[{"path": output}])
+    with pytest.raises(ValueError, match="exactly one"):
+        stretch_audio(sample_wav_path)
+    with pytest.raises(ValueError, match="empty"):
+        stretch_audio(sample_wav_path, outputs=[])
+    with pytest.raises(ValueError, match="needs a path"):
+        stretch_audio(sample_wav_path, outputs=[{"sample_rate": 8000}])
+    with pytest.raises(ValueError, match="bitrate"):
+        stretch_audio(sample_wav_path, outputs=[{"path": output, "bitrate": 1}])
+
+
+@pytest.mark.parametrize("out_format", ["wav", "mp3"])
+def test_stretch_bytes(sample_wav_path, out_format):
+    """stretch_bytes decodes and encodes purely in memory."""
+    import io
+
+    data = Path(sample_wav_path).read_bytes()
+    encoded = stretch_bytes(memoryview(data), ratio=1.3, out_format=out_format)
+
+    in_rate, in_channels, in_frames = get_audio_properties(sample_wav_path)
+    with soundfile.SoundFile(io.BytesIO(encoded)) as sf:
+        assert sf.samplerate == in_rate
+        assert sf.channels == in_channels
+        assert abs(sf.frames - in_frames * 1.3) < in_frames * 0.05
+        if out_format == "wav":
+            assert sf.subtype == "PCM_16"
+
+
+def test_stretch_bytes_invalid_data():
+    """Undecodable input is reported as an OSError."""
+    with pytest.raises(OSError):
+        stretch_bytes(b"not audio", ratio=1.2)
+
+
 def test_stretch_audio_func_mp3_to_mp3(sample_mp3_path, tmp_path):
     input_path = sample_mp3_path
     output_path = tmp_path / "stretched_audio.mp3"
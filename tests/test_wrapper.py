@@ -0,0 +1,37 @@
+# this_file: tests/test_wrapper.py
+"""
+Tests for the ctypes wrapper of the audio-stretch library.
+"""
+
+import numpy as np
+
+from audiostretchy.c_interface import TDHSAudioStretch
+
+
+def test_output_capacity_beyond_int32():
+    """Capacities for multi-hour inputs are summed per call, not overflowed."""
+    stretcher = TDHSAudioStretch(132, 801, 2, 0)
+    num_frames = 12 * 3600 * 96000
+    try:
+        capacity = stretcher.output_capacity(num_frames, 1.5)
+    finally:
+        stretcher.deinit()
+    assert capacity > 2**31
+    assert capacity >= num_frames * 1.5
+
+
+def test_long_input_split_into_calls(monkeypatch):
+    """Splitting an input into bounded native calls does not change the output."""
+    t = np.arange(88200) / 44100
+    samples = (8000 * np.sin(2 * np.pi * 140 * t)).astype(np.int16)
+
+    outputs = []
+    for max_frames in (TDHSAudioStretch.MAX_CALL_FRAMES, 5000):
+        monkeypatch.setattr(TDHSAudioStretch, "MAX_CALL_FRAMES", max_frames)
+        stretcher = TDHSAudioStretch(132, 801, 1, 0)
+        output = np.empty(stretcher.output_capacity(len(samples), 1.3), np.int16)
+        produced = stretcher.process_samples(samples, len(samples), output, 1.3)
+        stretcher.deinit()
+        outputs.append(output[:produced])
+
+    np.testing.assert_array_equal(outputs[0], outputs[1])